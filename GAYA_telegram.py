@@ -41,18 +41,19 @@ class GAYATelegramBot:
             nome_arquivo = update.message.document.file_name
             logger.info(f"📎 Arquivo recebido: {nome_arquivo}")
             
-            # Só aceita Excel por enquanto
+            # Aceita Excel e as exportações em CSV/TSV
+            from leitor_planilhas import EXTENSOES_ACEITAS
             extensao = os.path.splitext(nome_arquivo)[1].lower()
-            if extensao not in ['.xlsx', '.xls']:
+            if extensao not in EXTENSOES_ACEITAS:
                 await update.message.reply_text(
-                    "❌ *Só aceito Excel por enquanto* (.xlsx, .xls)\n"
+                    "❌ *Só aceito Excel ou CSV* (.xlsx, .xls, .csv, .tsv)\n"
                     "Envie um arquivo Excel como o exemplo que você mostrou!",
                     parse_mode='Markdown'
                 )
                 return
             
             # 1️⃣ AVISAR INÍCIO DO PROCESSAMENTO
-            await update.message.reply_text(
+            processing_msg = await update.message.reply_text(
                 f"📊 *Processando {nome_arquivo}...*\n\n"
                 "⌛ Isso pode levar alguns segundos...",
                 parse_mode='Markdown'
@@ -63,19 +64,23 @@ class GAYATelegramBot:
             file_path = f"/tmp/{nome_arquivo}"
             await file.download_to_drive(file_path)
             
-            # PAUSA PARA PROCESSAMENTO
-            time.sleep(2)
-            
-            # 3️⃣ PROCESSAR EXCEL - IMPORT DINÂMICO
+            # 3️⃣ PROCESSAR E 4️⃣ SALVAR - LEITURA ÚNICA PELO PIPELINE
             try:
-                from excel_processor import ExcelProcessor
-                processor = ExcelProcessor()
-                transportes = processor.processar_excel(file_path)
+                from executor_analises import ingerir_planilha_async, progresso_telegram
+                from gaya_db import db
+                ingestao = await ingerir_planilha_async(
+                    file_path,
+                    ao_progredir=progresso_telegram(context.bot, processing_msg, f"📊 Processando {nome_arquivo}..."),
+                    nome_arquivo=nome_arquivo,
+                    gaya_db=db
+                )
+                transportes = ingestao["transportes"]
+                salvos = ingestao["transportes_salvos"]
             except ImportError as e:
-                logger.error(f"❌ Erro ao importar processor: {e}")
+                logger.error(f"❌ Erro ao importar pipeline: {e}")
                 await update.message.reply_text(
                     "❌ *Módulo de processamento não encontrado!*\n"
-                    "Verifique se o arquivo excel_processor.py está na mesma pasta.",
+                    "Verifique se os arquivos executor_analises.py e gaya_db.py estão na mesma pasta.",
                     parse_mode='Markdown'
                 )
                 return
@@ -92,32 +97,8 @@ class GAYATelegramBot:
                     os.remove(file_path)
                 return
             
-            # PAUSA PARA BANCO DE DADOS
-            time.sleep(1)
-            
-            # 4️⃣ SALVAR NO BANCO - IMPORT DINÂMICO
-            try:
-                from gaya_db import db
-                salvos = 0
-                for transporte in transportes:
-                    if db.salvar_transporte(transporte):
-                        salvos += 1
-                    
-                    # PAUSA ENTRE CADA REGISTRO (importante para RAM baixa)
-                    if salvos % 5 == 0:
-                        time.sleep(0.3)
-                
-                # 5️⃣ CONTAR TOTAL NO BANCO
-                total_banco = db.contar_transportes()
-                
-            except ImportError as e:
-                logger.error(f"❌ Erro ao importar banco: {e}")
-                await update.message.reply_text(
-                    "❌ *Erro no banco de dados!*\n"
-                    "Verifique se o arquivo gaya_db.py está na mesma pasta.",
-                    parse_mode='Markdown'
-                )
-                return
+            # 5️⃣ CONTAR TOTAL NO BANCO
+            total_banco = db.contar_transportes()
             
             # 6️⃣ LIMPAR ARQUIVO TEMPORÁRIO
             if os.path.exists(file_path):
@@ -133,10 +114,10 @@ class GAYATelegramBot:
 • {total_banco} transportes totais no sistema
 
 🏭 *Clientes principais:*
-{self._extrair_clientes(transportes)}
+{self._listar_resumo(ingestao['resumo'].get('clientes_principais'), 'cliente')}
 
 🚛 *Tipos de veículo:*
-{self._extrair_veiculos(transportes)}
+{self._listar_resumo(ingestao['resumo'].get('veiculos_principais'), 'veículo')}
 
 *Use /fretes para consultar os dados!*
             """.strip()
@@ -159,37 +140,11 @@ class GAYATelegramBot:
                 parse_mode='Markdown'
             )
 
-    def _extrair_clientes(self, transportes):
-        """Extrai clientes únicos para o resumo"""
-        try:
-            clientes = set()
-            for t in transportes[:10]:  # Aumentei para 10
-                if t.get('customer_name'):
-                    clientes.add(t['customer_name'])
-            clientes_lista = list(clientes)[:5]  # Mostra até 5
-            if clientes_lista:
-                return "\n".join([f"• {c}" for c in clientes_lista])
-            else:
-                return "• Nenhum cliente identificado"
-        except Exception as e:
-            logger.error(f"Erro ao extrair clientes: {e}")
-            return "• Erro ao extrair clientes"
-
-    def _extrair_veiculos(self, transportes):
-        """Extrai veículos únicos para o resumo"""
-        try:
-            veiculos = set()
-            for t in transportes[:10]:
-                if t.get('vehicle_type'):
-                    veiculos.add(t['vehicle_type'])
-            veiculos_lista = list(veiculos)[:5]
-            if veiculos_lista:
-                return "\n".join([f"• {v}" for v in veiculos_lista])
-            else:
-                return "• Nenhum veículo identificado"
-        except Exception as e:
-            logger.error(f"Erro ao extrair veículos: {e}")
-            return "• Erro ao extrair veículos"
+    def _listar_resumo(self, itens, descricao):
+        """Formata a lista de principais itens calculada pelo pipeline"""
+        if itens:
+            return "\n".join([f"• {item}" for item in itens])
+        return f"• Nenhum {descricao} identificado"
 
     # ... (mantenha TODOS os outros métodos existentes: _handle_callback, etc)
 
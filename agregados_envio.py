@@ -0,0 +1,73 @@
+# agregados_envio.py - CONTAGENS PRONTAS DE CADA ENVIO (RESPOSTAS DO CHAT)
+import logging
+from collections import Counter
+from typing import Any, Dict
+
+import pandas as pd
+
+from leitor_planilhas import como_texto
+
+logger = logging.getLogger('GAYA_AGREGADOS')
+
+# Dimensão agregada -> campo do frame estruturado
+CAMPOS_AGREGADOS = {
+    'estado': 'estado_destino',
+    'cidade': 'cidade_destino',
+    'cliente': 'nome_destino',
+    'veiculo': 'codigo_veiculo'
+}
+# Mesma dimensão -> coluna da tabela transportes (esquema único de migracoes)
+COLUNAS_AGREGADOS_TRANSPORTES = {
+    'estado': 'estado_destino',
+    'cidade': 'cidade_destino',
+    'cliente': 'cliente',
+    'veiculo': 'tipo_veiculo'
+}
+# Dimensões que vêm do resultado da análise, não de uma coluna
+DIMENSAO_ACESSORIO = 'acessorio'
+DIMENSAO_INCONSISTENCIA = 'inconsistencia'
+# Total de registros do envio: dimensao 'total', valor 'registros'
+DIMENSAO_TOTAL = 'total'
+VALOR_TOTAL = 'registros'
+
+COLUNAS_AGREGADOS = ['dimensao', 'valor', 'quantidade']
+
+def agregar_envio(frame: pd.DataFrame, resultado_analise: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Contagens do envio por estado, cidade, cliente, tipo de veículo,
+    acessório e tipo de inconsistência, numa tabela
+    (dimensao, valor, quantidade). Valores vazios não entram.
+    """
+    partes = [pd.DataFrame([[DIMENSAO_TOTAL, VALOR_TOTAL, len(frame)]], columns=COLUNAS_AGREGADOS)]
+
+    for dimensao, campo in CAMPOS_AGREGADOS.items():
+        if campo not in frame.columns:
+            continue
+        valores = frame[campo].dropna().map(como_texto).astype(str).str.strip()
+        contagem = valores[valores != ''].value_counts()
+        partes.append(pd.DataFrame({
+            'dimensao': dimensao,
+            'valor': contagem.index.astype(str),
+            'quantidade': contagem.to_numpy()
+        }))
+
+    # Registros com cada acessório crítico (um registro conta uma vez por acessório)
+    acessorios = Counter(
+        tipo
+        for detalhe in resultado_analise.get("analise_acessorios", {}).get("detalhes_acessorios", [])
+        for tipo in detalhe["acessorios_identificados"]
+    )
+    inconsistencias = Counter(
+        inconsistencia["tipo"]
+        for inconsistencia in resultado_analise.get("analise_consistencia", {}).get("inconsistencias", [])
+    )
+    for dimensao, contagem in ((DIMENSAO_ACESSORIO, acessorios), (DIMENSAO_INCONSISTENCIA, inconsistencias)):
+        if contagem:
+            partes.append(pd.DataFrame(
+                [(dimensao, valor, quantidade) for valor, quantidade in contagem.items()],
+                columns=COLUNAS_AGREGADOS
+            ))
+
+    agregados = pd.concat(partes, ignore_index=True)
+    agregados['quantidade'] = agregados['quantidade'].astype('int64')
+    return agregados
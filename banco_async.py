@@ -0,0 +1,48 @@
+# banco_async.py - CONSULTAS AO BANCO FORA DO EVENT LOOP (TELEGRAM / FASTAPI)
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from settings import CONFIG
+
+logger = logging.getLogger('GAYA_BANCO_ASYNC')
+
+_executor = None
+_semaforo = None
+
+def _obter_executor() -> ThreadPoolExecutor:
+    """Threads dedicadas às consultas (não disputam o executor padrão do loop)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=CONFIG["MAX_CONSULTAS_SIMULTANEAS"],
+            thread_name_prefix="gaya-banco"
+        )
+    return _executor
+
+def _obter_semaforo() -> asyncio.Semaphore:
+    """Limita quantas consultas ficam em andamento ou na fila ao mesmo tempo"""
+    global _semaforo
+    if _semaforo is None:
+        _semaforo = asyncio.Semaphore(CONFIG["MAX_CONSULTAS_SIMULTANEAS"] * 4)
+    return _semaforo
+
+async def executar_consulta(funcao: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Executa uma função bloqueante da camada de dados (database_manager,
+    GayaDatabase, gaya_llm_router...) numa thread do pool e aguarda o
+    resultado sem travar o event loop. Uma consulta lenta ocupa só uma
+    thread; as demais mensagens continuam sendo atendidas.
+    """
+    loop = asyncio.get_running_loop()
+    async with _obter_semaforo():
+        return await loop.run_in_executor(_obter_executor(), functools.partial(funcao, *args, **kwargs))
+
+def encerrar():
+    """Libera as threads do pool (encerramento do bot/API)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,24 @@
+# bench_estruturar_dados.py - _estruturar_dados coluna a coluna x versão original (iterrows)
+# Uso (na raiz do repositório): python -m benchmarks.bench_estruturar_dados [linhas ...]
+import sys
+import time
+
+from planilha_analyzer import PlanilhaAnalyzer
+from benchmarks.referencia_estruturar import estruturar_iterrows, planilha_jd
+
+def medir(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+def main(tamanhos):
+    analyzer = PlanilhaAnalyzer()
+    print(f"{'linhas':>8} {'iterrows':>10} {'colunas':>10} {'ganho':>7}")
+    for linhas in tamanhos:
+        df = planilha_jd(linhas)
+        antigo = medir(estruturar_iterrows, analyzer, df)
+        novo = medir(analyzer._estruturar_dados, df)
+        print(f"{linhas:>8} {antigo:>9.2f}s {novo:>9.2f}s {antigo / novo:>6.1f}x")
+
+if __name__ == "__main__":
+    main([int(valor) for valor in sys.argv[1:]] or [2000, 50000])
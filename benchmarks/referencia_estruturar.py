@@ -0,0 +1,34 @@
+# referencia_estruturar.py - REFERÊNCIAS DE _estruturar_dados PARA O BENCHMARK E OS TESTES
+import numpy as np
+import pandas as pd
+
+from planilha_analyzer import PlanilhaAnalyzer
+
+def estruturar_iterrows(analyzer: PlanilhaAnalyzer, df: pd.DataFrame):
+    """Implementação original de _estruturar_dados (linha a linha), referência do resultado"""
+    dados_estruturados = []
+    for index, row in df.iterrows():
+        registro = {}
+        for coluna_original, campo_mapeado in analyzer.mapeamento_campos.items():
+            if coluna_original in row:
+                valor = row[coluna_original]
+                if pd.isna(valor):
+                    valor = None
+                elif campo_mapeado in ['acessorios', 'instrucoes_especiais']:
+                    valor = str(valor) if valor else ""
+                registro[campo_mapeado] = valor
+        registro['_linha_planilha'] = index + 2
+        dados_estruturados.append(registro)
+    return dados_estruturados
+
+def planilha_jd(linhas: int, semente: int = 0) -> pd.DataFrame:
+    """Exportação JD sintética com todas as colunas do mapeamento e valores de borda"""
+    rng = np.random.default_rng(semente)
+    colunas = {}
+    for coluna in PlanilhaAnalyzer().mapeamento_campos:
+        colunas[coluna] = [f"{coluna[:3].upper()}{valor}" for valor in rng.integers(0, 500, linhas)]
+    colunas["Load No"] = rng.integers(1000, 1100, linhas)
+    colunas["Planned Ship Date"] = pd.Series(pd.date_range("2025-01-01", periods=linhas, freq="h")).dt.strftime("%d/%m/%Y")
+    colunas["Accessory"] = rng.choice(np.array(["GABINA DUAL", "BALAO", "", 0, 12.5, False, None, np.nan], dtype=object), linhas)
+    colunas["Special Instructions"] = rng.choice(np.array(["FRAGIL", 0, 12.5, False, None], dtype=object), linhas)
+    return pd.DataFrame(colunas)
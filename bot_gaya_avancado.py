@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import logging
 import requests
-import sqlite3
 import os
 import time
 import json
@@ -20,11 +19,13 @@ OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
 
 # Importar nossos módulos
 from gaya_db import GayaDatabase
-from excel_processor import ExcelProcessor
+from executor_analises import ingerir_planilha_async, progresso_telegram
+from leitor_planilhas import EXTENSOES_ACEITAS
+from conexao_db import conexao_leitura
+from banco_async import executar_consulta
 
 # Inicializar
 db = GayaDatabase(DB_PATH)
-excel_processor = ExcelProcessor()
 
 # Controle de custos
 custo_total = 0.0
@@ -32,12 +33,12 @@ custo_total = 0.0
 def executar_consulta_sql(consulta):
     """Executa consulta SQL no banco e retorna resultados"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(consulta)
-        resultados = cursor.fetchall()
-        colunas = [desc[0] for desc in cursor.description] if cursor.description else []
-        conn.close()
+        # Conexão somente leitura: a consulta não altera o banco
+        with conexao_leitura(DB_PATH) as conn:
+            cursor = conn.cursor()
+            cursor.execute(consulta)
+            resultados = cursor.fetchall()
+            colunas = [desc[0] for desc in cursor.description] if cursor.description else []
         
         # Formatar resultados
         if colunas and resultados:
@@ -181,24 +182,14 @@ def decidir_melhor_ia(pergunta, dados_banco):
         return consultar_openrouter(pergunta, dados_banco)
 
 def obter_dados_estatisticos():
-    """Obtém estatísticas básicas do banco"""
+    """Obtém estatísticas básicas do banco (contagens já agregadas na ingestão)"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        agregados = db.obter_agregados(limite=5)
         
-        cursor.execute("SELECT COUNT(*) FROM transportes")
-        total = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT destination_city, COUNT(*) FROM transportes WHERE destination_city != '' GROUP BY destination_city ORDER BY COUNT(*) DESC LIMIT 5")
-        top_cidades = cursor.fetchall()
-        
-        cursor.execute("SELECT customer_name, COUNT(*) FROM transportes WHERE customer_name != '' GROUP BY customer_name ORDER BY COUNT(*) DESC LIMIT 5")
-        top_clientes = cursor.fetchall()
-        
-        cursor.execute("SELECT vehicle_type, COUNT(*) FROM transportes WHERE vehicle_type != '' GROUP BY vehicle_type ORDER BY COUNT(*) DESC LIMIT 5")
-        top_veiculos = cursor.fetchall()
-        
-        conn.close()
+        total = sum(qtd for _, qtd in agregados.get('total', []))
+        top_cidades = agregados.get('cidade', [])
+        top_clientes = agregados.get('cliente', [])
+        top_veiculos = agregados.get('veiculo', [])
         
         return f"""
 ESTATÍSTICAS:
@@ -234,41 +225,46 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     file_name = update.message.document.file_name
     logging.info(f"📎 Arquivo recebido: {file_name}")
     
-    if not file_name.lower().endswith(('.xlsx', '.xls')):
-        await update.message.reply_text("❌ Envie um arquivo Excel (.xlsx ou .xls)")
+    if not file_name.lower().endswith(EXTENSOES_ACEITAS):
+        await update.message.reply_text("❌ Envie um arquivo Excel (.xlsx ou .xls) ou CSV (.csv ou .tsv)")
         return
     
-    await update.message.reply_text(f"📊 Processando {file_name}...")
+    processing_msg = await update.message.reply_text(f"📊 Processando {file_name}...")
     
     try:
         file = await update.message.document.get_file()
         file_path = f"/tmp/{file_name}"
         await file.download_to_drive(file_path)
         
-        if excel_processor:
-            transportes = excel_processor.processar_excel(file_path)
+        ingestao = await ingerir_planilha_async(
+            file_path,
+            ao_progredir=progresso_telegram(context.bot, processing_msg, f"📊 Processando {file_name}..."),
+            nome_arquivo=file_name,
+            gaya_db=db
+        )
+        transportes = ingestao["transportes"]
+        salvos = ingestao["transportes_salvos"]
+        
+        if ingestao["duplicado"]:
+            await update.message.reply_text(
+                f"♻️ {file_name} tem o mesmo conteúdo de um arquivo já recebido. Nada foi gravado de novo."
+            )
+        elif transportes and db:
+            total_banco = await executar_consulta(db.contar_transportes)
             
-            if transportes and db:
-                salvos = 0
-                for transporte in transportes:
-                    if db.salvar_transporte(transporte):
-                        salvos += 1
-                
-                total_banco = db.contar_transportes()
-                
-                # Usar OpenRouter para análise avançada
-                contexto = f"""
+            # Usar OpenRouter para análise avançada
+            contexto = f"""
 NOVOS DADOS PROCESSADOS:
 • Arquivo: {file_name}
 • Transportes encontrados: {len(transportes)}
 • Salvos no banco: {salvos}
 • Total no sistema: {total_banco}
 """
-                pergunta = "Analise esses novos dados de transporte e forneça um relatório executivo em português com insights logísticos"
-                resposta = consultar_openrouter(pergunta, contexto)
-                
-                if resposta:
-                    mensagem = f"""
+            pergunta = "Analise esses novos dados de transporte e forneça um relatório executivo em português com insights logísticos"
+            resposta = consultar_openrouter(pergunta, contexto)
+            
+            if resposta:
+                mensagem = f"""
 ✅ ARQUIVO PROCESSADO!
 
 {resposta}
@@ -278,8 +274,8 @@ NOVOS DADOS PROCESSADOS:
 • {salvos} registros salvos
 • {total_banco} transportes totais
 """
-                else:
-                    mensagem = f"""
+            else:
+                mensagem = f"""
 ✅ ARQUIVO PROCESSADO!
 
 📊 Resultados:
@@ -289,10 +285,10 @@ NOVOS DADOS PROCESSADOS:
 
 (Análise avançada temporariamente indisponível)
 """
-                
-                await update.message.reply_text(mensagem)
-            else:
-                await update.message.reply_text("❌ Não consegui extrair dados do arquivo.")
+            
+            await update.message.reply_text(mensagem)
+        else:
+            await update.message.reply_text("❌ Não consegui extrair dados do arquivo.")
         
         os.remove(file_path)
         
@@ -309,7 +305,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Obter dados estatísticos
-        dados_estatisticos = obter_dados_estatisticos()
+        dados_estatisticos = await executar_consulta(obter_dados_estatisticos)
         
         # Decidir qual IA usar e obter resposta
         resposta = decidir_melhor_ia(user_message, dados_estatisticos)
@@ -17,14 +17,16 @@ DB_PATH = '/root/gaya-assistente/dados/gaya.db'
 # Importar nossos módulos
 try:
     from gaya_db import GayaDatabase
-    from excel_processor import ExcelProcessor
+    from executor_analises import ingerir_planilha_async, progresso_telegram
+    from leitor_planilhas import EXTENSOES_ACEITAS
+    from banco_async import executar_consulta
     db = GayaDatabase(DB_PATH)
-    excel_processor = ExcelProcessor()
     logging.info("✅ Módulos carregados com sucesso!")
 except ImportError as e:
     logging.error(f"❌ Erro ao carregar módulos: {e}")
     db = None
-    excel_processor = None
+    ingerir_planilha_async = None
+    EXTENSOES_ACEITAS = ('.xlsx', '.xls')
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
@@ -42,12 +44,12 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     file_name = update.message.document.file_name
     logging.info(f"📎 Arquivo recebido: {file_name}")
     
-    # Verificar se é Excel
-    if not file_name.lower().endswith(('.xlsx', '.xls')):
-        await update.message.reply_text("❌ Por favor, envie um arquivo Excel (.xlsx ou .xls)")
+    # Verificar se é Excel ou CSV
+    if not file_name.lower().endswith(EXTENSOES_ACEITAS):
+        await update.message.reply_text("❌ Por favor, envie um arquivo Excel (.xlsx ou .xls) ou CSV (.csv ou .tsv)")
         return
     
-    await update.message.reply_text(f"📊 Processando {file_name}...")
+    processing_msg = await update.message.reply_text(f"📊 Processando {file_name}...")
     
     try:
         # Baixar arquivo
@@ -55,17 +57,23 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         file_path = f"/tmp/{file_name}"
         await file.download_to_drive(file_path)
         
-        # Processar Excel
-        if excel_processor:
-            transportes = excel_processor.processar_excel(file_path)
+        # Processar Excel (leitura única: extrai e salva no mesmo passo)
+        if ingerir_planilha_async:
+            ingestao = await ingerir_planilha_async(
+                file_path,
+                ao_progredir=progresso_telegram(context.bot, processing_msg, f"📊 Processando {file_name}..."),
+                nome_arquivo=file_name,
+                gaya_db=db
+            )
+            transportes = ingestao["transportes"]
+            salvos = ingestao["transportes_salvos"]
             
-            if transportes and db:
-                salvos = 0
-                for transporte in transportes:
-                    if db.salvar_transporte(transporte):
-                        salvos += 1
-                
-                total_banco = db.contar_transportes()
+            if ingestao["duplicado"]:
+                await update.message.reply_text(
+                    f"♻️ {file_name} tem o mesmo conteúdo de um arquivo já recebido. Nada foi gravado de novo."
+                )
+            elif transportes and db:
+                total_banco = await executar_consulta(db.contar_transportes)
                 
                 resumo = f"""
 ✅ ARQUIVO PROCESSADO!
@@ -95,7 +103,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if any(word in user_message for word in ['fretes', 'cargas', 'transporte']):
         if db:
-            total = db.contar_transportes()
+            total = await executar_consulta(db.contar_transportes)
             await update.message.reply_text(f"📦 Tenho {total} transportes no banco de dados!")
         else:
             await update.message.reply_text("📦 Banco de dados não disponível.")
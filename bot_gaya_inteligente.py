@@ -7,14 +7,16 @@ from telegram.ext import Application, CommandHandler, MessageHandler, filters, C
 from dotenv import load_dotenv
 
 # Importar todos os módulos modularizados
-from planilha_analyzer import PlanilhaAnalyzer
-from gaya_llm_router import processar_com_llm
+from executor_analises import ingerir_planilha_async, progresso_telegram
+from leitor_planilhas import EXTENSOES_ACEITAS
+from gaya_llm_router import gerar_respostas
 from database_manager import (
     init_db, contar_transportes, verificar_chassis_repetidos,
     obter_transportes_por_periodo, obter_transportes_por_status,
     obter_transportes_por_origem_destino, obter_dados_chassis
 )
 from intelligent_responses import interpretar_pergunta
+from banco_async import executar_consulta
 
 # Carregar variáveis do arquivo .env
 load_dotenv()
@@ -30,9 +32,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger('GAYA_BOT')
 
-# Inicializar analyzer
-planilha_analyzer = PlanilhaAnalyzer()
-
 # 🆕 HANDLER DE DOCUMENTOS COM ANÁLISE INTELIGENTE
 
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -40,8 +39,8 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     document = update.message.document
     user = update.message.from_user
     
-    if not document.file_name.lower().endswith(('.xlsx', '.xls')):
-        await update.message.reply_text("❌ Por favor, envie um arquivo Excel (.xlsx ou .xls)")
+    if not document.file_name.lower().endswith(EXTENSOES_ACEITAS):
+        await update.message.reply_text("❌ Por favor, envie um arquivo Excel (.xlsx ou .xls) ou CSV (.csv ou .tsv)")
         return
     
     logger.info(f"📊 Recebida planilha: {document.file_name} de {user.first_name}")
@@ -54,12 +53,15 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         file_path = f"temp_{document.file_name}"
         await file.download_to_drive(file_path)
         
-        # 🎯 ANÁLISE INTELIGENTE
-        resultado_analise = planilha_analyzer.analisar_planilha(file_path)
-        
-        # 🎯 SALVAR NO BANCO
-        from database_manager import salvar_analise_planilha
-        salvou = salvar_analise_planilha(resultado_analise)
+        # 🎯 ANÁLISE INTELIGENTE + SALVAR NO BANCO (leitura única, em outro processo)
+        ingestao = await ingerir_planilha_async(
+            file_path,
+            ao_progredir=progresso_telegram(context.bot, processing_msg, "🔍 **Analisando e salvando no banco...**"),
+            nome_arquivo=document.file_name,
+            db_path=DATABASE_PATH
+        )
+        resultado_analise = ingestao["analise"]
+        salvou = ingestao["salvou_analise"]
         
         # Limpar arquivo temporário
         os.remove(file_path)
@@ -77,10 +79,22 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         inconsistencias = resultado_analise["analise_consistencia"]["inconsistencias_detectadas"]
         acessorios_identificados = resultado_analise["analise_acessorios"]["acessorios_identificados"]
         
+        if ingestao["duplicado"]:
+            metadata = resultado_analise["planilha_metadata"]
+            status_banco = (
+                f"♻️ **PLANILHA JÁ ANALISADA!** Conteúdo idêntico a "
+                f"{metadata['nome_arquivo']} ({metadata['data_processamento']}). "
+                "Resultado reaproveitado, nada foi gravado de novo."
+            )
+        elif salvou:
+            status_banco = '💾 **DADOS SALVOS NO BANCO!**'
+        else:
+            status_banco = '❌ **Erro ao salvar no banco**'
+        
         mensagem = f"""
 ✅ **Análise Inteligente Concluída!**
 
-{'💾 **DADOS SALVOS NO BANCO!**' if salvou else '❌ **Erro ao salvar no banco**'}
+{status_banco}
 
 📊 **Resumo da Planilha:**
 • 📈 Registros processados: {total_registros}
@@ -148,8 +162,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if user_message.lower() in ['/dados', 'dados', 'status']:
         try:
-            total = contar_transportes(DATABASE_PATH)
-            repetidos = verificar_chassis_repetidos(DATABASE_PATH)
+            total = await executar_consulta(contar_transportes, DATABASE_PATH)
+            repetidos = await executar_consulta(verificar_chassis_repetidos, DATABASE_PATH)
             
             mensagem = f"""
 📊 **Status do Banco de Dados:**
@@ -170,7 +184,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if user_message.lower() in ['/chassis', 'chassis', 'repetidos']:
         try:
-            repetidos = verificar_chassis_repetidos(DATABASE_PATH)
+            repetidos = await executar_consulta(verificar_chassis_repetidos, DATABASE_PATH)
             if not repetidos:
                 await update.message.reply_text("✅ Nenhum chassis repetido encontrado!")
             else:
@@ -190,8 +204,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         processing_msg = await update.message.reply_text("🤔 **Processando sua pergunta...**")
         
-        # Usar LLM Router para processar a mensagem
-        resposta_llm = processar_com_llm(user_message)
+        # Usar LLM Router: respostas longas vêm em partes, cada uma lida do banco só quando vai ser enviada
+        respostas = gerar_respostas(user_message)
+        resposta_llm = await executar_consulta(next, respostas)
         
         await context.bot.edit_message_text(
             chat_id=processing_msg.chat_id,
@@ -199,6 +214,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text=resposta_llm
         )
         
+        while True:
+            parte = await executar_consulta(next, respostas, None)
+            if parte is None:
+                break
+            await update.message.reply_text(parte)
+        
     except Exception as e:
         logger.error(f"Erro no processamento LLM: {str(e)}")
         await update.message.reply_text("""
@@ -267,8 +288,8 @@ async def show_system_status(update: Update, context: ContextTypes.DEFAULT_TYPE)
 **📊 Estatísticas do Banco:**
 """
     try:
-        total = contar_transportes(DATABASE_PATH)
-        repetidos = verificar_chassis_repetidos(DATABASE_PATH)
+        total = await executar_consulta(contar_transportes, DATABASE_PATH)
+        repetidos = await executar_consulta(verificar_chassis_repetidos, DATABASE_PATH)
         status_texto += f"• Transportes: {total}\n"
         status_texto += f"• Chassis repetidos: {len(repetidos)}\n"
     except Exception as e:
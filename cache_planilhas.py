@@ -0,0 +1,99 @@
+# cache_planilhas.py - CACHE EM DISCO DAS PLANILHAS JÁ LIDAS
+import pandas as pd
+import logging
+import os
+from typing import List
+
+from settings import CONFIG
+
+logger = logging.getLogger('GAYA_CACHE')
+
+EXTENSAO = '.pkl.gz'
+COMPRESSAO = {'method': 'gzip', 'compresslevel': 1}  # leve: prioriza a velocidade de leitura
+
+class CachePlanilhas:
+    """
+    Guarda cada planilha já lida (DataFrame bruto, antes do mapeamento) em
+    disco, no formato colunar do pandas (comprimido), chaveada pelo hash
+    do arquivo. Colunas de texto repetitivo viram category para ocupar
+    menos espaço.
+    Quando o total passa de `tamanho_maximo` bytes, os arquivos menos
+    usados recentemente (LRU, pelo mtime) são removidos.
+    """
+
+    def __init__(self, diretorio: str = None, tamanho_maximo: int = None):
+        self.diretorio = diretorio or CONFIG["CACHE_PLANILHAS_DIR"]
+        self.tamanho_maximo = tamanho_maximo or CONFIG["CACHE_PLANILHAS_MAX_MB"] * 1024 * 1024
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _caminho(self, hash_arquivo: str) -> str:
+        return os.path.join(self.diretorio, f"{hash_arquivo}{EXTENSAO}")
+
+    def salvar(self, hash_arquivo: str, df: pd.DataFrame) -> bool:
+        """Grava a planilha no cache (escrita atômica) e aplica o limite de tamanho"""
+        try:
+            compacto = df.copy()
+            for coluna in compacto.columns:
+                valores = compacto[coluna]
+                texto = valores.dtype == object or pd.api.types.is_string_dtype(valores)
+                if texto and valores.nunique(dropna=True) <= len(valores) // 2:
+                    compacto[coluna] = valores.astype('category')
+
+            caminho = self._caminho(hash_arquivo)
+            temporario = f"{caminho}.{os.getpid()}.tmp"  # processos paralelos não colidem
+            compacto.to_pickle(temporario, compression=COMPRESSAO, protocol=5)
+            os.replace(temporario, caminho)
+
+            self._liberar_espaco()
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao gravar planilha no cache: {e}")
+            return False
+
+    def carregar(self, hash_arquivo: str) -> pd.DataFrame:
+        """Lê a planilha do cache, ou None se não estiver lá"""
+        caminho = self._caminho(hash_arquivo)
+        try:
+            df = pd.read_pickle(caminho, compression='gzip')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"❌ Erro ao ler planilha do cache: {e}")
+            return None
+
+        # Marca como usada agora (LRU)
+        os.utime(caminho)
+
+        for coluna in df.columns:
+            if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                df[coluna] = df[coluna].astype(df[coluna].cat.categories.dtype)
+        return df
+
+    def contem(self, hash_arquivo: str) -> bool:
+        return os.path.exists(self._caminho(hash_arquivo))
+
+    def hashes(self) -> List[str]:
+        """Hashes disponíveis no cache, do mais recente para o mais antigo"""
+        return [os.path.basename(caminho)[:-len(EXTENSAO)] for caminho in reversed(self._arquivos())]
+
+    def _arquivos(self) -> List[str]:
+        """Arquivos do cache do menos para o mais usado recentemente"""
+        caminhos = [
+            os.path.join(self.diretorio, nome)
+            for nome in os.listdir(self.diretorio)
+            if nome.endswith(EXTENSAO)
+        ]
+        return sorted(caminhos, key=os.path.getmtime)
+
+    def _liberar_espaco(self):
+        """Remove os arquivos menos usados até caber no tamanho máximo"""
+        arquivos = self._arquivos()
+        total = sum(os.path.getsize(caminho) for caminho in arquivos)
+
+        for caminho in arquivos:
+            if total <= self.tamanho_maximo:
+                break
+            total -= os.path.getsize(caminho)
+            os.remove(caminho)
+            logger.info(f"🧹 Planilha removida do cache: {os.path.basename(caminho)}")
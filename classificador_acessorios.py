@@ -0,0 +1,90 @@
+# classificador_acessorios.py - CLASSIFICAÇÃO DO TEXTO LIVRE DE ACESSÓRIOS
+import logging
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger('GAYA_ACESSORIOS')
+
+# Acessório crítico -> padrão procurado no texto livre de acessórios.
+# A ordem é a prioridade: em empate de tamanho, ganha o declarado antes.
+# Os curingas não atravessam separadores: cada item da lista é um acessório.
+PADROES_ACESSORIOS = {
+    'GABINA DUAL': r'gabina[^,;/]*dual|dual[^,;/]*gabina',
+    'DUALF ARR': r'dualf[^,;/]*arr|arr[^,;/]*dualf',
+    'BALAO': r'balao',
+    'PNEU ARROZEIRO': r'arrozeiro|arr',
+    'GABINA SIMPLES': r'gabina',
+    'LARGURA': r'\d+mm',
+    'COMPRIMENTO': r'\d+\.?\d*[ml]'
+}
+
+# Separadores dos itens no texto livre ("GABINA SIMPLES; BALAO, DUALF ARR")
+SEPARADORES = re.compile(r'[,;/]')
+
+# Textos distintos memorizados antes de o memo ser descartado
+LIMITE_MEMO = 10000
+
+class ClassificadorAcessorios:
+    """
+    Identifica os acessórios de um texto com uma única regex combinada.
+    O texto é dividido nos separadores e cada item é lido à parte. Dentro
+    do item, cada trecho conta para um só acessório: na mesma posição
+    vence o padrão que casa o trecho mais longo (empate: prioridade), e a
+    busca continua depois dele. Assim "GABINA DUAL" não conta também como
+    GABINA SIMPLES. O resultado de cada texto distinto fica memorizado.
+    """
+
+    def __init__(self, padroes: Dict[str, str] = None):
+        self.padroes = padroes or PADROES_ACESSORIOS
+        self._compilados = [(tipo, re.compile(padrao, re.IGNORECASE)) for tipo, padrao in self.padroes.items()]
+        # Localiza o próximo ponto onde algum padrão começa
+        self._combinado = re.compile('|'.join(f"(?:{padrao})" for padrao in self.padroes.values()), re.IGNORECASE)
+        self._memo = {}
+
+    def classificar(self, texto: str) -> Tuple[str, ...]:
+        """Acessórios identificados no texto, na ordem em que aparecem"""
+        encontrados = self._memo.get(texto)
+        if encontrados is not None:
+            return encontrados
+
+        tipos = []
+        for item in SEPARADORES.split(texto):
+            for tipo in self._classificar_item(item):
+                if tipo not in tipos:
+                    tipos.append(tipo)
+
+        if len(self._memo) >= LIMITE_MEMO:
+            self._memo.clear()
+        encontrados = self._memo[texto] = tuple(tipos)
+        return encontrados
+
+    def _classificar_item(self, item: str) -> List[str]:
+        """Acessórios de um item da lista (o padrão mais longo em cada posição)"""
+        tipos = []
+        posicao = 0
+        while True:
+            inicio = self._combinado.search(item, posicao)
+            if inicio is None:
+                break
+            posicao = inicio.start()
+
+            melhor, fim = None, posicao
+            for tipo, compilado in self._compilados:
+                casou = compilado.match(item, posicao)
+                if casou and casou.end() > fim:
+                    melhor, fim = tipo, casou.end()
+
+            if melhor is None:
+                posicao += 1
+                continue
+            tipos.append(melhor)
+            posicao = fim
+        return tipos
+
+    def classificar_coluna(self, valores: pd.Series) -> List[Tuple[str, ...]]:
+        """Classifica uma coluna inteira: cada texto distinto é classificado uma vez só"""
+        codigos, distintos = pd.factorize(valores.astype(str))
+        classificados = [self.classificar(texto) for texto in distintos.tolist()]
+        return [classificados[codigo] if codigo >= 0 else () for codigo in codigos.tolist()]
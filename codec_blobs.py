@@ -0,0 +1,99 @@
+# codec_blobs.py - FORMATO COMPACTO DOS BLOBS GUARDADOS NO BANCO
+import ast
+import json
+import logging
+import zlib
+from typing import Any
+
+logger = logging.getLogger('GAYA_CODEC')
+
+# orjson é opcional: quando instalado, serializa o JSON bem mais rápido
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Cabeçalho: MAGICO + versão do formato + codec do conteúdo
+MAGICO = b'GYB'
+VERSAO = 1
+CODEC_JSON_ZLIB = 1  # JSON (listas de dicts em colunas) comprimido com zlib
+NIVEL_ZLIB = 3
+
+# Marca de uma lista de registros guardada em colunas
+CHAVE_COLUNAS = '__colunas__'
+
+class BlobInvalido(ValueError):
+    """Blob gravado que não é de nenhum formato conhecido (nem atual, nem antigo)"""
+
+def _em_colunas(objeto: Any) -> Any:
+    """
+    Listas de dicts com as mesmas chaves viram {'__colunas__': chaves,
+    'linhas': [valores]}: as chaves não se repetem a cada registro. Os
+    valores de cada registro ficam como estão (sem descer neles).
+    """
+    if isinstance(objeto, dict):
+        return {chave: _em_colunas(valor) for chave, valor in objeto.items()}
+    if isinstance(objeto, list) and objeto and isinstance(objeto[0], dict):
+        chaves = list(objeto[0])
+        linhas = []
+        for item in objeto:
+            if not isinstance(item, dict) or list(item) != chaves:
+                return objeto
+            linhas.append(list(item.values()))
+        return {CHAVE_COLUNAS: chaves, 'linhas': linhas}
+    return objeto
+
+def _de_colunas(objeto: Any) -> Any:
+    """Desfaz _em_colunas"""
+    if isinstance(objeto, dict):
+        if CHAVE_COLUNAS in objeto:
+            chaves = objeto[CHAVE_COLUNAS]
+            return [dict(zip(chaves, linha)) for linha in objeto['linhas']]
+        return {chave: _de_colunas(valor) for chave, valor in objeto.items()}
+    return objeto
+
+def _para_json(objeto: Any) -> bytes:
+    """JSON em bytes; valores não serializáveis (Timestamp, etc.) viram str"""
+    if orjson is not None:
+        return orjson.dumps(objeto, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(objeto, default=str, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _de_json(conteudo: bytes) -> Any:
+    return orjson.loads(conteudo) if orjson is not None else json.loads(conteudo)
+
+def codificar(objeto: Any) -> bytes:
+    """Serializa um payload para gravar no banco (cabeçalho versionado + JSON comprimido)"""
+    conteudo = zlib.compress(_para_json(_em_colunas(objeto)), NIVEL_ZLIB)
+    return MAGICO + bytes([VERSAO, CODEC_JSON_ZLIB]) + conteudo
+
+def decodificar(valor: Any, origem: str = None) -> Any:
+    """
+    Lê um payload gravado por codificar() ou em formato antigo: texto JSON
+    (database_manager) ou repr Python (gaya_db_query_tool). `origem`
+    (tabela, coluna e id da linha) identifica o blob no log e no
+    BlobInvalido levantado quando nenhum formato serve.
+    """
+    if valor is None:
+        return None
+
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        valor = bytes(valor)
+        if valor.startswith(MAGICO):
+            versao, codec = valor[len(MAGICO)], valor[len(MAGICO) + 1]
+            if versao != VERSAO or codec != CODEC_JSON_ZLIB:
+                raise BlobInvalido(f"Formato de blob desconhecido em {origem}: versão {versao}, codec {codec}")
+            return _de_colunas(_de_json(zlib.decompress(valor[len(MAGICO) + 2:])))
+        valor = valor.decode('utf-8')
+
+    # Linhas antigas: JSON em texto
+    try:
+        return json.loads(valor)
+    except ValueError:
+        pass
+
+    # Linhas antigas do gaya_db_query_tool: str(dados)
+    try:
+        return ast.literal_eval(valor)
+    except (ValueError, SyntaxError):
+        logger.error(f"❌ Blob antigo não pôde ser interpretado: {origem}")
+        raise BlobInvalido(f"Blob antigo não pôde ser interpretado: {origem}")
@@ -0,0 +1,122 @@
+# conexao_db.py - CONEXÕES SQLITE COMPARTILHADAS (ESCRITA ÚNICA + LEITORES)
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple
+from urllib.parse import quote
+
+from settings import CONFIG
+
+logger = logging.getLogger('GAYA_CONEXAO')
+
+# Ajustes aplicados a toda conexão (cache em KiB negativo = tamanho, não páginas)
+PRAGMAS = {
+    "busy_timeout": CONFIG["SQLITE_BUSY_TIMEOUT_MS"],
+    "cache_size": -CONFIG["SQLITE_CACHE_MB"] * 1024,
+    "mmap_size": CONFIG["SQLITE_MMAP_MB"] * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+# Só na conexão de escrita: WAL deixa os leitores lerem durante uma gravação;
+# NORMAL só sincroniza o disco nos checkpoints (seguro em WAL)
+PRAGMAS_ESCRITA = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+}
+# Comandos preparados guardados por conexão (reaproveitados entre chamadas)
+COMANDOS_EM_CACHE = 256
+MAX_LEITORES = CONFIG["SQLITE_MAX_LEITORES"]
+
+class _Banco:
+    """Conexão de escrita e leitores de um arquivo de banco, num processo"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.trava_escrita = threading.RLock()
+        self.escrita = self._abrir(db_path, {**PRAGMAS, **PRAGMAS_ESCRITA})
+        self.leitores = queue.LifoQueue(maxsize=MAX_LEITORES)
+
+    @staticmethod
+    def _abrir(alvo: str, pragmas: Dict, uri: bool = False) -> sqlite3.Connection:
+        # check_same_thread=False: a conexão é usada por threads diferentes, nunca ao mesmo tempo
+        conn = sqlite3.connect(alvo, uri=uri, check_same_thread=False,
+                               cached_statements=COMANDOS_EM_CACHE)
+        for pragma, valor in pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+        return conn
+
+    def novo_leitor(self) -> sqlite3.Connection:
+        caminho = quote(os.path.abspath(self.db_path))
+        return self._abrir(f"file:{caminho}?mode=ro", PRAGMAS, uri=True)
+
+_bancos: Dict[Tuple[int, str], _Banco] = {}
+_trava_bancos = threading.Lock()
+
+def _obter_banco(db_path: str) -> _Banco:
+    """Um _Banco por (processo, arquivo): conexões não atravessam fork/spawn"""
+    chave = (os.getpid(), os.path.abspath(db_path))
+    banco = _bancos.get(chave)
+    if banco is None:
+        with _trava_bancos:
+            banco = _bancos.get(chave)
+            if banco is None:
+                banco = _bancos[chave] = _Banco(db_path)
+                logger.info(f"🔌 Conexões abertas para {db_path} (WAL)")
+    return banco
+
+@contextmanager
+def conexao_escrita(db_path: str):
+    """
+    Conexão de escrita do banco (uma só por processo). Um bloco por vez;
+    ao sair, faz commit, ou rollback se houve exceção.
+    """
+    banco = _obter_banco(db_path)
+    with banco.trava_escrita:
+        conn = banco.escrita
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+@contextmanager
+def conexao_leitura(db_path: str):
+    """
+    Conexão somente leitura, emprestada de um pool. Em WAL as leituras
+    não esperam a gravação em andamento.
+    """
+    banco = _obter_banco(db_path)
+    try:
+        conn = banco.leitores.get_nowait()
+    except queue.Empty:
+        conn = banco.novo_leitor()
+    try:
+        yield conn
+    finally:
+        # Termina a transação de leitura (não segura o WAL) antes de devolver
+        conn.rollback()
+        try:
+            banco.leitores.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def fechar_conexoes():
+    """Fecha as conexões deste processo (encerramento do bot, testes)"""
+    with _trava_bancos:
+        for chave in [chave for chave in _bancos if chave[0] == os.getpid()]:
+            banco = _bancos.pop(chave)
+            while True:
+                try:
+                    banco.leitores.get_nowait().close()
+                except queue.Empty:
+                    break
+            # A escrita fecha por último: só ela consegue fazer o checkpoint do WAL
+            with banco.trava_escrita:
+                banco.escrita.close()
+
+# Ao sair, fechar a última conexão faz o checkpoint do WAL no arquivo principal
+atexit.register(fechar_conexoes)
@@ -0,0 +1,54 @@
+# conversao_datas.py - CONVERSÃO VETORIZADA DE DATAS E HORAS DAS PLANILHAS
+import pandas as pd
+
+FORMATO_ISO = '%Y-%m-%dT%H:%M:%S'
+
+def converter_datas(valores: pd.Series) -> pd.Series:
+    """
+    Converte a coluna inteira para datetime64. Aceita datas já tipadas
+    (Excel), texto ISO e texto no formato brasileiro (dd/mm/aaaa).
+    Valores inválidos viram NaT.
+    """
+    valores = pd.Series(valores)
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        return valores
+
+    datas = pd.to_datetime(valores, errors='coerce', format='ISO8601')
+
+    # O que não era ISO (ex.: 19/01/2025) tenta de novo, dia primeiro
+    pendentes = datas.isna() & valores.notna()
+    if pendentes.any():
+        datas[pendentes] = pd.to_datetime(
+            valores[pendentes].astype(str), errors='coerce', format='mixed', dayfirst=True
+        )
+    return datas
+
+def converter_horas(valores: pd.Series) -> pd.Series:
+    """
+    Converte a coluna inteira para timedelta64 (hora do dia). Aceita
+    datetime.time, datetimes do Excel (usa só a hora), texto HH:MM[:SS] e
+    frações de dia numéricas (0.5 = 12:00).
+    """
+    valores = pd.Series(valores)
+    if pd.api.types.is_timedelta64_dtype(valores):
+        return valores
+
+    texto = valores.astype(str).str.extract(r'(\d{1,2}:\d{2}(?::\d{2})?)', expand=False)
+    texto = texto.where(texto.str.count(':') == 2, texto + ':00')
+    horas = pd.to_timedelta(texto, errors='coerce')
+
+    fracoes = pd.to_numeric(valores, errors='coerce')
+    fracoes = fracoes.where((fracoes >= 0) & (fracoes < 1))
+    return horas.fillna(pd.to_timedelta(fracoes, unit='D'))
+
+def combinar_data_hora(datas: pd.Series, horas: pd.Series = None) -> pd.Series:
+    """Data + hora numa única coluna datetime64 (hora ausente conta como 00:00)"""
+    combinadas = converter_datas(datas).dt.normalize()
+    if horas is not None:
+        combinadas = combinadas + converter_horas(horas).fillna(pd.Timedelta(0))
+    return combinadas
+
+def para_iso(datas: pd.Series) -> pd.Series:
+    """datetime64 -> texto ISO ordenável ('2025-01-19T14:30:00'), NaT -> None"""
+    texto = pd.Series(datas).dt.strftime(FORMATO_ISO).astype(object)
+    return texto.where(texto.notna(), None)
@@ -1,96 +1,171 @@
 # database_manager.py - VERSÃO COMPLETA PARA SALVAR DADOS ESTRUTURADOS
-import sqlite3
 import logging
-from typing import List, Dict, Any
+import pandas as pd
+from typing import List, Dict, Any, Iterator, Tuple
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from agregados_envio import COLUNAS_AGREGADOS_TRANSPORTES, DIMENSAO_TOTAL, VALOR_TOTAL
+from codec_blobs import codificar, decodificar
+from leitor_planilhas import como_texto
+from conexao_db import conexao_escrita, conexao_leitura
+from migracoes import migrar, texto_busca, COLUNAS_BUSCA, COLUNAS_TRANSPORTES
+from settings import CONFIG
 
 logger = logging.getLogger('GAYA_DB')
 
+
 def init_db(db_path: str = 'transportes.db'):
     """Inicializa o banco de dados com estrutura para dados analisados"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Tabela para armazenar os dados estruturados da análise
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS analises_planilhas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome_arquivo TEXT UNIQUE,
-                data_processamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                total_registros INTEGER,
-                lts_unicos INTEGER,
-                chassis_unicos INTEGER,
-                inconsistencias_detectadas INTEGER,
-                acessorios_identificados TEXT,
-                dados_estruturados JSON,
-                analise_consistencia JSON,
-                analise_acessorios JSON
-            )
-        """)
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
         
-        # Tabela para inconsistências (para consultas rápidas)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS inconsistencias (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                analise_id INTEGER,
-                tipo_inconsistencia TEXT,
-                descricao TEXT,
-                criticidade TEXT,
-                registros_afetados TEXT,
-                FOREIGN KEY (analise_id) REFERENCES analises_planilhas (id)
-            )
-        """)
+            # Tabela para armazenar os dados estruturados da análise
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS analises_planilhas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nome_arquivo TEXT,
+                    hash_arquivo TEXT,
+                    data_processamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    total_registros INTEGER,
+                    lts_unicos INTEGER,
+                    chassis_unicos INTEGER,
+                    inconsistencias_detectadas INTEGER,
+                    acessorios_identificados TEXT,
+                    registros_com_acessorios INTEGER,
+                    dados_estruturados JSON,
+                    analise_consistencia JSON,
+                    analise_acessorios JSON
+                )
+            """)
         
-        # Tabela para transportes individuais (para consultas rápidas)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transportes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                chassis TEXT,
-                lt TEXT,
-                transportadora TEXT,
-                data TEXT,
-                origem TEXT,
-                destino TEXT,
-                status TEXT,
-                acessorios TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+            # Bancos antigos não têm a coluna do hash do conteúdo
+            colunas = [linha[1] for linha in cursor.execute("PRAGMA table_info(analises_planilhas)")]
+            if 'hash_arquivo' not in colunas:
+                cursor.execute("ALTER TABLE analises_planilhas ADD COLUMN hash_arquivo TEXT")
+            if 'registros_com_acessorios' not in colunas:
+                # Coluna de resumo: preenchida uma única vez a partir do JSON já salvo
+                cursor.execute("ALTER TABLE analises_planilhas ADD COLUMN registros_com_acessorios INTEGER")
+                cursor.execute("""
+                    UPDATE analises_planilhas
+                    SET registros_com_acessorios = json_extract(analise_acessorios, '$.registros_com_acessorios')
+                """)
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_analises_hash
+                ON analises_planilhas (hash_arquivo)
+            """)
+
+            # Tabela para inconsistências (para consultas rápidas)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS inconsistencias (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    analise_id INTEGER,
+                    tipo_inconsistencia TEXT,
+                    descricao TEXT,
+                    criticidade TEXT,
+                    registros_afetados TEXT,
+                    FOREIGN KEY (analise_id) REFERENCES analises_planilhas (id)
+                )
+            """)
+            # Filtros da listagem paginada (o id entra em cada índice e dá a ordem da página)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_inconsistencias_analise ON inconsistencias (analise_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_inconsistencias_criticidade ON inconsistencias (criticidade)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_inconsistencias_tipo ON inconsistencias (tipo_inconsistencia)")
         
-        conn.commit()
-        conn.close()
+            # Impressão digital de cada linha analisada (comparação entre versões)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS impressoes_linhas (
+                    analise_id INTEGER,
+                    lt TEXT,
+                    chassis TEXT,
+                    ocorrencia INTEGER,
+                    impressao INTEGER,
+                    FOREIGN KEY (analise_id) REFERENCES analises_planilhas (id)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_impressoes_analise ON impressoes_linhas (analise_id)")
+
+            # Referência de destinos: código -> nome/cidade/estado canônicos
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS referencia_destinos (
+                    codigo_destino TEXT PRIMARY KEY,
+                    nome_destino TEXT,
+                    cidade_destino TEXT,
+                    estado_destino TEXT,
+                    ocorrencias INTEGER DEFAULT 0,
+                    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Contagens prontas (agregados_envio) de cada análise e do banco inteiro
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS agregados_analise (
+                    analise_id INTEGER,
+                    dimensao TEXT,
+                    valor TEXT,
+                    quantidade INTEGER,
+                    PRIMARY KEY (analise_id, dimensao, valor),
+                    FOREIGN KEY (analise_id) REFERENCES analises_planilhas (id)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS agregados_globais (
+                    dimensao TEXT,
+                    valor TEXT,
+                    quantidade INTEGER,
+                    PRIMARY KEY (dimensao, valor)
+                )
+            """)
+
+        # Tabela transportes (esquema único, com índices) vem das migrações
+        migrar(db_path)
         logger.info("✅ Banco de dados inicializado para dados analisados")
     except Exception as e:
         logger.error(f"Erro ao inicializar banco: {e}")
 
-def salvar_transportes_individualmente(dados_estruturados: List[Dict[str, Any]], db_path: str = 'transportes.db') -> int:
-    """Salva cada transporte individualmente na tabela transportes"""
+def _texto_chave(valor) -> str:
+    """LT/chassis como texto, no formato das impressões (1000.0 -> '1000'); None continua None"""
+    return None if valor is None else como_texto(valor)
+
+def _inserir_transportes(cursor, dados_estruturados: List[Dict[str, Any]], analise_id: int = None) -> int:
+    """Grava os transportes na transação do cursor (um único executemany)"""
+    cursor.executemany("""
+        INSERT INTO transportes 
+        (chassis, lt, transportadora, data_embarque, origem, destino, cidade_destino,
+         estado_destino, cliente, tipo_veiculo, motorista, status, acessorios, analise_id,
+         cidade_busca, estado_busca, status_busca)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        (
+            _texto_chave(transporte.get('chassis')),
+            _texto_chave(transporte.get('lt')),
+            transporte.get('transportadora'),
+            transporte.get('embarque_em'),  # ISO (ordenável)
+            transporte.get('origem_frete'),
+            transporte.get('codigo_destino'),
+            transporte.get('cidade_destino'),
+            transporte.get('estado_destino'),
+            transporte.get('nome_destino'),
+            transporte.get('codigo_veiculo'),
+            transporte.get('motorista'),
+            transporte.get('status'),
+            str(transporte.get('acessorios', [])),
+            analise_id,
+            texto_busca(transporte.get('cidade_destino')),
+            texto_busca(transporte.get('estado_destino')),
+            texto_busca(transporte.get('status'))
+        )
+        for transporte in dados_estruturados
+    ))
+    return cursor.rowcount
+
+def salvar_transportes_individualmente(dados_estruturados: List[Dict[str, Any]], db_path: str = 'transportes.db',
+                                       analise_id: int = None) -> int:
+    """Salva cada transporte na tabela transportes (ligado à análise de origem), num único executemany"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        count = 0
-        for transporte in dados_estruturados:
-            cursor.execute("""
-                INSERT OR REPLACE INTO transportes 
-                (chassis, lt, transportadora, data, origem, destino, status, acessorios)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                transporte.get('chassis'),
-                transporte.get('lt'), 
-                transporte.get('transportadora'),
-                transporte.get('data'),
-                transporte.get('origem'),
-                transporte.get('destino'),
-                transporte.get('status'),
-                str(transporte.get('acessorios', []))
-            ))
-            count += 1
-        
-        conn.commit()
-        conn.close()
+        with conexao_escrita(db_path) as conn:
+            count = _inserir_transportes(conn.cursor(), dados_estruturados, analise_id)
         logger.info(f"💾 Transportes salvos individualmente: {count} registros")
         return count
         
@@ -98,53 +173,91 @@ def salvar_transportes_individualmente(dados_estruturados: List[Dict[str, Any]],
         logger.error(f"❌ Erro ao salvar transportes individualmente: {e}")
         return 0
 
-def salvar_analise_planilha(resultado_analise: Dict[str, Any], db_path: str = 'transportes.db') -> bool:
-    """Salva o resultado completo da análise no banco de dados"""
+def salvar_analise_planilha(resultado_analise: Dict[str, Any], db_path: str = 'transportes.db',
+                            impressoes: pd.DataFrame = None, versao: Dict[str, Any] = None,
+                            agregados: pd.DataFrame = None) -> bool:
+    """Salva o resultado completo da análise no banco de dados
+
+    - impressoes: impressões digitais das linhas (delta_planilhas), para
+      comparar com a próxima versão do mesmo arquivo
+    - versao: nova versão de um arquivo já salvo ({'analise_anterior_id',
+      'chaves_substituidas': [(lt, chassis)], 'posicoes_gravar': [...],
+      'lts_envio': [...]}); só as linhas dessas chaves são regravadas em
+      transportes, o resto da versão anterior dos LTs do envio passa a
+      apontar para a nova análise (outros LTs ficam onde estão)
+    - agregados: contagens do envio (agregados_envio), somadas aos
+      agregados globais (a versão anterior, se houver, deixa de contar)
+
+    Análise, inconsistências, agregados e transportes vão numa única
+    transação: uma falha no meio não deixa nada gravado pela metade.
+    Devolve True se salvou, False se deu erro e None se outro envio com o
+    mesmo conteúdo (hash_arquivo) já foi salvo (nada é gravado de novo).
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Inserir análise principal
-        cursor.execute("""
-            INSERT OR REPLACE INTO analises_planilhas (
-                nome_arquivo, total_registros, lts_unicos, chassis_unicos,
-                inconsistencias_detectadas, acessorios_identificados,
-                dados_estruturados, analise_consistencia, analise_acessorios
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            resultado_analise["planilha_metadata"]["nome_arquivo"],
-            resultado_analise["planilha_metadata"]["total_registros"],
-            resultado_analise["analise_consistencia"]["lts_unicos"],
-            resultado_analise["analise_consistencia"]["chassis_unicos"],
-            resultado_analise["analise_consistencia"]["inconsistencias_detectadas"],
-            json.dumps(resultado_analise["analise_acessorios"]["acessorios_identificados"]),
-            json.dumps(resultado_analise["dados_estruturados"]),
-            json.dumps(resultado_analise["analise_consistencia"]),
-            json.dumps(resultado_analise["analise_acessorios"])
-        ))
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
         
-        analise_id = cursor.lastrowid
-        
-        # Salvar inconsistências individualmente para consultas rápidas
-        for inconsistencia in resultado_analise["analise_consistencia"]["inconsistencias"]:
+            # Inserir análise principal (o mesmo conteúdo enviado ao mesmo tempo só entra uma vez)
             cursor.execute("""
-                INSERT INTO inconsistencias (analise_id, tipo_inconsistencia, descricao, criticidade, registros_afetados)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT INTO analises_planilhas (
+                    nome_arquivo, hash_arquivo, total_registros, lts_unicos, chassis_unicos,
+                    inconsistencias_detectadas, acessorios_identificados, registros_com_acessorios,
+                    dados_estruturados, analise_consistencia, analise_acessorios
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (hash_arquivo) DO NOTHING
             """, (
-                analise_id,
-                inconsistencia["tipo"],
-                inconsistencia["descricao"],
-                inconsistencia["criticidade"],
-                json.dumps(inconsistencia["registros_afetados"])
+                resultado_analise["planilha_metadata"]["nome_arquivo"],
+                resultado_analise["planilha_metadata"].get("hash_arquivo"),
+                resultado_analise["planilha_metadata"]["total_registros"],
+                resultado_analise["analise_consistencia"]["lts_unicos"],
+                resultado_analise["analise_consistencia"]["chassis_unicos"],
+                resultado_analise["analise_consistencia"]["inconsistencias_detectadas"],
+                json.dumps(resultado_analise["analise_acessorios"]["acessorios_identificados"]),
+                resultado_analise["analise_acessorios"].get("registros_com_acessorios", 0),
+                codificar(resultado_analise["dados_estruturados"]),
+                codificar(resultado_analise["analise_consistencia"]),
+                codificar(resultado_analise["analise_acessorios"])
             ))
         
-        conn.commit()
-        conn.close()
+            if not cursor.rowcount:
+                logger.info(f"♻️ Conteúdo já salvo por outro envio: {resultado_analise['planilha_metadata']['nome_arquivo']}")
+                return None
+            analise_id = cursor.lastrowid
+
+            if impressoes is not None and not impressoes.empty:
+                cursor.executemany("""
+                    INSERT INTO impressoes_linhas (analise_id, lt, chassis, ocorrencia, impressao)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [(analise_id, *linha) for linha in impressoes[['lt', 'chassis', 'ocorrencia', 'impressao']].itertuples(index=False, name=None)])
+
+            # Salvar inconsistências individualmente para consultas rápidas
+            for inconsistencia in resultado_analise["analise_consistencia"]["inconsistencias"]:
+                cursor.execute("""
+                    INSERT INTO inconsistencias (analise_id, tipo_inconsistencia, descricao, criticidade, registros_afetados)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    analise_id,
+                    inconsistencia["tipo"],
+                    inconsistencia["descricao"],
+                    inconsistencia["criticidade"],
+                    json.dumps(inconsistencia["registros_afetados"])
+                ))
         
-        # ✅ NOVO: SALVAR DADOS INDIVIDUAIS NA TABELA transportes
-        if "dados_estruturados" in resultado_analise:
-            salvos_count = salvar_transportes_individualmente(resultado_analise["dados_estruturados"], db_path)
-            logger.info(f"✅ Dados salvos em ambas tabelas. Transportes: {salvos_count}")
+            # ✅ NOVO: SALVAR DADOS INDIVIDUAIS NA TABELA transportes
+            # (mesma transação: agregados e transportes são gravados juntos ou nenhum)
+            if "dados_estruturados" in resultado_analise:
+                dados = resultado_analise["dados_estruturados"]
+                if versao:
+                    _substituir_versao(cursor, versao["analise_anterior_id"], analise_id,
+                                       versao["chaves_substituidas"], versao.get("lts_envio"))
+                    dados = [dados[posicao] for posicao in versao["posicoes_gravar"]]
+                salvos_count = _inserir_transportes(cursor, dados, analise_id)
+                logger.info(f"✅ Dados salvos em ambas tabelas. Transportes: {salvos_count}")
+
+            # Depois dos transportes: o que ficou na versão anterior continua nos globais
+            if agregados is not None and not agregados.empty:
+                _gravar_agregados(cursor, analise_id, agregados,
+                                  versao["analise_anterior_id"] if versao else None)
         
         logger.info(f"✅ Análise salva no banco. ID: {analise_id}, Inconsistências: {len(resultado_analise['analise_consistencia']['inconsistencias'])}")
         return True
@@ -153,81 +266,543 @@ def salvar_analise_planilha(resultado_analise: Dict[str, Any], db_path: str = 't
         logger.error(f"Erro ao salvar análise no banco: {e}")
         return False
 
-def obter_ultima_analise(db_path: str = 'transportes.db') -> Dict[str, Any]:
-    """Obtém a última análise salva no banco"""
+def _agregados_transportes(cursor, analise_id: int) -> List[tuple]:
+    """Contagens (dimensao, valor, quantidade) dos transportes ainda ligados à análise"""
+    consultas = [f"SELECT '{DIMENSAO_TOTAL}', '{VALOR_TOTAL}', COUNT(*) FROM transportes t WHERE t.analise_id = :analise_id"]
+    for dimensao, coluna in COLUNAS_AGREGADOS_TRANSPORTES.items():
+        # Mesmo texto do agregados_envio: 1234.0 vira '1234', sem espaços nas pontas
+        texto = f"TRIM(CAST(t.{coluna} AS TEXT))"
+        texto = f"(CASE WHEN {texto} GLOB '*[0-9].0' THEN substr({texto}, 1, length({texto}) - 2) ELSE {texto} END)"
+        consultas.append(f"""
+            SELECT '{dimensao}', {texto}, COUNT(*) FROM transportes t
+            WHERE t.analise_id = :analise_id AND {texto} <> '' GROUP BY 2
+        """)
+    cursor.execute(" UNION ALL ".join(consultas), {"analise_id": analise_id})
+    return [linha for linha in cursor.fetchall() if linha[2]]
+
+def _gravar_agregados(cursor, analise_id: int, agregados: pd.DataFrame, analise_anterior_id: int = None):
+    """Grava os agregados da análise e atualiza os globais (na transação de quem chama)"""
+    if analise_anterior_id is not None:
+        # A versão anterior do mesmo arquivo sai dos totais globais
+        cursor.execute("""
+            UPDATE agregados_globais AS g
+            SET quantidade = g.quantidade - a.quantidade
+            FROM agregados_analise a
+            WHERE a.analise_id = ? AND a.dimensao = g.dimensao AND a.valor = g.valor
+        """, (analise_anterior_id,))
+        # ...e passa a contar só os transportes que ficaram nela (LTs fora do novo envio)
+        mantidos = _agregados_transportes(cursor, analise_anterior_id)
+        cursor.execute("DELETE FROM agregados_analise WHERE analise_id = ?", (analise_anterior_id,))
+        cursor.executemany("""
+            INSERT INTO agregados_analise (analise_id, dimensao, valor, quantidade)
+            VALUES (?, ?, ?, ?)
+        """, [(analise_anterior_id, *linha) for linha in mantidos])
+        cursor.executemany("""
+            INSERT INTO agregados_globais (dimensao, valor, quantidade)
+            VALUES (?, ?, ?)
+            ON CONFLICT (dimensao, valor) DO UPDATE SET
+                quantidade = quantidade + excluded.quantidade
+        """, mantidos)
+
+    linhas = [(dimensao, valor, int(quantidade)) for dimensao, valor, quantidade
+              in agregados[['dimensao', 'valor', 'quantidade']].itertuples(index=False, name=None)]
+    cursor.executemany("""
+        INSERT INTO agregados_analise (analise_id, dimensao, valor, quantidade)
+        VALUES (?, ?, ?, ?)
+    """, [(analise_id, *linha) for linha in linhas])
+    cursor.executemany("""
+        INSERT INTO agregados_globais (dimensao, valor, quantidade)
+        VALUES (?, ?, ?)
+        ON CONFLICT (dimensao, valor) DO UPDATE SET
+            quantidade = quantidade + excluded.quantidade
+    """, linhas)
+    cursor.execute("DELETE FROM agregados_globais WHERE quantidade <= 0")
+
+def obter_agregados(analise_id: int = None, limite: int = 5,
+                    db_path: str = 'transportes.db') -> Dict[str, List[tuple]]:
+    """
+    Maiores contagens de cada dimensão ({dimensao: [(valor, quantidade)]}),
+    de uma análise ou do banco inteiro (analise_id=None), lidas das
+    tabelas de agregados numa única consulta
+    """
     try:
-        conn = sqlite3.connect(db_path)
+        with conexao_leitura(db_path) as conn:
+            cursor = conn.cursor()
+            origem = "agregados_analise WHERE analise_id = ?" if analise_id is not None else "agregados_globais"
+            cursor.execute(f"""
+                SELECT dimensao, valor, quantidade FROM (
+                    SELECT dimensao, valor, quantidade,
+                           ROW_NUMBER() OVER (PARTITION BY dimensao ORDER BY quantidade DESC, valor) AS posicao
+                    FROM {origem}
+                )
+                WHERE posicao <= ?
+                ORDER BY dimensao, posicao
+            """, (analise_id, limite) if analise_id is not None else (limite,))
+
+            agregados = {}
+            for dimensao, valor, quantidade in cursor.fetchall():
+                agregados.setdefault(dimensao, []).append((valor, quantidade))
+        return agregados
+
+    except Exception as e:
+        logger.error(f"Erro ao obter agregados: {e}")
+        return {}
+
+# Colunas de resumo devolvidas direto; os blobs JSON só são lidos sob demanda
+COLUNAS_RESUMO_ANALISE = (
+    "id", "nome_arquivo", "hash_arquivo", "data_processamento", "total_registros",
+    "lts_unicos", "chassis_unicos", "inconsistencias_detectadas",
+    "acessorios_identificados", "registros_com_acessorios"
+)
+BLOBS_ANALISE = ("dados_estruturados", "analise_consistencia", "analise_acessorios")
+
+class AnaliseSalva(dict):
+    """
+    Análise salva com as colunas de resumo já carregadas. Os blobs
+    (dados_estruturados, analise_consistencia, analise_acessorios) só são
+    lidos e decodificados do banco no primeiro acesso a cada um, por
+    qualquer caminho: [], get, in, ou percorrendo a análise inteira.
+    """
+
+    def __init__(self, resumo: Dict[str, Any], db_path: str):
+        super().__init__(resumo)
+        self.db_path = db_path
+
+    def _carregar(self, chaves: tuple):
+        faltando = [chave for chave in chaves if not dict.__contains__(self, chave)]
+        if not faltando:
+            return
+        with conexao_leitura(self.db_path) as conn:
+            # chaves vêm de BLOBS_ANALISE: nomes de coluna seguros
+            linha = conn.execute(f"SELECT {', '.join(faltando)} FROM analises_planilhas WHERE id = ?",
+                                 (dict.__getitem__(self, "id"),)).fetchone()
+        origem = f"analises_planilhas id={dict.__getitem__(self, 'id')}"
+        for posicao, chave in enumerate(faltando):
+            self[chave] = decodificar(linha[posicao], f"{origem} {chave}") if linha else None
+
+    def __missing__(self, chave: str):
+        if chave not in BLOBS_ANALISE:
+            raise KeyError(chave)
+        self._carregar((chave,))
+        return dict.__getitem__(self, chave)
+
+    def __contains__(self, chave) -> bool:
+        return chave in BLOBS_ANALISE or dict.__contains__(self, chave)
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    # Percorrer a análise inteira (items, dict(analise), json.dumps...) carrega todos os blobs de uma vez
+    def __iter__(self):
+        self._carregar(BLOBS_ANALISE)
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self._carregar(BLOBS_ANALISE)
+        return dict.__len__(self)
+
+    def keys(self):
+        self._carregar(BLOBS_ANALISE)
+        return dict.keys(self)
+
+    def values(self):
+        self._carregar(BLOBS_ANALISE)
+        return dict.values(self)
+
+    def items(self):
+        self._carregar(BLOBS_ANALISE)
+        return dict.items(self)
+
+def _obter_resumo_analise(where: str, parametros: tuple, db_path: str) -> AnaliseSalva:
+    """SELECT só das colunas de resumo da análise que satisfaz `where`"""
+    with conexao_leitura(db_path) as conn:
         cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {', '.join(COLUNAS_RESUMO_ANALISE)}
+            FROM analises_planilhas
+            {where}
+        """, parametros)
+        linha = cursor.fetchone()
+
+    if not linha:
+        return None
+    resumo = dict(zip(COLUNAS_RESUMO_ANALISE, linha))
+    resumo["acessorios_identificados"] = json.loads(resumo["acessorios_identificados"] or "[]")
+    return AnaliseSalva(resumo, db_path)
+
+def obter_ultima_analise(db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """Obtém a última análise salva no banco (resumo; blobs sob demanda)"""
+    try:
+        # id é AUTOINCREMENT: a última inserida é a de maior id (sem ordenar a tabela)
+        return _obter_resumo_analise("ORDER BY id DESC LIMIT 1", (), db_path)
         
-        cursor.execute("""
-            SELECT * FROM analises_planilhas 
-            ORDER BY data_processamento DESC 
-            LIMIT 1
-        """)
-        
-        analise = cursor.fetchone()
-        conn.close()
-        
-        if analise:
-            return {
+    except Exception as e:
+        logger.error(f"Erro ao obter última análise: {e}")
+        return None
+
+def obter_analise(analise_id: int, db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """Obtém uma análise salva pelo id (resumo; blobs sob demanda)"""
+    try:
+        return _obter_resumo_analise("WHERE id = ?", (analise_id,), db_path)
+    except Exception as e:
+        logger.error(f"Erro ao obter análise {analise_id}: {e}")
+        return None
+
+def obter_analise_por_hash(hash_arquivo: str, db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """
+    Obtém a análise já salva de um arquivo com o mesmo conteúdo (hash),
+    no mesmo formato devolvido pelo PlanilhaAnalyzer
+    """
+    try:
+        with conexao_leitura(db_path) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT id, nome_arquivo, data_processamento, total_registros,
+                       dados_estruturados, analise_consistencia, analise_acessorios
+                FROM analises_planilhas
+                WHERE hash_arquivo = ?
+            """, (hash_arquivo,))
+
+            analise = cursor.fetchone()
+
+        if not analise:
+            return None
+
+        origem = f"analises_planilhas id={analise[0]}"
+        analise_consistencia = decodificar(analise[5], f"{origem} analise_consistencia")
+        inconsistencias = analise_consistencia["inconsistencias_detectadas"]
+        return {
+            "planilha_metadata": {
                 "id": analise[0],
                 "nome_arquivo": analise[1],
+                "hash_arquivo": hash_arquivo,
                 "data_processamento": analise[2],
                 "total_registros": analise[3],
-                "lts_unicos": analise[4],
-                "chassis_unicos": analise[5],
-                "inconsistencias_detectadas": analise[6],
-                "acessorios_identificados": json.loads(analise[7]),
-                "dados_estruturados": json.loads(analise[8]),
-                "analise_consistencia": json.loads(analise[9]),
-                "analise_acessorios": json.loads(analise[10])
+                "versao_analise": "1.0"
+            },
+            "dados_estruturados": decodificar(analise[4], f"{origem} dados_estruturados"),
+            "analise_consistencia": analise_consistencia,
+            "analise_acessorios": decodificar(analise[6], f"{origem} analise_acessorios"),
+            "resumo": {
+                "status": "sucesso" if inconsistencias == 0 else "alertas",
+                "mensagem": "Planilha analisada com sucesso" if inconsistencias == 0 else "Planilha analisada com alertas",
+                "total_alertas": inconsistencias + len(analise_consistencia["alertas"])
             }
-        return None
-        
+        }
+
     except Exception as e:
-        logger.error(f"Erro ao obter última análise: {e}")
+        logger.error(f"Erro ao obter análise por hash: {e}")
         return None
 
-def obter_todas_inconsistencias(db_path: str = 'transportes.db') -> List[Dict[str, Any]]:
-    """Obtém todas as inconsistências da última análise"""
+def buscar_conflitos_historicos(pares: List[tuple], db_path: str = 'transportes.db',
+                                ignorar_analise_id: int = None) -> List[Dict[str, Any]]:
+    """
+    Cruza os pares (chassis, lt) de um novo envio com todos os transportes
+    já salvos: os pares vão de uma vez para uma tabela temporária e um
+    único JOIN (pelo índice de chassis) devolve os chassis que já saíram
+    em outro LT, com o arquivo e a data do envio anterior
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
+        with conexao_leitura(db_path) as conn:
+            cursor = conn.cursor()
+
+            # A conexão é reaproveitada: a tabela temporária pode ter ficado de uma chamada anterior
+            cursor.execute("DROP TABLE IF EXISTS temp.envio_pares")
+            cursor.execute("CREATE TEMP TABLE envio_pares (chassis TEXT, lt TEXT)")
+            cursor.executemany("INSERT INTO envio_pares (chassis, lt) VALUES (?, ?)", pares)
+
+            # A versão anterior do mesmo arquivo (ignorar_analise_id) não conta como histórico
+            cursor.execute(f"""
+                SELECT DISTINCT e.chassis, e.lt, t.lt,
+                       a.nome_arquivo, COALESCE(a.data_processamento, t.created_at)
+                FROM envio_pares e
+                JOIN transportes t ON t.chassis = e.chassis
+                LEFT JOIN analises_planilhas a ON a.id = t.analise_id
+                WHERE t.lt <> e.lt
+                  AND (? IS NULL OR t.analise_id IS NULL OR t.analise_id <> ?)
+                ORDER BY e.chassis, t.created_at
+            """, (ignorar_analise_id, ignorar_analise_id))
+
+            conflitos = [
+                {
+                    "chassis": row[0],
+                    "lt": row[1],
+                    "lt_anterior": row[2],
+                    "nome_arquivo": row[3],
+                    "data_processamento": row[4]
+                }
+                for row in cursor.fetchall()
+            ]
+        return conflitos
+
+    except Exception as e:
+        logger.error(f"Erro ao buscar conflitos históricos: {e}")
+        return []
+
+def _substituir_versao(cursor, analise_anterior_id: int, analise_id: int, chaves: List[tuple],
+                       lts_envio: List[str] = None) -> int:
+    """substituir_versao_transportes na transação do cursor"""
+    cursor.execute("DROP TABLE IF EXISTS temp.chaves_substituidas")
+    cursor.execute("CREATE TEMP TABLE chaves_substituidas (lt TEXT, chassis TEXT)")
+    cursor.executemany("INSERT INTO chaves_substituidas (lt, chassis) VALUES (?, ?)", chaves)
+
+    cursor.execute("""
+        DELETE FROM transportes
+        WHERE analise_id = ?
+          AND (lt, chassis) IN (SELECT lt, chassis FROM chaves_substituidas)
+    """, (analise_anterior_id,))
+    removidos = cursor.rowcount
+    if lts_envio is None:
+        cursor.execute("UPDATE transportes SET analise_id = ? WHERE analise_id = ?", (analise_id, analise_anterior_id))
+    else:
+        cursor.execute("DROP TABLE IF EXISTS temp.lts_envio")
+        cursor.execute("CREATE TEMP TABLE lts_envio (lt TEXT PRIMARY KEY)")
+        cursor.executemany("INSERT OR IGNORE INTO lts_envio (lt) VALUES (?)", ((lt,) for lt in lts_envio))
         cursor.execute("""
-            SELECT i.*, a.nome_arquivo 
-            FROM inconsistencias i
-            JOIN analises_planilhas a ON i.analise_id = a.id
-            ORDER BY a.data_processamento DESC
-        """)
-        
+            UPDATE transportes SET analise_id = ?
+            WHERE analise_id = ? AND lt IN (SELECT lt FROM lts_envio)
+        """, (analise_id, analise_anterior_id))
+    mantidos = cursor.rowcount
+    logger.info(f"🧬 Versão anterior ({analise_anterior_id}): {removidos} transportes substituídos, {mantidos} mantidos")
+    return mantidos
+
+def substituir_versao_transportes(analise_anterior_id: int, analise_id: int, chaves: List[tuple],
+                                  db_path: str = 'transportes.db', lts_envio: List[str] = None) -> int:
+    """
+    Remove da versão anterior os transportes das chaves (lt, chassis) que
+    mudaram e passa os demais para a nova análise. Com `lts_envio`, só
+    passam os dos LTs presentes no novo envio: os de outros LTs ficam na
+    análise anterior. Devolve quantos foram passados.
+    """
+    try:
+        with conexao_escrita(db_path) as conn:
+            return _substituir_versao(conn.cursor(), analise_anterior_id, analise_id, chaves, lts_envio)
+
+    except Exception as e:
+        logger.error(f"Erro ao substituir versão anterior dos transportes: {e}")
+        return 0
+
+def obter_versao_anterior(nome_arquivo: str, db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """
+    Última análise salva de um arquivo com o mesmo nome (e impressões das
+    linhas), ou None. As impressões vêm num DataFrame
+    (lt, chassis, ocorrencia, impressao).
+    """
+    try:
+        with conexao_leitura(db_path) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT id, nome_arquivo, data_processamento
+                FROM analises_planilhas a
+                WHERE nome_arquivo = ?
+                  AND EXISTS (SELECT 1 FROM impressoes_linhas i WHERE i.analise_id = a.id)
+                ORDER BY id DESC
+                LIMIT 1
+            """, (nome_arquivo,))
+            analise = cursor.fetchone()
+
+            if not analise:
+                return None
+
+            impressoes = pd.read_sql_query(
+                "SELECT lt, chassis, ocorrencia, impressao FROM impressoes_linhas WHERE analise_id = ?",
+                conn, params=(analise[0],)
+            )
+
+        return {
+            "id": analise[0],
+            "nome_arquivo": analise[1],
+            "data_processamento": analise[2],
+            "impressoes": impressoes
+        }
+
+    except Exception as e:
+        logger.error(f"Erro ao obter versão anterior: {e}")
+        return None
+
+def carregar_referencia_destinos(db_path: str = 'transportes.db', apos_rowid: int = 0) -> Tuple[Dict[str, tuple], int]:
+    """
+    Destinos da referência gravados depois de apos_rowid (0: todos), como
+    {codigo: (nome, cidade, estado)}, e o maior rowid lido. Códigos já
+    conhecidos só têm ocorrências somadas e mantêm o rowid: o rowid só
+    avança quando entra um código novo.
+    """
+    try:
+        with conexao_leitura(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT rowid, codigo_destino, nome_destino, cidade_destino, estado_destino
+                FROM referencia_destinos
+                WHERE rowid > ?
+                ORDER BY rowid
+            """, (apos_rowid,))
+            linhas = cursor.fetchall()
+        referencia = {row[1]: (row[2], row[3], row[4]) for row in linhas}
+        return referencia, (linhas[-1][0] if linhas else apos_rowid)
+    except Exception as e:
+        logger.error(f"Erro ao carregar referência de destinos: {e}")
+        return {}, apos_rowid
+
+def semear_referencia_destinos(db_path: str = 'transportes.db') -> int:
+    """
+    Referência vazia: aprende os destinos dos transportes já salvos (forma
+    do primeiro transporte de cada código, com o total de linhas dele).
+    Com a referência já preenchida não faz nada, mesmo com vários
+    processos chamando ao mesmo tempo.
+    """
+    try:
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            # Códigos numéricos lidos do Excel ficaram salvos como '1234.0'
+            cursor.execute("""
+                INSERT INTO referencia_destinos
+                    (codigo_destino, nome_destino, cidade_destino, estado_destino, ocorrencias)
+                SELECT codigo, cliente, cidade_destino, estado_destino, ocorrencias FROM (
+                    SELECT CASE WHEN destino GLOB '*[0-9].0' THEN substr(destino, 1, length(destino) - 2)
+                                ELSE destino END AS codigo,
+                           cliente, cidade_destino, estado_destino, MIN(id), COUNT(*) AS ocorrencias
+                    FROM transportes
+                    WHERE destino IS NOT NULL AND destino <> ''
+                    GROUP BY codigo
+                )
+                WHERE NOT EXISTS (SELECT 1 FROM referencia_destinos)
+            """)
+            semeados = cursor.rowcount
+        if semeados:
+            logger.info(f"📍 Referência de destinos semeada com {semeados} códigos dos transportes salvos")
+        return semeados
+    except Exception as e:
+        logger.error(f"Erro ao semear referência de destinos: {e}")
+        return 0
+
+def atualizar_referencia_destinos(destinos: List[tuple], db_path: str = 'transportes.db') -> int:
+    """
+    Aprende os destinos de um envio: (codigo, nome, cidade, estado, ocorrencias).
+    Códigos novos entram com os dados do envio; códigos já conhecidos só
+    somam ocorrências (o nome canônico não é trocado por um divergente).
+    """
+    try:
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO referencia_destinos
+                    (codigo_destino, nome_destino, cidade_destino, estado_destino, ocorrencias)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (codigo_destino) DO UPDATE SET
+                    ocorrencias = ocorrencias + excluded.ocorrencias,
+                    atualizado_em = CURRENT_TIMESTAMP
+            """, destinos)
+        logger.info(f"📍 Referência de destinos atualizada: {len(destinos)} códigos no envio")
+        return len(destinos)
+    except Exception as e:
+        logger.error(f"Erro ao atualizar referência de destinos: {e}")
+        return 0
+
+# Listagem e contagem usam a mesma origem: o total bate com o que é listado
+ORIGEM_INCONSISTENCIAS = "inconsistencias i JOIN analises_planilhas a ON i.analise_id = a.id"
+
+def _filtros_inconsistencias(analise_id: int = None, criticidade: str = None,
+                             tipo: str = None) -> Tuple[str, tuple]:
+    condicoes, parametros = [], []
+    for coluna, valor in (("i.analise_id", analise_id), ("i.criticidade", criticidade),
+                          ("i.tipo_inconsistencia", tipo)):
+        if valor is not None:
+            condicoes.append(f"{coluna} = ?")
+            parametros.append(valor)
+    return " AND ".join(condicoes) or "1", tuple(parametros)
+
+def obter_inconsistencias(analise_id: int = None, criticidade: str = None, tipo: str = None,
+                          cursor: int = None, limite: int = None, com_registros: bool = False,
+                          db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """
+    Uma página de inconsistências, das mais recentes para as mais antigas
+    (id decrescente), filtrada por análise, criticidade e/ou tipo. cursor é
+    o id do último item da página anterior. registros_afetados só é lido
+    e decodificado com com_registros=True.
+    Devolve {"inconsistencias": [...], "cursor": próximo cursor ou None}.
+    """
+    try:
+        limite = max(1, min(limite or CONFIG["LIMITE_PAGINA_INCONSISTENCIAS"], CONFIG["LIMITE_MAXIMO_PAGINA"]))
+        where, parametros = _filtros_inconsistencias(analise_id, criticidade, tipo)
+        if cursor is not None:
+            where = f"{where} AND i.id < ?"
+            parametros = parametros + (cursor,)
+
+        with conexao_leitura(db_path) as conn:
+            linhas = conn.execute(f"""
+                SELECT i.id, i.analise_id, i.tipo_inconsistencia, i.descricao, i.criticidade,
+                       {'i.registros_afetados' if com_registros else 'NULL'}, a.nome_arquivo
+                FROM {ORIGEM_INCONSISTENCIAS}
+                WHERE {where}
+                ORDER BY i.id DESC
+                LIMIT ?
+            """, parametros + (limite + 1,)).fetchall()
+
+        # Uma linha a mais só para saber se existe próxima página
+        proxima = len(linhas) > limite
+        linhas = linhas[:limite]
         inconsistencias = []
-        for row in cursor.fetchall():
-            inconsistencias.append({
+        for row in linhas:
+            inconsistencia = {
                 "id": row[0],
                 "analise_id": row[1],
                 "tipo": row[2],
                 "descricao": row[3],
                 "criticidade": row[4],
-                "registros_afetados": json.loads(row[5]),
                 "nome_arquivo": row[6]
-            })
-        
-        conn.close()
-        return inconsistencias
-        
+            }
+            if com_registros:
+                inconsistencia["registros_afetados"] = json.loads(row[5])
+            inconsistencias.append(inconsistencia)
+        return {"inconsistencias": inconsistencias, "cursor": linhas[-1][0] if proxima else None}
+
     except Exception as e:
         logger.error(f"Erro ao obter inconsistências: {e}")
-        return []
+        return {"inconsistencias": [], "cursor": None}
+
+def iterar_inconsistencias(analise_id: int = None, criticidade: str = None, tipo: str = None,
+                           tamanho_pagina: int = None, com_registros: bool = False,
+                           db_path: str = 'transportes.db') -> Iterator[Dict[str, Any]]:
+    """
+    Percorre as inconsistências página a página (memória constante). A
+    conexão só é usada durante a leitura de cada página, não entre elas.
+    """
+    cursor = None
+    while True:
+        pagina = obter_inconsistencias(analise_id, criticidade, tipo, cursor,
+                                       tamanho_pagina, com_registros, db_path)
+        yield from pagina["inconsistencias"]
+        cursor = pagina["cursor"]
+        if cursor is None:
+            return
+
+def contar_inconsistencias(analise_id: int = None, criticidade: str = None, tipo: str = None,
+                           db_path: str = 'transportes.db') -> int:
+    """Total de inconsistências com os filtros (contado pelos índices, sem ler as linhas)"""
+    try:
+        where, parametros = _filtros_inconsistencias(analise_id, criticidade, tipo)
+        with conexao_leitura(db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {ORIGEM_INCONSISTENCIAS} WHERE {where}", parametros).fetchone()[0]
+    except Exception as e:
+        logger.error(f"Erro ao contar inconsistências: {e}")
+        return 0
+
+def obter_todas_inconsistencias(db_path: str = 'transportes.db') -> List[Dict[str, Any]]:
+    """Obtém todas as inconsistências de todas as análises (preferir iterar_inconsistencias)"""
+    return list(iterar_inconsistencias(com_registros=True, db_path=db_path))
 
 # Manter funções existentes para compatibilidade
 def contar_transportes(db_path: str = 'transportes.db') -> int:
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM transportes")
-        count = cursor.fetchone()[0]
-        conn.close()
+        with conexao_leitura(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM transportes")
+            count = cursor.fetchone()[0]
         return count
     except Exception as e:
         logger.error(f"Erro ao contar transportes: {e}")
@@ -235,12 +810,145 @@ def contar_transportes(db_path: str = 'transportes.db') -> int:
 
 def verificar_chassis_repetidos(db_path: str = 'transportes.db') -> List[tuple]:
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT chassis, COUNT(*) FROM transportes GROUP BY chassis HAVING COUNT(*) > 1")
-        repetidos = cursor.fetchall()
-        conn.close()
+        with conexao_leitura(db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT chassis, COUNT(*) FROM transportes GROUP BY chassis HAVING COUNT(*) > 1")
+            repetidos = cursor.fetchall()
         return repetidos if repetidos else []
     except Exception as e:
         logger.error(f"Erro ao verificar chassis repetidos: {e}")
         return []
+
+# Projeção padrão das consultas de transportes (qualquer coluna de COLUNAS_TRANSPORTES pode ser pedida)
+COLUNAS_LISTAGEM = (
+    "id", "chassis", "lt", "origem", "destino", "cidade_destino", "estado_destino",
+    "cliente", "tipo_veiculo", "data_embarque", "status"
+)
+_COLUNAS_VALIDAS = {nome for nome, _ in COLUNAS_TRANSPORTES}
+
+def _paginar_transportes(where: str, parametros: tuple, ordem: tuple, cursor_pagina,
+                         colunas, limite: int, db_path: str) -> Dict[str, Any]:
+    """
+    Página de transportes por keyset: ordena por ordem (sempre terminando em
+    id, então a ordem é total) e continua depois de cursor_pagina, os valores
+    de ordem do último registro da página anterior. Com o índice certo o
+    SQLite lê só a página, sem OFFSET nem ORDER BY em memória.
+    Devolve {"transportes": [...], "cursor": próximo cursor ou None}.
+    Projeção inválida é erro do chamador: ValueError não vira página vazia.
+    """
+    colunas = tuple(colunas or COLUNAS_LISTAGEM)
+    invalidas = [coluna for coluna in colunas if coluna not in _COLUNAS_VALIDAS]
+    if invalidas:
+        raise ValueError(f"Colunas inexistentes em transportes: {invalidas}")
+    limite = max(1, min(limite or CONFIG["LIMITE_PAGINA_TRANSPORTES"], CONFIG["LIMITE_MAXIMO_PAGINA"]))
+
+    if cursor_pagina is not None:
+        # (a, id) > (?, ?) em row value: o SQLite usa como faixa do índice
+        chave = ordem[0] if len(ordem) == 1 else f"({', '.join(ordem)})"
+        marcadores = "?" if len(ordem) == 1 else f"({', '.join('?' * len(ordem))})"
+        where = f"{where} AND {chave} > {marcadores}"
+        parametros = parametros + tuple(cursor_pagina)
+
+    # Colunas da ordem vêm ao final da seleção para montar o próximo cursor
+    with conexao_leitura(db_path) as conn:
+        linhas = conn.execute(f"""
+            SELECT {', '.join(colunas + ordem)} FROM transportes
+            WHERE {where}
+            ORDER BY {', '.join(ordem)}
+            LIMIT ?
+        """, parametros + (limite + 1,)).fetchall()
+
+    # Uma linha a mais só para saber se existe próxima página
+    proxima = len(linhas) > limite
+    linhas = linhas[:limite]
+    return {
+        "transportes": [dict(zip(colunas, linha[:len(colunas)])) for linha in linhas],
+        "cursor": tuple(linhas[-1][len(colunas):]) if proxima else None
+    }
+
+def _filtro_busca(coluna: str, valor: str) -> Tuple[str, tuple]:
+    """Condição `coluna` igual a `valor` sem acento, caixa ou espaços extras ('São Paulo' acha 'SAO PAULO')"""
+    return f"{COLUNAS_BUSCA[coluna]} = ?", (texto_busca(valor),)
+
+def _dia_iso(data) -> str:
+    """date, datetime, Timestamp ou texto -> 'AAAA-MM-DD'"""
+    return pd.Timestamp(data).strftime("%Y-%m-%d")
+
+def obter_transportes_por_periodo(data_inicio, data_fim, cidade_destino: str = None,
+                                  estado_destino: str = None, cursor=None, colunas=None,
+                                  limite: int = None, db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """
+    Transportes com embarque entre data_inicio e data_fim (dias inteiros,
+    inclusive), opcionalmente para uma cidade e/ou estado de destino (sem
+    diferenciar acento e caixa), em ordem de embarque. Ex.: fretes para
+    São Paulo esta semana.
+    """
+    try:
+        # data_embarque é ISO ('2025-01-19T14:30:00'): o dia seguinte ao fim fecha a faixa
+        fim_exclusivo = (pd.Timestamp(data_fim) + timedelta(days=1)).strftime("%Y-%m-%d")
+        where = "data_embarque >= ? AND data_embarque < ?"
+        parametros = (_dia_iso(data_inicio), fim_exclusivo)
+        for coluna, valor in (("cidade_destino", cidade_destino), ("estado_destino", estado_destino)):
+            if valor:
+                filtro = _filtro_busca(coluna, valor)
+                where = f"{filtro[0]} AND {where}"
+                parametros = filtro[1] + parametros
+
+        return _paginar_transportes(where, parametros, ("data_embarque", "id"),
+                                    cursor, colunas, limite, db_path)
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter transportes por período: {e}")
+        return {"transportes": [], "cursor": None}
+
+def obter_transportes_por_status(status: str, cursor=None, colunas=None, limite: int = None,
+                                 db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """Transportes com o status informado (ex.: 'em trânsito', sem diferenciar acento e caixa), em ordem de gravação"""
+    try:
+        filtro = _filtro_busca("status", status)
+        return _paginar_transportes(filtro[0], filtro[1], ("id",),
+                                    cursor, colunas, limite, db_path)
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter transportes por status: {e}")
+        return {"transportes": [], "cursor": None}
+
+def obter_transportes_por_origem_destino(origem: str = None, destino: str = None, cursor=None,
+                                         colunas=None, limite: int = None,
+                                         db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """Transportes de uma origem, para um destino (código) ou do par origem -> destino"""
+    try:
+        if origem and destino:
+            where, parametros = "origem = ? AND destino = ?", (origem, destino)
+        elif origem:
+            where, parametros = "origem = ?", (origem,)
+        elif destino:
+            where, parametros = "destino = ?", (destino,)
+        else:
+            raise ValueError("Informe a origem, o destino ou os dois")
+
+        return _paginar_transportes(where, parametros, ("id",),
+                                    cursor, colunas, limite, db_path)
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter transportes por origem/destino: {e}")
+        return {"transportes": [], "cursor": None}
+
+def obter_dados_chassis(chassis: str, cursor=None, colunas=None, limite: int = None,
+                        db_path: str = 'transportes.db') -> Dict[str, Any]:
+    """Histórico de transportes de um chassis, do envio mais antigo ao mais recente"""
+    try:
+        return _paginar_transportes("chassis = ?", (str(chassis).strip(),), ("id",),
+                                    cursor, colunas, limite, db_path)
+
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter dados do chassis: {e}")
+        return {"transportes": [], "cursor": None}
@@ -0,0 +1,78 @@
+# delta_planilhas.py - COMPARAÇÃO ENTRE VERSÕES DE UMA MESMA PLANILHA
+import logging
+from typing import Any, Dict
+
+import pandas as pd
+
+from leitor_planilhas import como_texto
+
+logger = logging.getLogger('GAYA_DELTA')
+
+# Situação de cada linha da versão nova em relação à anterior
+INSERIDA = 'inserida'
+ALTERADA = 'alterada'
+INALTERADA = 'inalterada'
+
+def impressoes_linhas(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Impressão digital estável de cada linha estruturada, com a chave
+    (lt, chassis, ocorrencia). `ocorrencia` separa linhas repetidas com o
+    mesmo LT e chassis. Colunas de metadados ('_...') não entram no hash,
+    então reler a mesma planilha gera as mesmas impressões.
+    """
+    dados = frame[[coluna for coluna in frame.columns if not str(coluna).startswith('_')]]
+    chaves = pd.DataFrame({
+        'lt': (frame['lt'] if 'lt' in frame.columns else pd.Series(None, index=frame.index)).map(como_texto),
+        'chassis': (frame['chassis'] if 'chassis' in frame.columns else pd.Series(None, index=frame.index)).map(como_texto)
+    })
+    chaves['ocorrencia'] = chaves.groupby(['lt', 'chassis'], sort=False).cumcount()
+    # hash_pandas_object é determinístico entre execuções; int64 cabe no INTEGER do SQLite
+    chaves['impressao'] = pd.util.hash_pandas_object(dados, index=False).astype('int64').to_numpy()
+    return chaves.reset_index(drop=True)
+
+def comparar_versoes(atuais: pd.DataFrame, anteriores: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compara as impressões da versão nova com as da anterior. Devolve a
+    situação de cada linha nova (INSERIDA/ALTERADA/INALTERADA, na ordem do
+    frame), as chaves removidas e a contagem de cada caso.
+    """
+    chave = ['lt', 'chassis', 'ocorrencia']
+    cruzado = atuais.merge(anteriores[chave + ['impressao']], on=chave, how='left',
+                           suffixes=('', '_anterior'), indicator=True)
+
+    situacao = pd.Series(ALTERADA, index=cruzado.index)
+    situacao[cruzado['_merge'] == 'left_only'] = INSERIDA
+    situacao[cruzado['impressao'] == cruzado['impressao_anterior']] = INALTERADA
+
+    removidas = anteriores.merge(atuais[chave], on=chave, how='left', indicator=True)
+    removidas = removidas.loc[removidas['_merge'] == 'left_only', chave].reset_index(drop=True)
+
+    contagem = situacao.value_counts()
+    resumo = {
+        "inseridas": int(contagem.get(INSERIDA, 0)),
+        "alteradas": int(contagem.get(ALTERADA, 0)),
+        "removidas": len(removidas),
+        "inalteradas": int(contagem.get(INALTERADA, 0))
+    }
+    logger.info(f"🧬 Comparação com a versão anterior: {resumo}")
+    return {"situacao": situacao.to_numpy(), "removidas": removidas, "resumo": resumo}
+
+def sobreposicao_chaves(atuais: pd.DataFrame, anteriores: pd.DataFrame) -> float:
+    """
+    Fração das chaves (lt, chassis) distintas do menor dos dois envios que
+    também estão no outro. Um arquivo sem relação com o anterior, mas com o
+    mesmo nome, fica perto de 0; uma revisão de verdade, perto de 1.
+    """
+    chaves_atuais = set(zip(atuais['lt'], atuais['chassis']))
+    chaves_anteriores = set(zip(anteriores['lt'], anteriores['chassis']))
+    menor = min(len(chaves_atuais), len(chaves_anteriores))
+    if not menor:
+        return 0.0
+    return len(chaves_atuais & chaves_anteriores) / menor
+
+def linhas_para_revalidar(frame: pd.DataFrame, situacao) -> pd.Series:
+    """
+    Máscara das linhas que precisam passar de novo pelas regras por linha:
+    as inseridas/alteradas. As regras de grupo rodam sobre o frame inteiro.
+    """
+    return pd.Series(situacao != INALTERADA, index=frame.index)
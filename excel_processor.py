@@ -1,54 +1,150 @@
 import pandas as pd
 import logging
 from datetime import datetime
+from typing import Dict, Iterator, List, Any
+
+from openpyxl import load_workbook
+
+from leitor_planilhas import ABA_TRANSPORTES, descobrir_abas, detectar_formato_texto, eh_texto_delimitado
+from mapeamento_colunas import MapeadorColunas
+from conversao_datas import converter_datas, para_iso
 
 logger = logging.getLogger('GAYA_EXCEL')
 
+TAMANHO_LOTE_PADRAO = 500
+
+# Campo do transporte -> cabeçalho da planilha
+CABECALHOS_TRANSPORTE = {
+    'load_number': 'Load No',
+    'chassis': 'Serial Number',
+    'destination_city': 'Destination City',
+    'destination_state': 'Destination State',
+    'customer_name': 'Destination Name',
+    'planned_ship_date': 'Planned Ship Date',
+    'vehicle_type': 'Vehicle Type',
+    'driver_name': 'Driver Name'
+}
+
+MAPEADOR_TRANSPORTE = MapeadorColunas({campo: [coluna] for campo, coluna in CABECALHOS_TRANSPORTE.items()})
+
 class ExcelProcessor:
     def processar_excel(self, file_path):
         """Processa arquivo Excel e extrai dados básicos"""
         try:
-            # Pausa para não sobrecarregar RAM
-            import time
-            time.sleep(2)
-            
-            # Lê a planilha específica
-            df = pd.read_excel(file_path, sheet_name='TRK_TRANS_DTL')
-            
             transportes = []
-            
-            # Processa linha por linha (seguro para RAM baixa)
-            for index, row in df.iterrows():
-                if index % 10 == 0:  # Pausa a cada 10 linhas
-                    time.sleep(0.5)
-                
-                transporte = {
-                    'load_number': str(row.get('Load No', '')).strip(),
-                    'chassis': str(row.get('Serial Number', '')).strip(),
-                    'destination_city': str(row.get('Destination City', '')).strip(),
-                    'destination_state': str(row.get('Destination State', '')).strip(),
-                    'customer_name': str(row.get('Destination Name', '')).strip(),
-                    'planned_ship_date': self._formatar_data(row.get('Planned Ship Date')),
-                    'vehicle_type': str(row.get('Vehicle Type', '')).strip(),
-                    'driver_name': str(row.get('Driver Name', '')).strip()
-                }
-                
-                # Só adiciona se tiver dados válidos
-                if transporte['load_number'] or transporte['chassis']:
-                    transportes.append(transporte)
-            
+            for lote in self.processar_excel_em_lotes(file_path):
+                transportes.extend(lote)
+
             logger.info(f"📊 Extraídos {len(transportes)} transportes do Excel")
             return transportes
-            
+
         except Exception as e:
             logger.error(f"❌ Erro ao processar Excel: {e}")
             return []
-    
-    def _formatar_data(self, data):
-        """Tenta formatar a data"""
+
+    def processar_excel_em_lotes(self, file_path, tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Lê as abas de transportes em modo streaming e devolve lotes de até
+        `tamanho_lote` transportes. A memória usada fica limitada ao lote
+        atual, independente do tamanho da planilha. Cada transporte leva o
+        nome da aba de origem em 'sheet_name'.
+        """
+        if eh_texto_delimitado(file_path):
+            yield from self._lotes_via_csv(file_path, tamanho_lote)
+            return
+
+        abas = descobrir_abas(file_path) or [ABA_TRANSPORTES]
+
+        if not str(file_path).lower().endswith('.xlsx'):
+            # .xls não tem leitor em streaming: lê de uma vez e fatia em lotes
+            for aba in abas:
+                yield from self._lotes_via_pandas(file_path, aba, tamanho_lote)
+            return
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
         try:
-            if pd.isna(data):
-                return ""
-            return str(data)
-        except:
-            return ""
+            lote = []
+            for aba in abas:
+                linhas = workbook[aba].iter_rows(values_only=True)
+                cabecalho = next(linhas, None)
+                if cabecalho is None:
+                    continue
+
+                posicoes = self._posicoes_colunas(cabecalho)
+                for linha in linhas:
+                    transporte = self._montar_transporte(linha, posicoes, aba)
+                    if transporte:
+                        lote.append(transporte)
+                    if len(lote) >= tamanho_lote:
+                        yield self._formatar_datas_lote(lote)
+                        lote = []
+
+            if lote:
+                yield self._formatar_datas_lote(lote)
+        finally:
+            workbook.close()
+
+    def _lotes_via_csv(self, file_path, tamanho_lote: int) -> Iterator[List[Dict[str, Any]]]:
+        """CSV/TSV lido em blocos pelo motor C do pandas (memória limitada ao bloco)"""
+        codificacao, separador = detectar_formato_texto(file_path)
+        posicoes = None
+        with pd.read_csv(file_path, sep=separador, encoding=codificacao, dtype=str,
+                         keep_default_na=False, chunksize=tamanho_lote) as blocos:
+            for bloco in blocos:
+                if posicoes is None:
+                    posicoes = self._posicoes_colunas([coluna.strip() for coluna in bloco.columns])
+                lote = []
+                for linha in bloco.itertuples(index=False, name=None):
+                    transporte = self._montar_transporte(linha, posicoes, '')
+                    if transporte:
+                        lote.append(transporte)
+                if lote:
+                    yield self._formatar_datas_lote(lote)
+
+    def _lotes_via_pandas(self, file_path, aba: str, tamanho_lote: int) -> Iterator[List[Dict[str, Any]]]:
+        """Fallback para formatos sem leitura em streaming (.xls)"""
+        df = pd.read_excel(file_path, sheet_name=aba)
+        df = df.astype(object).where(df.notna(), None)
+        cabecalho = list(df.columns)
+        posicoes = self._posicoes_colunas(cabecalho)
+
+        for inicio in range(0, len(df), tamanho_lote):
+            lote = []
+            for linha in df.iloc[inicio:inicio + tamanho_lote].itertuples(index=False, name=None):
+                transporte = self._montar_transporte(linha, posicoes, aba)
+                if transporte:
+                    lote.append(transporte)
+            if lote:
+                yield self._formatar_datas_lote(lote)
+
+    def _posicoes_colunas(self, cabecalho) -> Dict[str, int]:
+        """Descobre a posição de cada coluna de interesse no cabeçalho"""
+        mapeamento = MAPEADOR_TRANSPORTE.mapear(cabecalho)["mapeamento"]
+        indice = {nome: i for i, nome in enumerate(cabecalho)}
+        return {campo: indice[coluna] for coluna, campo in mapeamento.items()}
+
+    def _montar_transporte(self, linha, posicoes: Dict[str, int], aba: str) -> Dict[str, Any]:
+        """Monta o dicionário do transporte a partir de uma linha crua"""
+        transporte = {}
+        for campo in CABECALHOS_TRANSPORTE:
+            posicao = posicoes.get(campo)
+            valor = linha[posicao] if posicao is not None and posicao < len(linha) else None
+
+            if campo == 'planned_ship_date':
+                transporte[campo] = valor  # convertida depois, para o lote inteiro
+            else:
+                transporte[campo] = '' if valor is None else str(valor).strip()
+
+        transporte['sheet_name'] = aba
+
+        # Só adiciona se tiver dados válidos
+        if transporte['load_number'] or transporte['chassis']:
+            return transporte
+        return None
+
+    def _formatar_datas_lote(self, lote: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Converte as datas de embarque do lote inteiro para ISO de uma vez"""
+        datas = para_iso(converter_datas(pd.Series([t['planned_ship_date'] for t in lote], dtype=object)))
+        for transporte, data in zip(lote, datas.tolist()):
+            transporte['planned_ship_date'] = data or ""
+        return lote
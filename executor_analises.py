@@ -0,0 +1,85 @@
+# executor_analises.py - ANÁLISE DE PLANILHAS FORA DO EVENT LOOP DO TELEGRAM
+import asyncio
+import logging
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict
+
+from settings import CONFIG
+from pipeline_ingestao import ingerir_planilha
+
+logger = logging.getLogger('GAYA_EXECUTOR')
+
+INTERVALO_PROGRESSO = 0.5  # segundos entre consultas à fila de progresso
+
+_pool = None
+_gerenciador = None
+_semaforo = None
+
+def _obter_pool() -> ProcessPoolExecutor:
+    """Pool de processos limitado a MAX_ANALISES_SIMULTANEAS"""
+    global _pool
+    if _pool is None:
+        # spawn: o processo do bot tem threads (telegram/asyncio), fork não é seguro
+        _pool = ProcessPoolExecutor(
+            max_workers=CONFIG["MAX_ANALISES_SIMULTANEAS"],
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+def _obter_gerenciador():
+    """Manager que cria as filas de progresso compartilhadas com os processos"""
+    global _gerenciador
+    if _gerenciador is None:
+        _gerenciador = multiprocessing.get_context('spawn').Manager()
+    return _gerenciador
+
+def _obter_semaforo() -> asyncio.Semaphore:
+    """Limita quantas análises ficam em andamento ao mesmo tempo"""
+    global _semaforo
+    if _semaforo is None:
+        _semaforo = asyncio.Semaphore(CONFIG["MAX_ANALISES_SIMULTANEAS"])
+    return _semaforo
+
+def _ingerir_no_processo(fila, file_path: str, opcoes: Dict[str, Any]) -> Dict[str, Any]:
+    """Roda no processo do pool: executa o pipeline publicando o progresso na fila"""
+    return ingerir_planilha(file_path, progresso=fila.put, **opcoes)
+
+async def ingerir_planilha_async(file_path: str,
+                                 ao_progredir: Callable[[str], Awaitable[None]] = None,
+                                 **opcoes) -> Dict[str, Any]:
+    """
+    Executa pipeline_ingestao.ingerir_planilha num processo separado e
+    aguarda o resultado sem bloquear o event loop. `ao_progredir` é
+    aguardado a cada etapa concluída pelo pipeline.
+    """
+    loop = asyncio.get_running_loop()
+
+    async with _obter_semaforo():
+        fila = _obter_gerenciador().Queue()
+        futuro = loop.run_in_executor(_obter_pool(), _ingerir_no_processo, fila, file_path, opcoes)
+
+        while not futuro.done():
+            try:
+                etapa = await loop.run_in_executor(None, fila.get, True, INTERVALO_PROGRESSO)
+            except queue.Empty:
+                continue
+            if ao_progredir:
+                await ao_progredir(etapa)
+
+        return await futuro
+
+def progresso_telegram(bot, mensagem, titulo: str) -> Callable[[str], Awaitable[None]]:
+    """Cria um callback que edita `mensagem` mostrando a etapa atual"""
+    async def atualizar(etapa: str):
+        try:
+            await bot.edit_message_text(
+                chat_id=mensagem.chat_id,
+                message_id=mensagem.message_id,
+                text=f"{titulo}\n\n{etapa}"
+            )
+        except Exception as e:
+            # Falha ao editar (ex.: mensagem igual) não pode derrubar a análise
+            logger.debug(f"Não foi possível atualizar o progresso: {e}")
+    return atualizar
@@ -1,39 +1,77 @@
-import sqlite3
 import logging
 import os
+from collections import Counter
 from datetime import datetime
+from itertools import islice
+
+from agregados_envio import COLUNAS_AGREGADOS_TRANSPORTES, DIMENSAO_TOTAL, VALOR_TOTAL
+from conexao_db import conexao_escrita, conexao_leitura
+from migracoes import migrar, texto_busca
 
 logger = logging.getLogger('GAYA_DB')
 
+# Campo do transporte (formato do pipeline) -> coluna do esquema único (migracoes)
+COLUNAS_ESQUEMA_TRANSPORTE = {
+    'load_number': 'lt',
+    'chassis': 'chassis',
+    'destination_city': 'cidade_destino',
+    'destination_state': 'estado_destino',
+    'customer_name': 'cliente',
+    'planned_ship_date': 'data_embarque',
+    'vehicle_type': 'tipo_veiculo',
+    'driver_name': 'motorista'
+}
+
+# Dimensão agregada (agregados_envio) -> campo do transporte com o valor contado
+_CAMPOS_POR_COLUNA = {coluna: campo for campo, coluna in COLUNAS_ESQUEMA_TRANSPORTE.items()}
+CAMPOS_AGREGADOS_TRANSPORTE = {
+    dimensao: _CAMPOS_POR_COLUNA[coluna] for dimensao, coluna in COLUNAS_AGREGADOS_TRANSPORTES.items()
+}
+
+# Registros por executemany em salvar_transportes
+TAMANHO_LOTE = 1000
+
 class GayaDatabase:
     def __init__(self, db_path):
         self.db_path = db_path
         self._init_db()
     
     def _init_db(self):
-        """Cria tabela para transportes se não existir"""
+        """Cria tabela para transportes se não existir (esquema único, via migrações)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transportes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    load_number TEXT,
-                    chassis TEXT,
-                    destination_city TEXT,
-                    destination_state TEXT,
-                    customer_name TEXT,
-                    planned_ship_date TEXT,
-                    vehicle_type TEXT,
-                    driver_name TEXT,
-                    created_at TEXT,
-                    file_source TEXT
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            migrar(self.db_path)
+            with conexao_escrita(self.db_path) as conn:
+                cursor = conn.cursor()
+
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS agregados_transportes (
+                        dimensao TEXT,
+                        valor TEXT,
+                        quantidade INTEGER,
+                        PRIMARY KEY (dimensao, valor)
+                    )
+                ''')
+                # Arquivos já gravados (hash do conteúdo): um reenvio não duplica os transportes
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS arquivos_recebidos (
+                        hash_arquivo TEXT PRIMARY KEY,
+                        nome_arquivo TEXT,
+                        recebido_em TEXT
+                    )
+                ''')
+                # Banco com transportes de antes dos agregados: conta uma única vez
+                cursor.execute("SELECT EXISTS (SELECT 1 FROM agregados_transportes)")
+                if not cursor.fetchone()[0]:
+                    cursor.execute('''
+                        INSERT INTO agregados_transportes (dimensao, valor, quantidade)
+                        SELECT ?, ?, COUNT(*) FROM transportes
+                    ''', (DIMENSAO_TOTAL, VALOR_TOTAL))
+                    for dimensao, coluna in COLUNAS_AGREGADOS_TRANSPORTES.items():
+                        cursor.execute(f'''
+                            INSERT INTO agregados_transportes (dimensao, valor, quantidade)
+                            SELECT ?, {coluna}, COUNT(*) FROM transportes
+                            WHERE {coluna} != '' GROUP BY {coluna}
+                        ''', (dimensao,))
             logger.info("✅ Tabela transportes inicializada!")
             
         except Exception as e:
@@ -41,47 +79,133 @@ class GayaDatabase:
     
     def salvar_transporte(self, dados):
         """Salva um transporte no banco"""
+        return self.salvar_transportes([dados])["inseridos"] == 1
+    
+    def arquivo_recebido(self, hash_arquivo):
+        """True se os transportes de um arquivo com este conteúdo já foram gravados"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with conexao_leitura(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1 FROM arquivos_recebidos WHERE hash_arquivo = ?", (hash_arquivo,))
+                return cursor.fetchone() is not None
             
-            cursor.execute('''
-                INSERT INTO transportes 
-                (load_number, chassis, destination_city, destination_state, 
-                 customer_name, planned_ship_date, vehicle_type, driver_name,
-                 created_at, file_source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                dados.get('load_number', ''),
-                dados.get('chassis', ''),
-                dados.get('destination_city', ''),
-                dados.get('destination_state', ''),
-                dados.get('customer_name', ''),
-                dados.get('planned_ship_date', ''),
-                dados.get('vehicle_type', ''),
-                dados.get('driver_name', ''),
-                datetime.now().isoformat(),
-                dados.get('file_source', 'telegram')
-            ))
+        except Exception as e:
+            logger.error(f"❌ Erro ao consultar arquivos recebidos: {e}")
+            return False
+    
+    def salvar_transportes(self, registros, tamanho_lote=TAMANHO_LOTE, hash_arquivo=None, nome_arquivo=None):
+        """
+        Salva vários transportes numa única conexão e transação, em lotes
+        de executemany. `registros` pode ser qualquer iterável (inclusive um
+        gerador de lotes já achatado). Registros sem load_number e sem
+        chassis são ignorados. Com `hash_arquivo`, um arquivo de mesmo
+        conteúdo já gravado não grava nada (duplicado=True). Devolve
+        {'inseridos': n, 'ignorados': n, 'duplicado': bool}; em caso de
+        erro nada é gravado.
+        """
+        inseridos = ignorados = 0
+        contagens = Counter()
+        try:
+            with conexao_escrita(self.db_path) as conn:
+                cursor = conn.cursor()
+                criado_em = datetime.now().isoformat()
+
+                if hash_arquivo:
+                    cursor.execute('''
+                        INSERT INTO arquivos_recebidos (hash_arquivo, nome_arquivo, recebido_em)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT (hash_arquivo) DO NOTHING
+                    ''', (hash_arquivo, nome_arquivo, criado_em))
+                    if not cursor.rowcount:
+                        logger.info(f"♻️ Arquivo já gravado, transportes ignorados: {nome_arquivo}")
+                        return {"inseridos": 0, "ignorados": 0, "duplicado": True}
+            
+                registros = iter(registros)
+                while True:
+                    lote = []
+                    for dados in islice(registros, tamanho_lote):
+                        if not dados.get('load_number') and not dados.get('chassis'):
+                            ignorados += 1
+                            continue
+                        lote.append((
+                            dados.get('load_number', ''),
+                            dados.get('chassis', ''),
+                            dados.get('destination_city', ''),
+                            dados.get('destination_state', ''),
+                            dados.get('customer_name', ''),
+                            dados.get('planned_ship_date', ''),
+                            dados.get('vehicle_type', ''),
+                            dados.get('driver_name', ''),
+                            criado_em,
+                            dados.get('file_source', 'telegram'),
+                            texto_busca(dados.get('destination_city', '')),
+                            texto_busca(dados.get('destination_state', ''))
+                        ))
+                        contagens[DIMENSAO_TOTAL, VALOR_TOTAL] += 1
+                        for dimensao, campo in CAMPOS_AGREGADOS_TRANSPORTE.items():
+                            if dados.get(campo):
+                                contagens[dimensao, dados[campo]] += 1
+                    if not lote:
+                        break
+                    cursor.executemany('''
+                        INSERT INTO transportes 
+                        (lt, chassis, cidade_destino, estado_destino, 
+                         cliente, data_embarque, tipo_veiculo, motorista,
+                         created_at, arquivo_origem, cidade_busca, estado_busca)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', lote)
+                    inseridos += len(lote)
             
-            conn.commit()
-            conn.close()
-            return True
+                self._somar_agregados(cursor, contagens)
+            if inseridos > 1:
+                logger.info(f"💾 Transportes salvos: {inseridos} inseridos, {ignorados} ignorados")
+            return {"inseridos": inseridos, "ignorados": ignorados, "duplicado": False}
             
         except Exception as e:
             logger.error(f"❌ Erro ao salvar: {e}")
-            return False
+            return {"inseridos": 0, "ignorados": ignorados, "duplicado": False}
+    
+    def _somar_agregados(self, cursor, contagens):
+        """Soma as contagens {(dimensao, valor): n} (na mesma transação dos INSERTs)"""
+        cursor.executemany('''
+            INSERT INTO agregados_transportes (dimensao, valor, quantidade)
+            VALUES (?, ?, ?)
+            ON CONFLICT (dimensao, valor) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+        ''', [(dimensao, valor, quantidade) for (dimensao, valor), quantidade in contagens.items()])
+    
+    def obter_agregados(self, limite=5):
+        """Maiores contagens de cada dimensão: {dimensao: [(valor, quantidade)]}"""
+        try:
+            with conexao_leitura(self.db_path) as conn:
+                cursor = conn.cursor()
+            
+                cursor.execute('''
+                    SELECT dimensao, valor, quantidade FROM (
+                        SELECT dimensao, valor, quantidade,
+                               ROW_NUMBER() OVER (PARTITION BY dimensao ORDER BY quantidade DESC, valor) AS posicao
+                        FROM agregados_transportes
+                    )
+                    WHERE posicao <= ?
+                    ORDER BY dimensao, posicao
+                ''', (limite,))
+            
+                agregados = {}
+                for dimensao, valor, quantidade in cursor.fetchall():
+                    agregados.setdefault(dimensao, []).append((valor, quantidade))
+            return agregados
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao obter agregados: {e}")
+            return {}
     
     def contar_transportes(self):
         """Conta quantos transportes temos no banco"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT COUNT(*) FROM transportes")
-            count = cursor.fetchone()[0]
+            with conexao_leitura(self.db_path) as conn:
+                cursor = conn.cursor()
             
-            conn.close()
+                cursor.execute("SELECT COUNT(*) FROM transportes")
+                count = cursor.fetchone()[0]
             return count
             
         except Exception as e:
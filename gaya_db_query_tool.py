@@ -1,10 +1,11 @@
 # gaya_db_query_tool.py - VERSÃO SIMPLIFICADA
-import sqlite3
 import logging
 import os
-import time
 from datetime import datetime
 
+from codec_blobs import codificar, decodificar
+from conexao_db import conexao_escrita, conexao_leitura
+
 logger = logging.getLogger('GAYA_DB')
 
 # Configuração do banco
@@ -13,23 +14,20 @@ DB_FILE = "gaya_data.db"
 def init_db():
     """Inicializa o banco de dados"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # Tabela para armazenar dados dos arquivos
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS arquivos_processados (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome_arquivo TEXT NOT NULL,
-                dados_json TEXT NOT NULL,
-                usuario_id TEXT,
-                data_processamento TEXT,
-                resumo_ia TEXT
-            )
-        """)
+        with conexao_escrita(DB_FILE) as conn:
+            cursor = conn.cursor()
         
-        conn.commit()
-        conn.close()
+            # Tabela para armazenar dados dos arquivos
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS arquivos_processados (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nome_arquivo TEXT NOT NULL,
+                    dados_json TEXT NOT NULL,
+                    usuario_id TEXT,
+                    data_processamento TEXT,
+                    resumo_ia TEXT
+                )
+            """)
         logger.info("✅ Banco de dados inicializado")
         
     except Exception as e:
@@ -38,28 +36,36 @@ def init_db():
 def salvar_dados_arquivo(nome_arquivo, dados, usuario_id, resumo_ia=""):
     """Salva dados do arquivo no banco"""
     try:
-        time.sleep(0.5)  # Pausa para RAM
-        
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO arquivos_processados 
-            (nome_arquivo, dados_json, usuario_id, data_processamento, resumo_ia)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            nome_arquivo,
-            str(dados),  # Converter para string por enquanto
-            str(usuario_id),
-            datetime.now().isoformat(),
-            resumo_ia
-        ))
+        with conexao_escrita(DB_FILE) as conn:
+            cursor = conn.cursor()
         
-        conn.commit()
-        conn.close()
+            cursor.execute("""
+                INSERT INTO arquivos_processados 
+                (nome_arquivo, dados_json, usuario_id, data_processamento, resumo_ia)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                nome_arquivo,
+                codificar(dados),
+                str(usuario_id),
+                datetime.now().isoformat(),
+                resumo_ia
+            ))
         logger.info(f"✅ Dados salvos: {nome_arquivo}")
         return True
         
     except Exception as e:
         logger.error(f"❌ Erro ao salvar: {e}")
         return False
+
+def obter_dados_arquivo(arquivo_id):
+    """Lê os dados de um arquivo salvo (formato compacto ou str() antigo)"""
+    try:
+        with conexao_leitura(DB_FILE) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT dados_json FROM arquivos_processados WHERE id = ?", (arquivo_id,))
+            linha = cursor.fetchone()
+        return decodificar(linha[0], f"arquivos_processados id={arquivo_id}") if linha else None
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao ler dados: {e}")
+        return None
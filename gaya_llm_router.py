@@ -1,9 +1,96 @@
 # gaya_llm_router.py - VERSÃO QUE CONSULTA BANCO REAL
 import logging
-from database_manager import obter_ultima_analise, obter_todas_inconsistencias
+import re
+from datetime import date, timedelta
+from typing import Dict, Any, Iterator
+from database_manager import (
+    obter_ultima_analise, iterar_inconsistencias, contar_inconsistencias, obter_agregados,
+    obter_transportes_por_status, obter_transportes_por_periodo
+)
+from settings import CONFIG
 
 logger = logging.getLogger('GAYA_LLM')
 
+# Registros mostrados por resposta (uma página da consulta)
+LIMITE_LISTAGEM = 10
+
+def _listar_transportes(titulo: str, pagina: dict) -> str:
+    transportes = pagina["transportes"]
+    if not transportes:
+        return f"📭 **{titulo}:** nenhum transporte encontrado."
+    
+    resposta = f"🚚 **{titulo}:**\n\n"
+    for t in transportes:
+        resposta += f"• Chassis {t['chassis']} | LT {t['lt']} | {t['cidade_destino'] or t['destino']} | {(t['data_embarque'] or '')[:10]}\n"
+    if pagina["cursor"]:
+        resposta += f"\n➕ Mostrando os {len(transportes)} primeiros."
+    return resposta
+
+PALAVRAS_INCONSISTENCIAS = ['inconsistencias', 'inconsistências', 'erros', 'problemas']
+CRITICIDADES = {'alta': 'ALTA', 'media': 'MEDIA', 'média': 'MEDIA', 'baixa': 'BAIXA'}
+RECOMENDACOES_INCONSISTENCIAS = """💡 **Recomendações:**
+• Verifique os chassis nos LTs mencionados
+• Corrija as duplicidades no sistema JD
+• Reenvie a planilha após correções"""
+# Espaço guardado na última mensagem para o total e as recomendações
+RESERVA_RODAPE = 400
+
+def _filtros_inconsistencias(mensagem_lower: str) -> Dict[str, Any]:
+    """Filtros pedidos na mensagem: criticidade, tipo (ex.: chassis_lt_incompativel) e última análise"""
+    filtros = {}
+    for palavra, criticidade in CRITICIDADES.items():
+        if re.search(rf"\b{palavra}\b", mensagem_lower):
+            filtros["criticidade"] = criticidade
+    tipo = re.search(r"\b[a-z]+(?:_[a-z]+)+\b", mensagem_lower)
+    if tipo:
+        filtros["tipo"] = tipo.group(0)
+    if any(palavra in mensagem_lower for palavra in ['ultima', 'última']):
+        ultima_analise = obter_ultima_analise()
+        if ultima_analise:
+            filtros["analise_id"] = ultima_analise['id']
+    return filtros
+
+def responder_inconsistencias(mensagem: str) -> Iterator[str]:
+    """
+    Lista as inconsistências em mensagens de até LIMITE_MENSAGEM_TELEGRAM
+    caracteres, montadas conforme as páginas são lidas do banco (até
+    MAX_MENSAGENS_RESPOSTA; o que sobrar vira um aviso com o total)
+    """
+    filtros = _filtros_inconsistencias(mensagem.lower())
+    total = contar_inconsistencias(**filtros)
+    if not total:
+        yield "✅ **Nenhuma inconsistência encontrada no banco de dados.**"
+        return
+    
+    limite = CONFIG["LIMITE_MENSAGEM_TELEGRAM"] - RESERVA_RODAPE
+    partes = ["🔍 **TODAS AS INCONSISTÊNCIAS DETECTADAS:**\n\n" if not filtros else "🔍 **INCONSISTÊNCIAS DETECTADAS:**\n\n"]
+    tamanho, enviadas, mostradas = len(partes[0]), 0, 0
+    
+    for i, inc in enumerate(iterar_inconsistencias(**filtros), 1):
+        item = f"**{i}. {inc['descricao']}**\n   • Criticidade: {inc['criticidade']}\n   • Arquivo: {inc['nome_arquivo']}\n\n"
+        if tamanho + len(item) > limite:
+            enviadas += 1
+            if enviadas == CONFIG["MAX_MENSAGENS_RESPOSTA"]:
+                break
+            yield "".join(partes)
+            partes, tamanho = [], 0
+        partes.append(item)
+        tamanho += len(item)
+        mostradas = i
+    
+    rodape = f"📊 **Total: {total} inconsistências**\n\n"
+    if mostradas < total:
+        rodape += f"➕ Mostradas as {mostradas} mais recentes. Filtre por criticidade (alta/média), tipo ou \"última análise\".\n\n"
+    partes.append(rodape + RECOMENDACOES_INCONSISTENCIAS)
+    yield "".join(partes)
+
+def gerar_respostas(mensagem: str) -> Iterator[str]:
+    """Resposta em uma ou mais mensagens (listagens longas saem em partes)"""
+    if any(palavra in mensagem.lower() for palavra in PALAVRAS_INCONSISTENCIAS):
+        yield from responder_inconsistencias(mensagem)
+    else:
+        yield processar_com_llm(mensagem)
+
 def processar_com_llm(mensagem: str) -> str:
     """Processa mensagens consultando o banco de dados REAL"""
     try:
@@ -11,27 +98,29 @@ def processar_com_llm(mensagem: str) -> str:
         
         mensagem_lower = mensagem.lower()
         
-        # CONSULTA: Todas as inconsistências
-        if any(palavra in mensagem_lower for palavra in ['inconsistencias', 'inconsistências', 'inconsistencias', 'erros', 'problemas']):
-            inconsistencias = obter_todas_inconsistencias()
-            
-            if not inconsistencias:
-                return "✅ **Nenhuma inconsistência encontrada no banco de dados.**"
-            
-            resposta = "🔍 **TODAS AS INCONSISTÊNCIAS DETECTADAS:**\n\n"
+        # CONSULTA: Inconsistências (só a primeira mensagem; gerar_respostas envia todas)
+        if any(palavra in mensagem_lower for palavra in PALAVRAS_INCONSISTENCIAS):
+            return next(responder_inconsistencias(mensagem))
+        
+        # CONSULTA: Fretes em trânsito (índice de status)
+        elif any(palavra in mensagem_lower for palavra in ['em trânsito', 'em transito']):
+            pagina = obter_transportes_por_status('em trânsito', limite=LIMITE_LISTAGEM)
+            return _listar_transportes("Fretes em trânsito", pagina)
+        
+        # CONSULTA: Fretes da semana / de hoje, opcionalmente para uma cidade (índice cidade + embarque)
+        elif any(palavra in mensagem_lower for palavra in ['esta semana', 'essa semana', 'nesta semana', 'hoje']):
+            hoje = date.today()
+            inicio = hoje if 'hoje' in mensagem_lower else hoje - timedelta(days=hoje.weekday())
+            fim = hoje if 'hoje' in mensagem_lower else inicio + timedelta(days=6)
             
-            for i, inc in enumerate(inconsistencias, 1):
-                resposta += f"**{i}. {inc['descricao']}**\n"
-                resposta += f"   • Criticidade: {inc['criticidade']}\n"
-                resposta += f"   • Arquivo: {inc['nome_arquivo']}\n\n"
+            cidade = re.search(r"\bpara\s+(.+?)\s+(?:esta|essa|nesta|hoje)\b", mensagem, re.IGNORECASE)
+            cidade = cidade.group(1).strip(" ?") if cidade else None
             
-            resposta += f"📊 **Total: {len(inconsistencias)} inconsistências**\n\n"
-            resposta += "💡 **Recomendações:**\n"
-            resposta += "• Verifique os chassis nos LTs mencionados\n"
-            resposta += "• Corrija as duplicidades no sistema JD\n"
-            resposta += "• Reenvie a planilha após correções"
+            # 'São Paulo' acha 'SAO PAULO' da JD: a cidade é comparada sem acento e caixa
+            pagina = obter_transportes_por_periodo(inicio, fim, cidade_destino=cidade, limite=LIMITE_LISTAGEM)
             
-            return resposta
+            titulo = f"Fretes {'para ' + cidade + ' ' if cidade else ''}de {inicio:%d/%m} a {fim:%d/%m}"
+            return _listar_transportes(titulo, pagina)
         
         # CONSULTA: Status da última análise
         elif any(palavra in mensagem_lower for palavra in ['status', 'análise', 'analise', 'ultima', 'última']):
@@ -66,7 +155,7 @@ def processar_com_llm(mensagem: str) -> str:
                 return "📭 **Nenhuma análise encontrada.** Envie uma planilha."
             
             acessorios = ultima_analise['acessorios_identificados']
-            total_com_acessorios = ultima_analise['analise_acessorios'].get('registros_com_acessorios', 0)
+            total_com_acessorios = ultima_analise['registros_com_acessorios'] or 0
             
             resposta = f"""🔧 **RELATÓRIO DE ACESSÓRIOS:**
 
@@ -77,8 +166,10 @@ def processar_com_llm(mensagem: str) -> str:
 
 🛠️ **ACESSÓRIOS ENCONTRADOS:**
 """
+            contagem_acessorios = dict(obter_agregados(ultima_analise['id'], limite=len(acessorios) or 1).get('acessorio', []))
             for acessorio in acessorios:
-                resposta += f"• {acessorio}\n"
+                quantidade = contagem_acessorios.get(acessorio)
+                resposta += f"• {acessorio} ({quantidade} registros)\n" if quantidade else f"• {acessorio}\n"
             
             if acessorios:
                 resposta += f"\n💡 **Acessórios críticos detectados:** {', '.join(acessorios)}"
@@ -87,6 +178,35 @@ def processar_com_llm(mensagem: str) -> str:
             
             return resposta
         
+        # CONSULTA: Estatísticas (contagens já agregadas na ingestão)
+        elif any(palavra in mensagem_lower for palavra in ['resumo', 'estatisticas', 'estatísticas', 'cidades', 'clientes', 'veiculos', 'veículos', 'estados']):
+            ultima_analise = obter_ultima_analise()
+            
+            if not ultima_analise:
+                return "📭 **Nenhuma análise encontrada.** Envie uma planilha."
+            
+            da_analise = obter_agregados(ultima_analise['id'])
+            do_banco = obter_agregados()
+            
+            def listar(agregados, dimensao):
+                return ', '.join(f"{valor} ({quantidade})" for valor, quantidade in agregados.get(dimensao, [])) or 'Nenhum'
+            
+            total_banco = sum(quantidade for _, quantidade in do_banco.get('total', []))
+            
+            return f"""📊 **RESUMO DOS DADOS:**
+
+📁 **Última análise:** {ultima_analise['nome_arquivo']} ({ultima_analise['total_registros']} registros)
+• Estados: {listar(da_analise, 'estado')}
+• Cidades: {listar(da_analise, 'cidade')}
+• Clientes: {listar(da_analise, 'cliente')}
+• Veículos: {listar(da_analise, 'veiculo')}
+• Inconsistências por tipo: {listar(da_analise, 'inconsistencia')}
+
+🗄️ **Banco inteiro:** {total_banco} registros
+• Cidades: {listar(do_banco, 'cidade')}
+• Clientes: {listar(do_banco, 'cliente')}
+• Veículos: {listar(do_banco, 'veiculo')}"""
+        
         # Resposta padrão com opções baseadas no banco
         else:
             ultima_analise = obter_ultima_analise()
@@ -0,0 +1,181 @@
+# leitor_planilhas.py - LEITURA ÚNICA DAS PLANILHAS ENVIADAS
+import pandas as pd
+import csv
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+from openpyxl import load_workbook
+
+from mapeamento_colunas import normalizar_cabecalho
+from settings import CONFIG
+
+logger = logging.getLogger('GAYA_LEITOR')
+
+# pyarrow é opcional: quando instalado, lê CSV com várias threads
+try:
+    import pyarrow  # noqa: F401
+    MOTOR_CSV = 'pyarrow'
+except ImportError:
+    MOTOR_CSV = 'c'
+
+# Aba padrão das exportações JD
+ABA_TRANSPORTES = 'TRK_TRANS_DTL'
+
+# Colunas que identificam uma aba de transportes (uma aba por Rail Head)
+ASSINATURA_CABECALHO = {'Load No', 'Serial Number'}
+
+# Colunas de metadados acrescentadas a toda leitura (aba de origem e linha original)
+COLUNA_ABA = '_aba_planilha'
+COLUNA_LINHA = '_linha_planilha'
+
+# Formatos aceitos pelos bots (a exportação JD também sai em CSV/TSV)
+EXTENSOES_TEXTO = ('.csv', '.tsv')
+EXTENSOES_ACEITAS = ('.xlsx', '.xls') + EXTENSOES_TEXTO
+
+# Amostra usada para detectar codificação e separador dos arquivos texto
+TAMANHO_AMOSTRA = 64 * 1024
+CODIFICACOES = ('utf-8-sig', 'cp1252')
+SEPARADORES = ',;\t|'
+
+def ler_planilha(file_path: str) -> pd.DataFrame:
+    """
+    Lê a planilha uma única vez. Todas as abas com o cabeçalho de
+    transportes são lidas em paralelo e juntadas num só DataFrame. Todo
+    caminho de leitura traz o nome da aba em COLUNA_ABA e a linha original
+    em COLUNA_LINHA. Sem nenhuma aba reconhecida, usa a aba
+    TRK_TRANS_DTL quando existir, senão a primeira aba do arquivo.
+    Arquivos CSV/TSV são lidos direto por ler_texto_delimitado.
+    """
+    if eh_texto_delimitado(file_path):
+        # Arquivo texto não tem abas, mas sai com as mesmas colunas de metadados
+        return _com_origem(ler_texto_delimitado(file_path), None)
+
+    abas = descobrir_abas(file_path)
+
+    if not abas:
+        with pd.ExcelFile(file_path) as arquivo:
+            aba = ABA_TRANSPORTES if ABA_TRANSPORTES in arquivo.sheet_names else arquivo.sheet_names[0]
+            df = _com_origem(arquivo.parse(aba), aba)
+        logger.info(f"📖 Aba '{aba}' lida: {len(df)} linhas, {len(df.columns)} colunas")
+        return df
+
+    processos = _processos_leitura(len(abas))
+    if processos <= 1:
+        partes = [_ler_aba(file_path, aba) for aba in abas]
+    else:
+        with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn')) as pool:
+            partes = list(pool.map(_ler_aba, [file_path] * len(abas), abas))
+
+    df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+    logger.info(f"📖 {len(abas)} aba(s) lida(s) {abas}: {len(df)} linhas, {len(df.columns)} colunas")
+    return df
+
+def eh_texto_delimitado(file_path: str) -> bool:
+    """Arquivo é CSV/TSV (pela extensão)?"""
+    return str(file_path).lower().endswith(EXTENSOES_TEXTO)
+
+def detectar_formato_texto(file_path: str) -> Tuple[str, str]:
+    """
+    Detecta (codificação, separador) de um CSV/TSV a partir de uma amostra
+    do início do arquivo. Exportações do Excel em português costumam vir
+    em cp1252 com ';'.
+    """
+    with open(file_path, 'rb') as arquivo:
+        amostra = arquivo.read(TAMANHO_AMOSTRA)
+
+    for codificacao in CODIFICACOES:
+        try:
+            texto = amostra.decode(codificacao)
+            break
+        except UnicodeDecodeError as e:
+            # A amostra pode ter cortado um caractere multibyte no final
+            if codificacao.startswith('utf-8') and e.start >= len(amostra) - 3:
+                texto = amostra[:e.start].decode(codificacao)
+                break
+    else:
+        codificacao, texto = 'latin-1', amostra.decode('latin-1')
+
+    if str(file_path).lower().endswith('.tsv'):
+        return codificacao, '\t'
+
+    # Só o cabeçalho e algumas linhas completas entram no sniffer
+    linhas = texto.splitlines()[:20]
+    try:
+        separador = csv.Sniffer().sniff('\n'.join(linhas), delimiters=SEPARADORES).delimiter
+    except csv.Error:
+        cabecalho = linhas[0] if linhas else ''
+        separador = max(SEPARADORES, key=cabecalho.count)
+    return codificacao, separador
+
+def ler_texto_delimitado(file_path: str) -> pd.DataFrame:
+    """Lê um CSV/TSV inteiro com o motor mais rápido disponível (pyarrow ou C)"""
+    codificacao, separador = detectar_formato_texto(file_path)
+    df = pd.read_csv(file_path, sep=separador, encoding=codificacao, engine=MOTOR_CSV)
+    df.columns = [str(coluna).strip() for coluna in df.columns]
+    logger.info(f"📖 Arquivo texto lido ({codificacao}, separador {separador!r}, motor {MOTOR_CSV}): "
+                f"{len(df)} linhas, {len(df.columns)} colunas")
+    return df
+
+def descobrir_abas(file_path: str) -> List[str]:
+    """Lista as abas cujo cabeçalho contém a ASSINATURA_CABECALHO"""
+    if eh_texto_delimitado(file_path):
+        return []
+    if not str(file_path).lower().endswith('.xlsx'):
+        with pd.ExcelFile(file_path) as arquivo:
+            return [aba for aba in arquivo.sheet_names if _tem_assinatura(arquivo.parse(aba, nrows=0).columns)]
+
+    # Modo read-only: só a primeira linha de cada aba é lida
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        abas = []
+        for planilha in workbook.worksheets:
+            cabecalho = next(planilha.iter_rows(max_row=1, values_only=True), ())
+            if _tem_assinatura(cabecalho):
+                abas.append(planilha.title)
+        return abas
+    finally:
+        workbook.close()
+
+def _tem_assinatura(cabecalho) -> bool:
+    """Cabeçalho contém as colunas de ASSINATURA_CABECALHO (comparação normalizada)?"""
+    normalizado = {normalizar_cabecalho(coluna) for coluna in cabecalho if coluna is not None}
+    return {normalizar_cabecalho(coluna) for coluna in ASSINATURA_CABECALHO} <= normalizado
+
+def _processos_leitura(abas: int) -> int:
+    """
+    Processos para ler as abas em paralelo. Dentro de um processo filho
+    (worker do executor_analises) a leitura é na própria linha: o pool de
+    análises já limita os processos a MAX_ANALISES_SIMULTANEAS.
+    """
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return min(abas, CONFIG["MAX_ANALISES_SIMULTANEAS"])
+
+def _ler_aba(file_path: str, aba: str) -> pd.DataFrame:
+    """Lê uma aba guardando o nome dela e a linha original de cada registro"""
+    return _com_origem(pd.read_excel(file_path, sheet_name=aba), aba)
+
+def _com_origem(df: pd.DataFrame, aba: str) -> pd.DataFrame:
+    """Acrescenta COLUNA_ABA e COLUNA_LINHA (linha original) ao que foi lido"""
+    df[COLUNA_ABA] = aba
+    df[COLUNA_LINHA] = df.index + 2  # +2 porque Excel começa na 1 e header na 1
+    return df
+
+def como_texto(valor) -> str:
+    """Converte para texto como a leitura em streaming (1000.0 -> '1000')"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def calcular_hash_arquivo(file_path: str, tamanho_bloco: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo (identifica reenvios do mesmo arquivo)"""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
@@ -0,0 +1,74 @@
+# mapeamento_colunas.py - MOTOR ÚNICO DE MAPEAMENTO DE CABEÇALHOS
+import logging
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List
+
+logger = logging.getLogger('GAYA_MAPEAMENTO')
+
+def normalizar_cabecalho(nome: Any) -> str:
+    """'Número  do_Chassi ' -> 'numero do chassi' (sem acento, caixa e espaços extras)"""
+    texto = unicodedata.normalize('NFKD', str(nome))
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    texto = re.sub(r'[\s_\-./]+', ' ', texto.casefold())
+    return texto.strip()
+
+class MapeadorColunas:
+    """
+    Resolve cabeçalhos de planilha para os campos internos através de um
+    índice pré-calculado (alias normalizado -> campo). O resultado de cada
+    assinatura de cabeçalho fica memorizado, então reenvios no mesmo
+    layout são mapeados sem refazer nenhuma comparação.
+    """
+
+    def __init__(self, aliases: Dict[str, List[str]], obrigatorios: Iterable[str] = ()):
+        # aliases: campo -> nomes aceitos, do preferido para o menos preferido
+        self.campos = list(aliases)
+        self.obrigatorios = list(obrigatorios)
+        self._indice = {}
+        for campo, nomes in aliases.items():
+            for prioridade, nome in enumerate(nomes):
+                self._indice.setdefault(normalizar_cabecalho(nome), (campo, prioridade))
+        self._memo = {}
+
+    def mapear(self, colunas: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Devolve {'mapeamento': {coluna original: campo}, 'colunas_desconhecidas',
+        'campos_faltantes', 'valido'}. Colunas de metadados (começando com '_')
+        não entram no mapeamento nem nas desconhecidas.
+        """
+        assinatura = tuple(colunas)
+        resultado = self._memo.get(assinatura)
+        if resultado is not None:
+            return resultado
+
+        escolhidas = {}  # campo -> (prioridade, coluna original)
+        desconhecidas = []
+        for coluna in assinatura:
+            if str(coluna).startswith('_'):
+                continue
+            encontrado = self._indice.get(normalizar_cabecalho(coluna))
+            if encontrado is None:
+                desconhecidas.append(coluna)
+                continue
+            campo, prioridade = encontrado
+            if campo not in escolhidas or prioridade < escolhidas[campo][0]:
+                escolhidas[campo] = (prioridade, coluna)
+
+        # Mapeamento na ordem em que os campos foram declarados
+        mapeamento = {escolhidas[campo][1]: campo for campo in self.campos if campo in escolhidas}
+        faltantes = [campo for campo in self.obrigatorios if campo not in escolhidas]
+
+        resultado = {
+            "mapeamento": mapeamento,
+            "colunas_desconhecidas": desconhecidas,
+            "campos_faltantes": faltantes,
+            "valido": not faltantes
+        }
+        self._memo[assinatura] = resultado
+
+        if faltantes:
+            logger.warning(f"⚠️ Layout desconhecido: faltam {faltantes} (cabeçalho: {list(assinatura)})")
+        elif desconhecidas:
+            logger.info(f"ℹ️ Colunas ignoradas no mapeamento: {desconhecidas}")
+        return resultado
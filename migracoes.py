@@ -0,0 +1,241 @@
+# migracoes.py - VERSÕES DO ESQUEMA DO BANCO (PRAGMA user_version)
+import logging
+import os
+from typing import Callable, List, Tuple
+
+from conexao_db import conexao_escrita
+from mapeamento_colunas import normalizar_cabecalho
+
+logger = logging.getLogger('GAYA_MIGRACOES')
+
+# Esquema único de transportes (gaya_db, database_manager e planilha_processor)
+COLUNAS_TRANSPORTES = (
+    ("id", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    ("chassis", "TEXT"),
+    ("lt", "TEXT"),
+    ("transportadora", "TEXT"),
+    ("origem", "TEXT"),
+    ("destino", "TEXT"),
+    ("cidade_destino", "TEXT"),
+    ("estado_destino", "TEXT"),
+    ("cliente", "TEXT"),
+    ("tipo_veiculo", "TEXT"),
+    ("motorista", "TEXT"),
+    ("data_embarque", "TEXT"),  # ISO: ordenável e comparável como texto
+    ("status", "TEXT"),
+    ("acessorios", "TEXT"),
+    ("valor_frete", "REAL"),
+    ("analise_id", "INTEGER"),
+    ("arquivo_origem", "TEXT"),
+    ("created_at", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+)
+
+# Coluna do esquema único -> colunas equivalentes nos esquemas antigos (em ordem de preferência)
+COLUNAS_ANTIGAS = {
+    "lt": ("lt", "load_number", "cargo_id"),
+    "cidade_destino": ("cidade_destino", "destination_city"),
+    "estado_destino": ("estado_destino", "destination_state"),
+    "cliente": ("cliente", "customer_name"),
+    "tipo_veiculo": ("tipo_veiculo", "vehicle_type"),
+    "motorista": ("motorista", "driver_name"),
+    "data_embarque": ("data_embarque", "data", "planned_ship_date"),
+    "arquivo_origem": ("arquivo_origem", "file_source"),
+    "created_at": ("created_at", "data_criacao"),
+}
+
+# Índices secundários de transportes (o rowid/id entra em todo índice: serve à paginação por id)
+INDICES_TRANSPORTES = {
+    "idx_transportes_chassis": "chassis",
+    "idx_transportes_lt": "lt",
+    "idx_transportes_analise": "analise_id",
+    "idx_transportes_cidade": "cidade_destino",
+    "idx_transportes_estado": "estado_destino",
+    "idx_transportes_cliente": "cliente",
+    "idx_transportes_veiculo": "tipo_veiculo",
+    "idx_transportes_embarque": "data_embarque",
+    "idx_transportes_status": "status",
+    "idx_transportes_origem_destino": "origem, destino",
+}
+
+def _criar_transportes(cursor, tabela: str = "transportes"):
+    colunas = ",\n    ".join(f"{nome} {tipo}" for nome, tipo in COLUNAS_TRANSPORTES)
+    cursor.execute(f"CREATE TABLE {tabela} (\n    {colunas}\n)")
+
+def _unificar_transportes(cursor):
+    """Cria transportes no esquema único ou reescreve a tabela de um esquema antigo"""
+    existentes = [linha[1] for linha in cursor.execute("PRAGMA table_info(transportes)")]
+    if not existentes:
+        _criar_transportes(cursor)
+        return
+
+    destino, origem = [], []
+    for nome, _ in COLUNAS_TRANSPORTES:
+        equivalentes = [coluna for coluna in COLUNAS_ANTIGAS.get(nome, (nome,)) if coluna in existentes]
+        if equivalentes:
+            destino.append(nome)
+            origem.append(equivalentes[0] if len(equivalentes) == 1 else f"COALESCE({', '.join(equivalentes)})")
+
+    # Índices antigos caem junto com a tabela antiga
+    _criar_transportes(cursor, "transportes_unificado")
+    cursor.execute(f"""
+        INSERT INTO transportes_unificado ({', '.join(destino)})
+        SELECT {', '.join(origem)} FROM transportes
+    """)
+    cursor.execute("DROP TABLE transportes")
+    cursor.execute("ALTER TABLE transportes_unificado RENAME TO transportes")
+    logger.info(f"🔀 transportes convertida para o esquema único ({cursor.execute('SELECT COUNT(*) FROM transportes').fetchone()[0]} registros)")
+
+def _indexar_transportes(cursor):
+    for indice, colunas in INDICES_TRANSPORTES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {indice} ON transportes ({colunas})")
+    cursor.execute("ANALYZE transportes")
+
+# Índices compostos das consultas paginadas de database_manager (filtro + ordem da página).
+# Os de cidade e estado começam pela mesma coluna dos índices simples, que deixam de ser úteis.
+INDICES_SUBSTITUIDOS = ("idx_transportes_cidade", "idx_transportes_estado")
+INDICES_CONSULTAS = {
+    "idx_transportes_cidade_embarque": "cidade_destino, data_embarque",
+    "idx_transportes_estado_embarque": "estado_destino, data_embarque",
+    "idx_transportes_destino": "destino",
+}
+
+def _indexar_consultas(cursor):
+    for indice, colunas in INDICES_CONSULTAS.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {indice} ON transportes ({colunas})")
+    for indice in INDICES_SUBSTITUIDOS:
+        cursor.execute(f"DROP INDEX IF EXISTS {indice}")
+    cursor.execute("ANALYZE transportes")
+
+def _tabela_existe(cursor, tabela: str) -> bool:
+    return cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone() is not None
+
+def _nome_arquivo_unico(cursor) -> bool:
+    """analises_planilhas criada pelo init_db antigo (nome_arquivo TEXT UNIQUE)?"""
+    for _, indice, unico, origem, _ in cursor.execute("PRAGMA index_list(analises_planilhas)").fetchall():
+        colunas = [linha[2] for linha in cursor.execute(f"PRAGMA index_info({indice})")]
+        if unico and origem == "u" and colunas == ["nome_arquivo"]:
+            return True
+    return False
+
+def _liberar_nome_arquivo(cursor):
+    """
+    Recria analises_planilhas sem o UNIQUE de nome_arquivo (várias análises,
+    e versões, do mesmo arquivo) e apaga o que ficou órfão das análises
+    substituídas pelo INSERT OR REPLACE antigo
+    """
+    if not _tabela_existe(cursor, "analises_planilhas") or not _nome_arquivo_unico(cursor):
+        return
+
+    colunas = cursor.execute("PRAGMA table_info(analises_planilhas)").fetchall()
+    definicoes = []
+    for _, nome, tipo, _, padrao, chave in colunas:
+        definicao = f"{nome} {tipo}"
+        if chave:
+            definicao += " PRIMARY KEY AUTOINCREMENT"
+        if padrao is not None:
+            definicao += f" DEFAULT {padrao}"
+        definicoes.append(definicao)
+    nomes = ", ".join(coluna[1] for coluna in colunas)
+    indices = [linha[0] for linha in cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'analises_planilhas' AND sql IS NOT NULL"
+    )]
+
+    cursor.execute(f"CREATE TABLE analises_planilhas_nova ({', '.join(definicoes)})")
+    cursor.execute(f"INSERT INTO analises_planilhas_nova ({nomes}) SELECT {nomes} FROM analises_planilhas")
+    cursor.execute("DROP TABLE analises_planilhas")
+    cursor.execute("ALTER TABLE analises_planilhas_nova RENAME TO analises_planilhas")
+    for sql in indices:
+        cursor.execute(sql)
+
+    for tabela in ("inconsistencias", "impressoes_linhas", "agregados_analise"):
+        if _tabela_existe(cursor, tabela):
+            cursor.execute(f"DELETE FROM {tabela} WHERE analise_id NOT IN (SELECT id FROM analises_planilhas)")
+    logger.info("🔀 analises_planilhas recriada sem UNIQUE em nome_arquivo")
+
+def _normalizar_lt_chassis(cursor):
+    """
+    LT e chassis numéricos gravados como float pelo Excel ('1000.0') passam
+    a '1000', o mesmo texto das impressões e dos envios novos: as consultas
+    comparam a coluna pura e usam os índices de lt e chassis
+    """
+    for coluna in ("lt", "chassis"):
+        cursor.execute(f"""
+            UPDATE transportes SET {coluna} = substr({coluna}, 1, length({coluna}) - 2)
+            WHERE {coluna} GLOB '[0-9]*.0' AND substr({coluna}, 1, length({coluna}) - 2) NOT GLOB '*[^0-9]*'
+        """)
+        logger.info(f"🔀 transportes.{coluna}: {cursor.rowcount} valores sem '.0'")
+
+# Coluna de transportes -> cópia dobrada (sem acento, caixa e espaços extras) que os
+# filtros das consultas comparam. Quem grava em transportes preenche as duas.
+COLUNAS_BUSCA = {
+    "cidade_destino": "cidade_busca",
+    "estado_destino": "estado_busca",
+    "status": "status_busca",
+}
+INDICES_BUSCA = {
+    "idx_transportes_cidade_busca": "cidade_busca, data_embarque",
+    "idx_transportes_estado_busca": "estado_busca, data_embarque",
+    "idx_transportes_status_busca": "status_busca",
+}
+INDICES_SEM_USO = ("idx_transportes_cidade_embarque", "idx_transportes_estado_embarque")
+
+def texto_busca(valor) -> str:
+    """Valor como fica na coluna de busca ('São  Paulo' -> 'sao paulo')"""
+    return None if valor is None else normalizar_cabecalho(valor)
+
+def _criar_colunas_busca(cursor):
+    existentes = {linha[1] for linha in cursor.execute("PRAGMA table_info(transportes)")}
+    for coluna, busca in COLUNAS_BUSCA.items():
+        if busca not in existentes:
+            cursor.execute(f"ALTER TABLE transportes ADD COLUMN {busca} TEXT")
+        # Um UPDATE por grafia distinta (cidades, estados e status são poucos)
+        distintos = [valor for (valor,) in cursor.execute(
+            f"SELECT DISTINCT {coluna} FROM transportes WHERE {coluna} IS NOT NULL"
+        ).fetchall()]
+        cursor.executemany(f"UPDATE transportes SET {busca} = ? WHERE {coluna} = ?",
+                           [(texto_busca(valor), valor) for valor in distintos])
+    for indice, colunas in INDICES_BUSCA.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {indice} ON transportes ({colunas})")
+    for indice in INDICES_SEM_USO:
+        cursor.execute(f"DROP INDEX IF EXISTS {indice}")
+    cursor.execute("ANALYZE transportes")
+
+# (versão, descrição, passo). Nunca alterar um passo já publicado: acrescentar outro.
+MIGRACOES: List[Tuple[int, str, Callable]] = [
+    (1, "esquema único de transportes", _unificar_transportes),
+    (2, "índices secundários de transportes", _indexar_transportes),
+    (3, "índices das consultas paginadas", _indexar_consultas),
+    (4, "analises_planilhas sem UNIQUE em nome_arquivo", _liberar_nome_arquivo),
+    (5, "lt e chassis de transportes como texto sem '.0'", _normalizar_lt_chassis),
+    (6, "colunas de busca sem acento e caixa", _criar_colunas_busca),
+]
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+_migrados = set()
+
+def migrar(db_path: str) -> int:
+    """
+    Aplica ao banco as migrações que faltam (cada uma na sua transação,
+    registrando a versão em PRAGMA user_version). Devolve a versão final.
+    """
+    chave = (os.getpid(), os.path.abspath(db_path))
+    if chave in _migrados:
+        return VERSAO_ATUAL
+
+    with conexao_escrita(db_path) as conn:
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for numero, descricao, passo in MIGRACOES:
+        if numero <= versao:
+            continue
+        with conexao_escrita(db_path) as conn:
+            # BEGIN explícito: o sqlite3 não abre transação sozinho antes de DDL
+            conn.execute("BEGIN")
+            passo(conn.cursor())
+            # PRAGMA não aceita parâmetro; numero vem de MIGRACOES
+            conn.execute(f"PRAGMA user_version = {numero}")
+        logger.info(f"🧱 Migração {numero} aplicada em {db_path}: {descricao}")
+        versao = numero
+
+    _migrados.add(chave)
+    return versao
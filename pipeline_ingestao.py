@@ -0,0 +1,239 @@
+# pipeline_ingestao.py - PIPELINE ÚNICO DE INGESTÃO DE PLANILHAS
+import pandas as pd
+import logging
+import os
+from typing import Callable, Dict, List, Any
+
+from leitor_planilhas import ler_planilha, calcular_hash_arquivo, como_texto, COLUNA_ABA
+from planilha_analyzer import PlanilhaAnalyzer
+from excel_processor import CABECALHOS_TRANSPORTE
+from database_manager import salvar_analise_planilha, obter_analise, obter_analise_por_hash, obter_versao_anterior
+from cache_planilhas import CachePlanilhas
+from conversao_datas import para_iso
+from referencia_destinos import obter_referencia
+from delta_planilhas import INALTERADA, comparar_versoes, impressoes_linhas, linhas_para_revalidar, sobreposicao_chaves
+from agregados_envio import agregar_envio
+from settings import CONFIG
+
+logger = logging.getLogger('GAYA_PIPELINE')
+
+_analyzer = None
+_cache = None
+
+def _obter_analyzer() -> PlanilhaAnalyzer:
+    """Reaproveita um único analyzer (mapeamento e verificações) por processo"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = PlanilhaAnalyzer()
+    return _analyzer
+
+def _obter_cache() -> CachePlanilhas:
+    """Cache em disco das planilhas já lidas (um por processo)"""
+    global _cache
+    if _cache is None:
+        _cache = CachePlanilhas()
+    return _cache
+
+def ingerir_planilha(file_path: str, nome_arquivo: str = None, db_path: str = None,
+                     gaya_db=None, progresso: Callable[[str], None] = None,
+                     regras: List[str] = None, revisao: bool = None) -> Dict[str, Any]:
+    """
+    Lê a planilha uma vez, mapeia as colunas uma vez e distribui o mesmo
+    frame para as etapas de análise, persistência e resumo.
+
+    - db_path: cruza o envio com os transportes já salvos (conflitos
+      históricos) e salva a análise completa via database_manager. Se um
+      arquivo com o mesmo conteúdo já foi analisado (antes ou por um envio
+      simultâneo), a análise salva é devolvida sem gravar nada
+      (duplicado=True). Se
+      for uma nova versão de um arquivo já salvo (mesmo nome e pelo menos
+      SOBREPOSICAO_MINIMA_REVISAO dos pares (lt, chassis) em comum), só as
+      linhas inseridas/alteradas são revalidadas e regravadas, e o
+      resultado traz o delta em analise["delta"]
+    - gaya_db: salva os transportes básicos numa GayaDatabase. Um arquivo
+      de mesmo conteúdo já gravado nela também volta como duplicado (sem
+      db_path, com analise=None)
+    - progresso: chamado com uma descrição curta a cada etapa iniciada
+    - regras: verificações de consistência a rodar neste envio (padrão:
+      todas as de regras_consistencia.REGRAS)
+    - revisao: True trata o envio como nova versão do último arquivo com
+      o mesmo nome, False como envio novo; None decide pela sobreposição
+    """
+    analyzer = _obter_analyzer()
+    nome_arquivo = nome_arquivo or os.path.basename(file_path)
+    avisar = progresso or (lambda etapa: None)
+
+    try:
+        # 0. Reenvio do mesmo arquivo? Devolve a análise já salva
+        hash_arquivo = calcular_hash_arquivo(file_path)
+        if db_path:
+            analise_salva = obter_analise_por_hash(hash_arquivo, db_path)
+            if analise_salva:
+                logger.info(f"♻️ Arquivo já analisado ({analise_salva['planilha_metadata']['nome_arquivo']}), reaproveitando análise")
+                return _resposta_duplicada(analise_salva)
+        elif gaya_db is not None and gaya_db.arquivo_recebido(hash_arquivo):
+            logger.info(f"♻️ Arquivo já gravado na base ({nome_arquivo}), nada a fazer")
+            return _resposta_duplicada(None)
+
+        # 1. Leitura única (o cache evita reabrir arquivos já lidos)
+        avisar("📖 Lendo planilha...")
+        cache = _obter_cache()
+        df = cache.carregar(hash_arquivo)
+        if df is None:
+            df = ler_planilha(file_path)
+            cache.salvar(hash_arquivo, df)
+
+        # 2. Mapeamento único (layout desconhecido é recusado antes da análise)
+        avisar("🗺️ Mapeando colunas...")
+        layout = analyzer.mapeador.mapear(df.columns)
+        if not layout["valido"]:
+            raise ValueError(
+                f"Layout de planilha desconhecido: colunas obrigatórias ausentes {layout['campos_faltantes']}"
+            )
+        frame = analyzer._estruturar_frame(df)
+        del df
+
+        # 3. Análise (nova versão de arquivo conhecido: só o que mudou)
+        avisar("🔍 Verificando consistência e acessórios...")
+        impressoes = impressoes_linhas(frame) if db_path else None
+        # Carregada (e semeada, na primeira vez) aqui: as regras só leem a referência
+        referencia = obter_referencia(db_path) if db_path else None
+        anterior = obter_versao_anterior(nome_arquivo, db_path) if db_path and revisao is not False else None
+        if anterior and revisao is None:
+            sobreposicao = sobreposicao_chaves(impressoes, anterior["impressoes"])
+            if sobreposicao < CONFIG["SOBREPOSICAO_MINIMA_REVISAO"]:
+                logger.info(f"🆕 {nome_arquivo}: só {sobreposicao:.0%} dos pares em comum com a análise "
+                            f"{anterior['id']}, tratando como envio novo")
+                anterior = None
+        versao = None
+        if anterior:
+            comparacao = comparar_versoes(impressoes, anterior["impressoes"])
+            revalidar = linhas_para_revalidar(frame, comparacao["situacao"])
+            analise_anterior = obter_analise(anterior["id"], db_path) or {}
+            resultado_analise = analyzer.analisar_revisao(
+                frame, nome_arquivo, revalidar, regras, db_path, anterior["id"],
+                (analise_anterior.get("analise_consistencia") or {}).get("inconsistencias", []),
+                referencia
+            )
+            resultado_analise["delta"] = {
+                "versao_anterior": {k: anterior[k] for k in ("id", "nome_arquivo", "data_processamento")},
+                **comparacao["resumo"],
+                "revalidadas": int(revalidar.sum())
+            }
+            versao = _versao_para_gravar(impressoes, comparacao, anterior["id"])
+        else:
+            resultado_analise = analyzer.analisar_frame_estruturado(frame, nome_arquivo, regras, db_path, referencia)
+        resultado_analise["planilha_metadata"]["hash_arquivo"] = hash_arquivo
+
+        # 4. Persistência
+        avisar("💾 Salvando no banco...")
+        salvou_analise = None
+        if db_path:
+            agregados = agregar_envio(frame, resultado_analise)
+            salvou_analise = salvar_analise_planilha(resultado_analise, db_path, impressoes, versao, agregados)
+            if salvou_analise is None:
+                # Outro envio com o mesmo conteúdo salvou primeiro
+                return _resposta_duplicada(obter_analise_por_hash(hash_arquivo, db_path) or resultado_analise)
+            if salvou_analise:
+                # Destinos novos entram na referência (validação dos próximos envios)
+                referencia.aprender(referencia.destinos_do_frame(frame))
+
+        transportes = transportes_do_frame(frame, analyzer.mapeamento_campos)
+        transportes_salvos = 0
+        if gaya_db is not None:
+            salvos = gaya_db.salvar_transportes(transportes, hash_arquivo=hash_arquivo, nome_arquivo=nome_arquivo)
+            if salvos["duplicado"] and not db_path:
+                # Outro envio com o mesmo conteúdo gravou primeiro
+                return _resposta_duplicada(None)
+            transportes_salvos = salvos["inseridos"]
+
+        # 5. Resumo
+        avisar("📋 Preparando resumo...")
+        resumo = resumir_frame(frame)
+
+        logger.info(f"✅ Ingestão concluída: {nome_arquivo} ({len(frame)} registros)")
+        return {
+            "analise": resultado_analise,
+            "duplicado": False,
+            "salvou_analise": salvou_analise,
+            "transportes": transportes,
+            "transportes_salvos": transportes_salvos,
+            "resumo": resumo
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Erro na ingestão da planilha: {e}")
+        return {
+            "analise": analyzer._criar_resposta_erro(f"Erro na análise: {str(e)}"),
+            "duplicado": False,
+            "salvou_analise": False,
+            "transportes": [],
+            "transportes_salvos": 0,
+            "resumo": {}
+        }
+
+def _resposta_duplicada(analise: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado de um envio cujo conteúdo já estava salvo (nada foi gravado)"""
+    return {
+        "analise": analise,
+        "duplicado": True,
+        "salvou_analise": False,
+        "transportes": [],
+        "transportes_salvos": 0,
+        "resumo": {}
+    }
+
+def _versao_para_gravar(impressoes: pd.DataFrame, comparacao: Dict[str, Any], analise_anterior_id: int) -> Dict[str, Any]:
+    """
+    Chaves (lt, chassis) que mudaram e as linhas novas que precisam ser
+    gravadas. Chaves removidas só saem se o LT delas está no novo envio: um
+    LT que não veio nesta versão é outro embarque e fica na análise anterior.
+    """
+    mudadas = comparacao["situacao"] != INALTERADA
+    chaves = set(zip(impressoes.loc[mudadas, 'lt'], impressoes.loc[mudadas, 'chassis']))
+    lts_envio = set(impressoes['lt'].dropna())
+    chaves.update((lt, chassis) for lt, chassis in zip(comparacao["removidas"]['lt'], comparacao["removidas"]['chassis'])
+                  if lt in lts_envio)
+
+    # Toda linha com chave substituída é regravada (inclusive repetições inalteradas)
+    posicoes = [posicao for posicao, chave in enumerate(zip(impressoes['lt'], impressoes['chassis'])) if chave in chaves]
+    return {
+        "analise_anterior_id": analise_anterior_id,
+        "chaves_substituidas": [(lt, chassis) for lt, chassis in chaves],
+        "posicoes_gravar": posicoes,
+        "lts_envio": list(lts_envio)
+    }
+
+def transportes_do_frame(frame: pd.DataFrame, mapeamento_campos: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Projeta o frame estruturado no formato básico da GayaDatabase"""
+    colunas = {}
+    for campo, coluna_planilha in CABECALHOS_TRANSPORTE.items():
+        campo_estruturado = mapeamento_campos[coluna_planilha]
+        if campo == 'planned_ship_date' and 'embarque_em' in frame.columns:
+            # Data + hora de embarque já tipadas pelo analyzer
+            colunas[campo] = para_iso(frame['embarque_em']).fillna('')
+        elif campo_estruturado in frame.columns:
+            valores = frame[campo_estruturado].map(como_texto)
+            colunas[campo] = valores if campo == 'planned_ship_date' else valores.str.strip()
+        else:
+            colunas[campo] = pd.Series('', index=frame.index)
+
+    if COLUNA_ABA in frame.columns:
+        colunas['sheet_name'] = frame[COLUNA_ABA]
+
+    projetado = pd.DataFrame(colunas)
+    validos = projetado[(projetado['load_number'] != '') | (projetado['chassis'] != '')]
+    return validos.to_dict('records')
+
+def resumir_frame(frame: pd.DataFrame, limite: int = 5) -> Dict[str, Any]:
+    """Resumo rápido (clientes e veículos principais) direto do frame"""
+    def principais(campo):
+        if campo not in frame.columns:
+            return []
+        return frame[campo].dropna().astype(str).value_counts().head(limite).index.tolist()
+
+    return {
+        "total_registros": len(frame),
+        "clientes_principais": principais('nome_destino'),
+        "veiculos_principais": principais('codigo_veiculo')
+    }
@@ -1,18 +1,38 @@
 # planilha_analyzer.py
 import pandas as pd
+import numpy as np
 import logging
 import json
 from typing import Dict, List, Any, Tuple
 from datetime import datetime
-import re
+
+from leitor_planilhas import ler_planilha, como_texto, COLUNA_ABA, COLUNA_LINHA
+from cache_planilhas import CachePlanilhas
+from mapeamento_colunas import MapeadorColunas
+from conversao_datas import combinar_data_hora, para_iso
+from regras_consistencia import REGRAS, REGRAS_POR_LINHA, ContextoRegras, executar_regras, preenchidos
+from classificador_acessorios import ClassificadorAcessorios, PADROES_ACESSORIOS
+from referencia_destinos import ReferenciaDestinos, obter_referencia
 
 logger = logging.getLogger('GAYA_ANALYZER')
 
+# Campo tipado (datetime64) -> (campo de data, campo de hora) que o compõem
+CAMPOS_DATA_HORA = {
+    'embarque_em': ('data_embarque_planejada', 'hora_embarque_planejada'),
+    'entrega_em': ('data_entrega', 'hora_entrega')
+}
+
 class PlanilhaAnalyzer:
     def __init__(self, db_manager=None):
         self.db_manager = db_manager
         self.mapeamento_campos = self._definir_mapeamento()
+        self.mapeador = MapeadorColunas(
+            # Aceita o cabeçalho JD (com variações de acento/caixa/espaço) e o nome interno
+            {campo: [coluna, campo] for coluna, campo in self.mapeamento_campos.items()},
+            obrigatorios=['lt', 'chassis']
+        )
         self.verificacoes_criticas = self._definir_verificacoes()
+        self.classificador_acessorios = ClassificadorAcessorios(PADROES_ACESSORIOS)
     
     def _definir_mapeamento(self) -> Dict[str, str]:
         """Define o mapeamento completo dos campos da planilha"""
@@ -60,6 +80,11 @@ class PlanilhaAnalyzer:
                 "criticidade": "ALTA",
                 "acao": "Bloquear importação até correção"
             },
+            "chassis_lt_historico": {
+                "descricao": "Chassis já enviado em outro LT num envio anterior",
+                "criticidade": "ALTA",
+                "acao": "Conferir com o envio anterior"
+            },
             "lt_chassis_duplicado": {
                 "descricao": "Mesmo LT tem chassis duplicados no mesmo envio",
                 "criticidade": "ALTA", 
@@ -87,41 +112,129 @@ class PlanilhaAnalyzer:
             }
         }
     
-    def analisar_planilha(self, file_path: str) -> Dict[str, Any]:
+    def analisar_planilha(self, file_path: str, regras: List[str] = None) -> Dict[str, Any]:
         """
         Analisa a planilha de forma inteligente e retorna JSON estruturado
-        com verificações de consistência
+        com verificações de consistência (`regras`: quais rodar, padrão todas)
         """
         try:
             logger.info(f"🔍 Iniciando análise inteligente da planilha: {file_path}")
             
             # 1. Ler dados brutos da planilha
             dados_brutos = self._ler_planilha(file_path)
-            if not dados_brutos:
+            if dados_brutos is None:
                 return self._criar_resposta_erro("Erro ao ler planilha")
             
-            # 2. Mapear e estruturar os dados
-            dados_estruturados = self._estruturar_dados(dados_brutos)
-            
-            # 3. Realizar verificações de consistência
-            analise_consistencia = self._verificar_consistencia(dados_estruturados)
-            
-            # 4. Analisar acessórios críticos
-            analise_acessorios = self._analisar_acessorios(dados_estruturados)
-            
-            # 5. Preparar resposta final
-            return self._preparar_resposta_final(
-                file_path, dados_estruturados, analise_consistencia, analise_acessorios
-            )
+            # 2-5. Mapear, verificar e preparar a resposta
+            return self.analisar_dataframe(dados_brutos, file_path.split('/')[-1], regras)
             
         except Exception as e:
             logger.error(f"Erro na análise da planilha: {str(e)}")
             return self._criar_resposta_erro(f"Erro na análise: {str(e)}")
     
+    def reanalisar_do_cache(self, hash_arquivo: str, nome_arquivo: str = None,
+                            cache: CachePlanilhas = None, regras: List[str] = None) -> Dict[str, Any]:
+        """
+        Reaplica o mapeamento, as verificações e a análise de acessórios
+        sobre uma planilha já enviada, lida do cache (sem abrir o Excel)
+        """
+        try:
+            df = (cache or CachePlanilhas()).carregar(hash_arquivo)
+            if df is None:
+                return self._criar_resposta_erro(f"Planilha {hash_arquivo} não está no cache")
+
+            logger.info(f"♻️ Reanalisando planilha do cache: {hash_arquivo}")
+            resultado = self.analisar_dataframe(df, nome_arquivo or hash_arquivo, regras)
+            resultado["planilha_metadata"]["hash_arquivo"] = hash_arquivo
+            return resultado
+
+        except Exception as e:
+            logger.error(f"Erro na reanálise da planilha: {str(e)}")
+            return self._criar_resposta_erro(f"Erro na análise: {str(e)}")
+
+    def analisar_dataframe(self, df: pd.DataFrame, nome_arquivo: str, regras: List[str] = None,
+                           db_path: str = None) -> Dict[str, Any]:
+        """Analisa um DataFrame já lido (sem reabrir o arquivo)"""
+        referencia = obter_referencia(db_path) if db_path else None
+        return self.analisar_frame_estruturado(self._estruturar_frame(df), nome_arquivo, regras, db_path,
+                                               referencia)
+    
+    def analisar_frame_estruturado(self, frame: pd.DataFrame, nome_arquivo: str,
+                                   regras: List[str] = None, db_path: str = None,
+                                   referencia_destinos: ReferenciaDestinos = None) -> Dict[str, Any]:
+        """
+        Analisa um frame já mapeado por _estruturar_frame (`db_path`: histórico
+        p/ conflitos entre envios; `referencia_destinos`: destinos conhecidos)
+        """
+        # 2. Estruturar os registros
+        dados_estruturados = self._registros(frame)
+        
+        # 3. Realizar verificações de consistência
+        analise_consistencia = self._verificar_consistencia(dados_estruturados, frame, regras, db_path,
+                                                            referencia_destinos=referencia_destinos)
+        
+        # 4. Analisar acessórios críticos
+        analise_acessorios = self._analisar_acessorios(dados_estruturados, frame)
+        
+        # 5. Preparar resposta final
+        return self._preparar_resposta_final(
+            nome_arquivo, dados_estruturados, analise_consistencia, analise_acessorios
+        )
+    
+    def analisar_revisao(self, frame: pd.DataFrame, nome_arquivo: str, revalidar: pd.Series,
+                         regras: List[str] = None, db_path: str = None,
+                         analise_anterior_id: int = None,
+                         inconsistencias_anteriores: List[Dict] = None,
+                         referencia_destinos: ReferenciaDestinos = None) -> Dict[str, Any]:
+        """
+        Analisa uma nova versão de uma planilha já conhecida: os registros e
+        os acessórios saem completos e as regras de grupo rodam sobre o
+        frame inteiro. As regras por linha só rodam nas linhas marcadas em
+        `revalidar`; para as demais, os achados da versão anterior
+        (`inconsistencias_anteriores`) são mantidos.
+        """
+        dados_estruturados = self._registros(frame)
+        selecionadas = list(REGRAS) if regras is None else list(regras)
+        por_linha = [nome for nome in selecionadas if nome in REGRAS_POR_LINHA]
+        anteriores = [inconsistencia for inconsistencia in inconsistencias_anteriores or []
+                      if inconsistencia.get("tipo") in por_linha]
+        if any("chave" not in inconsistencia for inconsistencia in anteriores):
+            # Análise salva antes dos achados trazerem a chave: revalida tudo
+            revalidar = pd.Series(True, index=frame.index)
+            anteriores = []
+
+        analise_consistencia = self._verificar_consistencia(
+            dados_estruturados, frame, [nome for nome in selecionadas if nome not in por_linha],
+            db_path, analise_anterior_id, referencia_destinos
+        )
+        # Regras por linha direto no registro: a ordem de carregamento já foi verificada acima
+        contexto_revalidado = ContextoRegras(frame[revalidar.to_numpy()], self.verificacoes_criticas,
+                                             self.classificador_acessorios, db_path, analise_anterior_id)
+        revalidados, estatisticas = executar_regras(contexto_revalidado, por_linha)
+
+        # Achados por linha das chaves que não mudaram vêm da versão anterior
+        contexto = ContextoRegras(frame, self.verificacoes_criticas)
+        chaves = pd.Series(list(zip(contexto.coluna('lt').map(como_texto),
+                                    contexto.coluna('chassis').map(como_texto))), index=frame.index, dtype=object)
+        mantidas = set(chaves[~revalidar]) - set(chaves[revalidar])
+        mantidos = [inconsistencia for inconsistencia in anteriores
+                    if tuple(inconsistencia["chave"]) in mantidas]
+
+        inconsistencias = analise_consistencia["inconsistencias"] + revalidados + mantidos
+        analise_consistencia["inconsistencias"] = inconsistencias
+        analise_consistencia["inconsistencias_detectadas"] = len(inconsistencias)
+        analise_consistencia["regras_executadas"].update(estatisticas)
+
+        analise_acessorios = self._analisar_acessorios(dados_estruturados, frame)
+
+        return self._preparar_resposta_final(
+            nome_arquivo, dados_estruturados, analise_consistencia, analise_acessorios
+        )
+    
     def _ler_planilha(self, file_path: str) -> pd.DataFrame:
         """Lê a planilha Excel e retorna DataFrame"""
         try:
-            df = pd.read_excel(file_path)
+            df = ler_planilha(file_path)
             logger.info(f"📊 Planilha lida: {len(df)} registros, {len(df.columns)} colunas")
             return df
         except Exception as e:
@@ -129,128 +242,149 @@ class PlanilhaAnalyzer:
             return None
     
     def _estruturar_dados(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Estrutura os dados conforme mapeamento"""
-        dados_estruturados = []
-        
-        for index, row in df.iterrows():
-            registro = {}
-            
-            # Mapear cada campo
-            for coluna_original, campo_mapeado in self.mapeamento_campos.items():
-                if coluna_original in row:
-                    valor = row[coluna_original]
-                    
-                    # Tratamento específico para alguns campos
-                    if pd.isna(valor):
-                        valor = None
-                    elif campo_mapeado in ['acessorios', 'instrucoes_especiais']:
-                        valor = str(valor) if valor else ""
-                    
-                    registro[campo_mapeado] = valor
-            
-            # Adicionar metadados
-            registro['_linha_planilha'] = index + 2  # +2 porque Excel começa na 1 e header na 1
-            registro['_processado_em'] = datetime.now().isoformat()
-            
-            dados_estruturados.append(registro)
+        """Estrutura os dados conforme mapeamento (coluna a coluna, sem iterrows)"""
+        dados_estruturados = self._registros(self._estruturar_frame(df))
         
         logger.info(f"✅ Dados estruturados: {len(dados_estruturados)} registros")
         return dados_estruturados
     
-    def _verificar_consistencia(self, dados: List[Dict]) -> Dict[str, Any]:
-        """Realiza verificações críticas de consistência nos dados"""
-        inconsistências = []
-        alertas = []
-        
-        # Agrupar por LT e Chassis para verificações
-        lt_chassis_map = {}
-        chassis_lt_map = {}
-        
-        for registro in dados:
-            lt = registro.get('lt')
-            chassis = registro.get('chassis')
-            
-            if lt and chassis:
-                # Verificar se chassis aparece em múltiplos LTs
-                if chassis in chassis_lt_map and chassis_lt_map[chassis] != lt:
-                    inconsistências.append({
-                        "tipo": "chassis_lt_incompativel",
-                        "descricao": f"Chassis {chassis} aparece no LT {chassis_lt_map[chassis]} e no LT {lt}",
-                        "criticidade": "ALTA",
-                        "registros_afetados": [chassis_lt_map[chassis], lt]
-                    })
-                else:
-                    chassis_lt_map[chassis] = lt
-                
-                # Verificar se LT tem chassis duplicados
-                if lt in lt_chassis_map:
-                    if chassis in lt_chassis_map[lt]:
-                        inconsistências.append({
-                            "tipo": "lt_chassis_duplicado", 
-                            "descricao": f"LT {lt} tem chassis {chassis} duplicado",
-                            "criticidade": "ALTA",
-                            "registros_afetados": [lt]
-                        })
-                    else:
-                        lt_chassis_map[lt].append(chassis)
-                else:
-                    lt_chassis_map[lt] = [chassis]
-            
-            # Verificar ordem de carregamento
-            ordem = registro.get('ordem_carregamento')
-            if ordem and not isinstance(ordem, (int, float)):
-                try:
-                    registro['ordem_carregamento'] = int(ordem)
-                except:
-                    alertas.append(f"Ordem de carregamento inválida: {ordem}")
+    def _estruturar_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Mapeia as colunas e normaliza os valores, devolvendo um DataFrame"""
+        # Renomear de uma vez só as colunas conhecidas, na ordem do mapeamento
+        mapeamento = self.mapeador.mapear(df.columns)["mapeamento"]
+        estruturado = df[list(mapeamento)].rename(columns=mapeamento).astype(object)
+
+        # NaN/NaT viram None em todas as colunas
+        estruturado = estruturado.where(estruturado.notna(), None)
+
+        # Campos de texto livre: valores "falsy" viram "" e o resto vira str
+        for campo in ['acessorios', 'instrucoes_especiais']:
+            if campo in estruturado.columns:
+                valores = estruturado[campo]
+                preenchidos = valores.notna()
+                verdadeiros = preenchidos & valores.astype(bool)
+                valores = valores.copy()
+                valores[preenchidos & ~verdadeiros] = ""
+                valores[verdadeiros] = valores[verdadeiros].astype(str)
+                estruturado[campo] = valores
+
+        # Datas e horas combinadas em colunas tipadas, de uma vez por coluna
+        for campo, (campo_data, campo_hora) in CAMPOS_DATA_HORA.items():
+            if campo_data in estruturado.columns:
+                estruturado[campo] = combinar_data_hora(estruturado[campo_data], estruturado.get(campo_hora))
+
+        # Adicionar metadados (leituras com várias abas já trazem aba e linha)
+        if COLUNA_ABA in df.columns:
+            estruturado[COLUNA_ABA] = df[COLUNA_ABA]
+        if COLUNA_LINHA in df.columns:
+            estruturado[COLUNA_LINHA] = df[COLUNA_LINHA]
+        else:
+            estruturado[COLUNA_LINHA] = df.index + 2  # +2 porque Excel começa na 1 e header na 1
+        estruturado['_processado_em'] = datetime.now().isoformat()
+        return estruturado
+    
+    def _registros(self, frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Emite os registros de uma vez (colunas já são object, sem reboxing)"""
+        campos = list(frame.columns)
+        colunas = [
+            # Datas tipadas saem como texto ISO (ordenável e serializável)
+            para_iso(frame[campo]).tolist() if pd.api.types.is_datetime64_any_dtype(frame[campo])
+            else frame[campo].tolist()
+            for campo in campos
+        ]
+        return [dict(zip(campos, valores)) for valores in zip(*colunas)]
+    
+    def _verificar_consistencia(self, dados: List[Dict], frame: pd.DataFrame = None,
+                                regras: List[str] = None, db_path: str = None,
+                                ignorar_analise_id: int = None,
+                                referencia_destinos: ReferenciaDestinos = None) -> Dict[str, Any]:
+        """Realiza verificações críticas de consistência nos dados
+
+        `frame` é o DataFrame estruturado dos mesmos dados, quando o chamador
+        já o tem; senão é montado a partir dos registros. As regras do
+        registro (regras_consistencia.REGRAS) rodam numa única passada;
+        `regras` escolhe quais rodar neste envio (padrão: todas). Com
+        `db_path`, o envio também é cruzado com os transportes já salvos
+        (menos os da análise `ignorar_analise_id`); com `referencia_destinos`,
+        os destinos são comparados com os já conhecidos.
+        """
+        if frame is None:
+            frame = pd.DataFrame(dados)
+
+        alertas = self._verificar_ordem_carregamento(dados, frame)
+
+        contexto = ContextoRegras(frame, self.verificacoes_criticas, self.classificador_acessorios,
+                                  db_path, ignorar_analise_id, referencia_destinos)
+        inconsistências, estatisticas = executar_regras(contexto, regras)
         
         return {
             "inconsistencias_detectadas": len(inconsistências),
             "inconsistencias": inconsistências,
             "alertas": alertas,
             "total_registros_verificados": len(dados),
-            "lts_unicos": len(lt_chassis_map),
-            "chassis_unicos": len(chassis_lt_map)
+            "lts_unicos": int(contexto.pares['lt'].nunique()),
+            "chassis_unicos": int(contexto.pares['chassis'].nunique()),
+            "regras_executadas": estatisticas
         }
+
+    def _verificar_ordem_carregamento(self, dados: List[Dict], frame: pd.DataFrame) -> List[str]:
+        """Converte para int as ordens de carregamento em texto; as inválidas viram alerta"""
+        if 'ordem_carregamento' not in frame.columns:
+            return []
+
+        valores = frame['ordem_carregamento']
+        lista = valores.tolist()
+        numericos = np.fromiter((isinstance(valor, (int, float)) for valor in lista),
+                                dtype=bool, count=len(lista))
+        alertas = []
+        # Só as linhas com texto passam pelo laço em Python
+        for posicao in (preenchidos(valores) & ~numericos).to_numpy().nonzero()[0]:
+            ordem = lista[posicao]
+            try:
+                dados[posicao]['ordem_carregamento'] = int(ordem)
+            except (TypeError, ValueError):
+                alertas.append(f"Ordem de carregamento inválida: {ordem}")
+        return alertas
     
-    def _analisar_acessorios(self, dados: List[Dict]) -> Dict[str, Any]:
-        """Analisa os acessórios críticos (GABINA DUAL, DUALF ARR, BALAO, etc.)"""
-        acessorios_identificados = set()
-        registros_com_acessorios = 0
+    def _analisar_acessorios(self, dados: List[Dict], frame: pd.DataFrame = None) -> Dict[str, Any]:
+        """Analisa os acessórios críticos (GABINA DUAL, DUALF ARR, BALAO, etc.)
+
+        Cada texto distinto de acessórios é classificado uma vez só e o
+        resultado é repassado a todas as linhas que têm aquele texto.
+        """
+        if frame is None:
+            frame = pd.DataFrame(dados)
+        if 'acessorios' not in frame.columns or frame.empty:
+            return {
+                "acessorios_identificados": [],
+                "registros_com_acessorios": 0,
+                "total_registros": len(dados),
+                "detalhes_acessorios": []
+            }
+
+        valores = frame['acessorios']
+        com_texto = (preenchidos(valores) & (valores.astype(str).str.strip() != '')).to_numpy()
+        classificados = self.classificador_acessorios.classificar_coluna(valores[com_texto])
+
+        acessorios_identificados = []
         acessorios_por_registro = []
-        
-        padroes_acessorios = {
-            'GABINA DUAL': r'gabina.*dual|dual.*gabina',
-            'DUALF ARR': r'dualf.*arr|arr.*dualf', 
-            'BALAO': r'balao',
-            'PNEU ARROZEIRO': r'arrozeiro|arr',
-            'GABINA SIMPLES': r'gabina',
-            'LARGURA': r'\d+mm',
-            'COMPRIMENTO': r'\d+\.?\d*[ml]'
-        }
-        
-        for registro in dados:
-            acessorios = registro.get('acessorios', '')
-            if acessorios and str(acessorios).strip():
-                registros_com_acessorios += 1
-                acessorios_registro = {}
-                
-                for tipo, padrao in padroes_acessorios.items():
-                    if re.search(padrao, str(acessorios), re.IGNORECASE):
-                        acessorios_identificados.add(tipo)
-                        acessorios_registro[tipo] = True
-                
-                if acessorios_registro:
-                    acessorios_por_registro.append({
-                        'chassis': registro.get('chassis'),
-                        'lt': registro.get('lt'),
-                        'acessorios_originais': acessorios,
-                        'acessorios_identificados': list(acessorios_registro.keys())
-                    })
+        for posicao, tipos in zip(com_texto.nonzero()[0].tolist(), classificados):
+            if not tipos:
+                continue
+            for tipo in tipos:
+                if tipo not in acessorios_identificados:
+                    acessorios_identificados.append(tipo)
+            registro = dados[posicao]
+            acessorios_por_registro.append({
+                'chassis': registro.get('chassis'),
+                'lt': registro.get('lt'),
+                'acessorios_originais': registro.get('acessorios'),
+                'acessorios_identificados': list(tipos)
+            })
         
         return {
-            "acessorios_identificados": list(acessorios_identificados),
-            "registros_com_acessorios": registros_com_acessorios,
+            "acessorios_identificados": acessorios_identificados,
+            "registros_com_acessorios": int(com_texto.sum()),
             "total_registros": len(dados),
             "detalhes_acessorios": acessorios_por_registro
         }
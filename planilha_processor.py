@@ -1,94 +1,96 @@
 import pandas as pd
-import sqlite3
 import logging
 import os
 from typing import Dict, Any
 
-def processar_planilha_excel(file_path: str, db_path: str = 'transportes.db') -> Dict[str, Any]:
-    """Processa arquivo Excel e importa para o banco - MÓDULO SEPARADO"""
+from leitor_planilhas import ler_planilha, como_texto
+from mapeamento_colunas import MapeadorColunas
+from conexao_db import conexao_escrita
+from migracoes import migrar, texto_busca
+
+MAPEADOR_PROCESSOR = MapeadorColunas(
+    {
+        'chassis': ['chassis', 'chassi', 'numero_chassis'],
+        'cargo_id': ['cargo_id', 'id_carga', 'carga'],
+        'origem': ['origem', 'cidade_origem', 'de'],
+        'destino': ['destino', 'cidade_destino', 'para'],
+        'status': ['status', 'situacao', 'estado'],
+        'valor_frete': ['valor_frete', 'frete', 'valor', 'preco']
+    },
+    obrigatorios=['chassis', 'cargo_id', 'origem', 'destino']
+)
+
+def processar_planilha_excel(file_path: str, db_path: str = 'transportes.db', df: pd.DataFrame = None) -> Dict[str, Any]:
+    """Processa arquivo Excel e importa para o banco - MÓDULO SEPARADO
+
+    Aceita um DataFrame já lido (df) para não reabrir o arquivo.
+    """
     try:
-        # Ler a planilha
-        df = pd.read_excel(file_path)
+        # Ler a planilha (só se ninguém leu antes)
+        if df is None:
+            df = ler_planilha(file_path)
         logging.info(f"📈 Planilha lida: {len(df)} registros")
         
-        # Mapear colunas
-        mapeamento_colunas = {
-            'chassis': ['chassis', 'chassi', 'numero_chassis'],
-            'cargo_id': ['cargo_id', 'id_carga', 'carga'],
-            'origem': ['origem', 'cidade_origem', 'de'],
-            'destino': ['destino', 'cidade_destino', 'para'],
-            'status': ['status', 'situacao', 'estado'],
-            'valor_frete': ['valor_frete', 'frete', 'valor', 'preco']
-        }
-        
-        # Normalizar nomes das colunas
-        df.columns = [col.lower().strip() for col in df.columns]
-        colunas_mapeadas = {}
-        
-        for coluna_padrao, alternativas in mapeamento_colunas.items():
-            for alt in alternativas:
-                if alt in df.columns:
-                    colunas_mapeadas[coluna_padrao] = alt
-                    break
+        # Mapear colunas (índice pré-calculado, memorizado por layout)
+        resultado_mapeamento = MAPEADOR_PROCESSOR.mapear(df.columns)
+        colunas_mapeadas = {campo: coluna for coluna, campo in resultado_mapeamento["mapeamento"].items()}
         
         # Verificar colunas obrigatórias
-        colunas_obrigatorias = ['chassis', 'cargo_id', 'origem', 'destino']
-        for col in colunas_obrigatorias:
-            if col not in colunas_mapeadas:
-                return {'sucesso': False, 'erro': f'Coluna {col} não encontrada na planilha'}
+        if not resultado_mapeamento["valido"]:
+            col = resultado_mapeamento["campos_faltantes"][0]
+            return {'sucesso': False, 'erro': f'Coluna {col} não encontrada na planilha'}
         
-        # Conectar ao banco
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # Conectar ao banco (tabela no esquema único)
+        migrar(db_path)
+        with conexao_escrita(db_path) as conn:
+            cursor = conn.cursor()
         
-        novos = 0
-        atualizados = 0
-        erros = 0
+            novos = 0
+            atualizados = 0
+            erros = 0
         
-        # Processar cada linha
-        for index, row in df.iterrows():
-            try:
-                # Extrair dados
-                chassis = str(row[colunas_mapeadas['chassis']]).strip()
-                cargo_id = str(row[colunas_mapeadas['cargo_id']]).strip()
-                origem = str(row[colunas_mapeadas['origem']]).strip()
-                destino = str(row[colunas_mapeadas['destino']]).strip()
+            # Processar cada linha
+            for index, row in df.iterrows():
+                try:
+                    # Extrair dados
+                    # Mesmo texto do pipeline: LT/chassis numéricos do Excel sem o '.0'
+                    chassis = como_texto(row[colunas_mapeadas['chassis']]).strip()
+                    cargo_id = como_texto(row[colunas_mapeadas['cargo_id']]).strip()
+                    origem = str(row[colunas_mapeadas['origem']]).strip()
+                    destino = str(row[colunas_mapeadas['destino']]).strip()
                 
-                # Campos opcionais
-                status = str(row[colunas_mapeadas.get('status', 'status')]).strip() if colunas_mapeadas.get('status') in row else 'ativo'
-                valor_frete = float(row[colunas_mapeadas.get('valor_frete', 'valor_frete')]) if colunas_mapeadas.get('valor_frete') in row else 0.0
+                    # Campos opcionais
+                    status = str(row[colunas_mapeadas.get('status', 'status')]).strip() if colunas_mapeadas.get('status') in row else 'ativo'
+                    valor_frete = float(row[colunas_mapeadas.get('valor_frete', 'valor_frete')]) if colunas_mapeadas.get('valor_frete') in row else 0.0
                 
-                # Verificar se já existe
-                cursor.execute("SELECT id FROM transportes WHERE chassis = ?", (chassis,))
-                existe = cursor.fetchone()
+                    # Verificar se já existe
+                    cursor.execute("SELECT id FROM transportes WHERE chassis = ?", (chassis,))
+                    existe = cursor.fetchone()
                 
-                if existe:
-                    # Atualizar
-                    cursor.execute('''
-                        UPDATE transportes 
-                        SET cargo_id=?, origem=?, destino=?, status=?, valor_frete=?
-                        WHERE chassis=?
-                    ''', (cargo_id, origem, destino, status, valor_frete, chassis))
-                    atualizados += 1
-                else:
-                    # Inserir novo
-                    cursor.execute('''
-                        INSERT INTO transportes (chassis, cargo_id, origem, destino, status, valor_frete, data_criacao)
-                        VALUES (?, ?, ?, ?, ?, ?, date('now'))
-                    ''', (chassis, cargo_id, origem, destino, status, valor_frete))
-                    novos += 1
+                    if existe:
+                        # Atualizar
+                        cursor.execute('''
+                            UPDATE transportes 
+                            SET lt=?, origem=?, destino=?, status=?, status_busca=?, valor_frete=?
+                            WHERE chassis=?
+                        ''', (cargo_id, origem, destino, status, texto_busca(status), valor_frete, chassis))
+                        atualizados += 1
+                    else:
+                        # Inserir novo
+                        cursor.execute('''
+                            INSERT INTO transportes (chassis, lt, origem, destino, status, status_busca, valor_frete)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ''', (chassis, cargo_id, origem, destino, status, texto_busca(status), valor_frete))
+                        novos += 1
                     
-            except Exception as e:
-                logging.error(f"Erro na linha {index}: {e}")
-                erros += 1
-        
-        conn.commit()
+                except Exception as e:
+                    logging.error(f"Erro na linha {index}: {e}")
+                    erros += 1
         
-        # Contar total no banco
-        cursor.execute("SELECT COUNT(*) FROM transportes")
-        total_banco = cursor.fetchone()[0]
         
-        conn.close()
+            # Contar total no banco
+            cursor.execute("SELECT COUNT(*) FROM transportes")
+            total_banco = cursor.fetchone()[0]
         
         return {
             'sucesso': True,
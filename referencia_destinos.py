@@ -0,0 +1,99 @@
+# referencia_destinos.py - ÍNDICE EM MEMÓRIA DOS DESTINOS CONHECIDOS
+import logging
+from typing import Dict
+
+import pandas as pd
+
+from database_manager import atualizar_referencia_destinos, carregar_referencia_destinos, semear_referencia_destinos
+from leitor_planilhas import como_texto
+from mapeamento_colunas import normalizar_cabecalho
+
+logger = logging.getLogger('GAYA_DESTINOS')
+
+# Campos do destino guardados na referência, na ordem da tupla
+CAMPOS_DESTINO = ('nome_destino', 'cidade_destino', 'estado_destino')
+
+class ReferenciaDestinos:
+    """
+    Mapa codigo_destino -> (nome, cidade, estado) canônicos, mantido em
+    memória. Na primeira carga a referência vazia é semeada com os
+    transportes já salvos; depois só os códigos gravados por outros
+    processos são lidos (atualizar). Cada envio é validado com um único
+    lookup vetorizado, sem consultar o histórico.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        semear_referencia_destinos(db_path)
+        self.destinos, self.ultimo_rowid = carregar_referencia_destinos(db_path)
+        logger.info(f"📍 Referência de destinos carregada: {len(self.destinos)} códigos")
+
+    def atualizar(self) -> int:
+        """Traz os códigos aprendidos por outros processos desde a última leitura"""
+        novos, self.ultimo_rowid = carregar_referencia_destinos(self.db_path, self.ultimo_rowid)
+        self.destinos.update(novos)
+        return len(novos)
+
+    def destinos_do_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Destinos distintos do envio (código preenchido), com o número de linhas de cada"""
+        if 'codigo_destino' not in frame.columns:
+            return pd.DataFrame(columns=['codigo_destino', *CAMPOS_DESTINO, 'ocorrencias'])
+
+        colunas = ['codigo_destino', *[campo for campo in CAMPOS_DESTINO if campo in frame.columns]]
+        destinos = frame[colunas].reindex(columns=['codigo_destino', *CAMPOS_DESTINO])
+        destinos = destinos[destinos['codigo_destino'].notna() & destinos['codigo_destino'].astype(bool)]
+        destinos = destinos.astype(object).where(destinos.notna(), None)
+        # Mesma conversão da leitura em streaming: 1234.0 do Excel -> '1234'
+        destinos['codigo_destino'] = destinos['codigo_destino'].map(como_texto)
+        # Primeira forma vista de cada código, com o total de linhas dele
+        agrupados = destinos.groupby('codigo_destino', sort=False)
+        resultado = agrupados.first().reset_index()
+        resultado['ocorrencias'] = agrupados.size().to_numpy()
+        return resultado
+
+    def divergencias(self, destinos: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compara os destinos do envio com a referência. Devolve as linhas
+        com código novo ('novo') ou com algum campo diferente do canônico
+        ('campos_divergentes': lista dos campos)
+        """
+        canonicos = destinos['codigo_destino'].map(self.destinos)
+        novos = canonicos.isna().to_numpy()
+
+        campos_divergentes = [[] for _ in range(len(destinos))]
+        for posicao, campo in enumerate(CAMPOS_DESTINO):
+            esperado = canonicos.map(lambda tupla: tupla[posicao] if isinstance(tupla, tuple) else None)
+            recebido = destinos[campo]
+            # Comparação sem acento, caixa e espaços extras; campo vazio não diverge
+            difere = (
+                ~novos & recebido.notna().to_numpy() & esperado.notna().to_numpy()
+                & (recebido.map(normalizar_cabecalho) != esperado.map(normalizar_cabecalho)).to_numpy()
+            )
+            for indice in difere.nonzero()[0]:
+                campos_divergentes[indice].append(campo)
+
+        resultado = destinos.assign(novo=novos, campos_divergentes=campos_divergentes, canonico=canonicos)
+        return resultado[resultado['novo'] | resultado['campos_divergentes'].map(bool)]
+
+    def aprender(self, destinos: pd.DataFrame) -> int:
+        """Grava os destinos do envio no banco e no mapa em memória (códigos novos)"""
+        if destinos.empty:
+            return 0
+        linhas = list(destinos[['codigo_destino', *CAMPOS_DESTINO, 'ocorrencias']].itertuples(index=False, name=None))
+        atualizar_referencia_destinos(linhas, self.db_path)
+        # Relê do banco: a forma canônica é a gravada primeiro, por qualquer processo
+        self.atualizar()
+        return len(linhas)
+
+_referencias: Dict[str, ReferenciaDestinos] = {}
+
+def obter_referencia(db_path: str) -> ReferenciaDestinos:
+    """
+    Uma referência em memória por banco (por processo), posta em dia com
+    o que os outros processos do pool aprenderam (uma busca por rowid)
+    """
+    if db_path not in _referencias:
+        _referencias[db_path] = ReferenciaDestinos(db_path)
+    else:
+        _referencias[db_path].atualizar()
+    return _referencias[db_path]
@@ -0,0 +1,295 @@
+# regras_consistencia.py - REGISTRO DAS REGRAS DE CONSISTÊNCIA DAS PLANILHAS
+import logging
+import time
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from conversao_datas import converter_datas
+from database_manager import buscar_conflitos_historicos
+from leitor_planilhas import como_texto
+from classificador_acessorios import ClassificadorAcessorios
+from referencia_destinos import CAMPOS_DESTINO, ReferenciaDestinos
+
+logger = logging.getLogger('GAYA_REGRAS')
+
+# tipo da inconsistência -> função(contexto) que devolve os achados
+REGRAS: Dict[str, Callable[['ContextoRegras'], List[Dict[str, Any]]]] = {}
+# Regras que olham cada linha sozinha: o achado depende só da linha (lt, chassis) e
+# leva essa chave em "chave". As demais comparam grupos de linhas (LT, chassis,
+# destino, texto de acessório) e só valem rodando sobre o envio inteiro.
+REGRAS_POR_LINHA = set()
+
+def regra(tipo: str, por_linha: bool = False):
+    """Decorador que registra uma regra vetorizada sob o tipo de inconsistência"""
+    def registrar(funcao):
+        REGRAS[tipo] = funcao
+        if por_linha:
+            REGRAS_POR_LINHA.add(tipo)
+        return funcao
+    return registrar
+
+class ContextoRegras:
+    """
+    Frame estruturado + dados auxiliares compartilhados pelas regras. Os
+    intermediários (ex.: pares LT/chassis) são calculados uma vez só, na
+    primeira regra que precisar deles.
+    """
+
+    def __init__(self, frame: pd.DataFrame, verificacoes: Dict[str, Dict],
+                 classificador_acessorios: ClassificadorAcessorios = None, db_path: str = None,
+                 ignorar_analise_id: int = None, referencia_destinos: ReferenciaDestinos = None):
+        self.frame = frame
+        self.verificacoes = verificacoes
+        self.classificador_acessorios = classificador_acessorios
+        # Banco com o histórico de envios (regras históricas só rodam com ele)
+        self.db_path = db_path
+        # Versão anterior do mesmo arquivo, que não conta como histórico
+        self.ignorar_analise_id = ignorar_analise_id
+        # Destinos conhecidos, carregados por quem chama: as regras só leem
+        self.referencia_destinos = referencia_destinos
+
+    def coluna(self, campo: str) -> pd.Series:
+        """Coluna do frame, ou uma coluna vazia quando o layout não a tem"""
+        if campo in self.frame.columns:
+            return self.frame[campo]
+        return pd.Series(None, index=self.frame.index, dtype=object)
+
+    @cached_property
+    def pares(self) -> pd.DataFrame:
+        """Pares (lt, chassis) das linhas que têm os dois campos preenchidos"""
+        pares = pd.DataFrame({'lt': self.coluna('lt'), 'chassis': self.coluna('chassis')})
+        return pares[preenchidos(pares['lt']) & preenchidos(pares['chassis'])]
+
+    def achado(self, tipo: str, descricao: str, registros_afetados: List[Any],
+               chave: Tuple[Any, Any] = None) -> Dict[str, Any]:
+        """
+        Monta uma inconsistência com a criticidade declarada para o tipo.
+        Regras por linha informam a chave (lt, chassis) da linha.
+        """
+        achado = {
+            "tipo": tipo,
+            "descricao": descricao,
+            "criticidade": self.verificacoes.get(tipo, {}).get("criticidade", "MEDIA"),
+            "registros_afetados": registros_afetados
+        }
+        if chave is not None:
+            achado["chave"] = [como_texto(valor) for valor in chave]
+        return achado
+
+def preenchidos(valores: pd.Series) -> pd.Series:
+    """Máscara dos valores "verdadeiros" (nem None/NaN, nem vazio/zero)"""
+    return valores.notna() & valores.astype(bool)
+
+def agrupar(chaves: pd.Series, valores: pd.Series) -> List[Tuple[Any, List[Any]]]:
+    """
+    [(chave, [valores])] por ordenação estável dos códigos: chaves e valores
+    ficam na ordem em que aparecem (groupby.agg(list) é lento demais)
+    """
+    if chaves.empty:
+        return []
+    codigos, unicas = pd.factorize(chaves)
+    ordem = np.argsort(codigos, kind='stable')
+    inicios = np.flatnonzero(np.diff(codigos[ordem])) + 1
+    grupos = np.split(valores.to_numpy()[ordem], inicios)
+    return [(chave, grupo.tolist()) for chave, grupo in zip(unicas.tolist(), grupos)]
+
+def executar_regras(contexto: ContextoRegras, selecionadas: Iterable[str] = None) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    Executa as regras selecionadas (todas, por padrão) numa única passada
+    sobre o frame. Devolve (inconsistências, estatísticas por regra com
+    quantidade de achados e tempo em ms).
+    """
+    nomes = list(REGRAS) if selecionadas is None else list(selecionadas)
+    desconhecidas = [nome for nome in nomes if nome not in REGRAS]
+    if desconhecidas:
+        logger.warning(f"⚠️ Regras desconhecidas ignoradas: {desconhecidas}")
+
+    inconsistencias = []
+    estatisticas = {}
+    for nome in nomes:
+        if nome not in REGRAS:
+            continue
+        inicio = time.perf_counter()
+        achados = REGRAS[nome](contexto)
+        estatisticas[nome] = {
+            "achados": len(achados),
+            "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2)
+        }
+        inconsistencias.extend(achados)
+
+    logger.info(f"🔎 {len(estatisticas)} regra(s) executada(s): {len(inconsistencias)} inconsistência(s)")
+    return inconsistencias, estatisticas
+
+@regra("chassis_lt_incompativel")
+def chassis_em_varios_lts(contexto: ContextoRegras) -> List[Dict[str, Any]]:
+    """Um achado por chassis que aparece em mais de um LT, com todos os LTs"""
+    distintos = contexto.pares.drop_duplicates()
+    conflitos = distintos[distintos['chassis'].duplicated(keep=False)]
+    return [
+        contexto.achado(
+            "chassis_lt_incompativel",
+            f"Chassis {chassis} aparece em {len(lts)} LTs: {', '.join(map(str, lts))}",
+            lts
+        )
+        for chassis, lts in agrupar(conflitos['chassis'], conflitos['lt'])
+    ]
+
+@regra("chassis_lt_historico", por_linha=True)
+def chassis_em_lt_historico(contexto: ContextoRegras) -> List[Dict[str, Any]]:
+    """Um achado por chassis já salvo em outro LT num envio anterior"""
+    if not contexto.db_path or contexto.pares.empty:
+        return []
+
+    # LT como texto no formato da leitura em streaming (1000.0 -> '1000')
+    pares = contexto.pares.drop_duplicates()
+    conflitos = buscar_conflitos_historicos(
+        list(zip(pares['chassis'].map(como_texto).tolist(), pares['lt'].map(como_texto).tolist())),
+        contexto.db_path, contexto.ignorar_analise_id
+    )
+    return [
+        contexto.achado(
+            "chassis_lt_historico",
+            f"Chassis {c['chassis']} (LT {c['lt']}) já foi enviado no LT {c['lt_anterior']} "
+            f"({c['nome_arquivo'] or 'arquivo desconhecido'}, {c['data_processamento']})",
+            [c['lt_anterior'], c['lt']],
+            (c['lt'], c['chassis'])
+        )
+        for c in conflitos
+    ]
+
+@regra("lt_chassis_duplicado")
+def chassis_duplicados_no_lt(contexto: ContextoRegras) -> List[Dict[str, Any]]:
+    """Um achado por (LT, chassis) repetido, com o número de ocorrências"""
+    pares = contexto.pares
+    duplicados = pares[pares.duplicated(keep=False)]
+    if duplicados.empty:
+        return []
+    ocorrencias = duplicados.groupby(['lt', 'chassis'], sort=False).size()
+    return [
+        contexto.achado(
+            "lt_chassis_duplicado",
+            f"LT {lt} tem chassis {chassis} duplicado ({quantidade} ocorrências)",
+            [lt]
+        )
+        for (lt, chassis), quantidade in ocorrencias.items()
+    ]
+
+@regra("destino_inconsistente")
+def destino_inconsistente(contexto: ContextoRegras) -> List[Dict[str, Any]]:
+    """
+    Código de destino com mais de um nome no envio e, com a referência de
+    destinos no contexto, código novo ou com nome/cidade/estado diferente
+    do canônico
+    """
+    destinos = pd.DataFrame({
+        'codigo': contexto.coluna('codigo_destino'),
+        'nome': contexto.coluna('nome_destino')
+    })
+    destinos = destinos[preenchidos(destinos['codigo']) & preenchidos(destinos['nome'])].drop_duplicates()
+    conflitos = destinos[destinos['codigo'].duplicated(keep=False)]
+    achados = [
+        contexto.achado(
+            "destino_inconsistente",
+            f"Destino {codigo} aparece com {len(nomes)} nomes: {', '.join(map(str, nomes))}",
+            [codigo]
+        )
+        for codigo, nomes in agrupar(conflitos['codigo'], conflitos['nome'])
+    ]
+
+    referencia = contexto.referencia_destinos
+    if referencia is None:
+        return achados
+
+    divergencias = referencia.divergencias(referencia.destinos_do_frame(contexto.frame))
+    # Banco sem referência ainda: o primeiro envio só ensina, não acusa códigos novos
+    if not referencia.destinos:
+        divergencias = divergencias[~divergencias['novo']]
+
+    for linha in divergencias.itertuples(index=False):
+        if linha.novo:
+            descricao = f"Destino {linha.codigo_destino} ({linha.nome_destino}) não existe na base histórica"
+        else:
+            esperado = dict(zip(CAMPOS_DESTINO, linha.canonico))
+            diferencas = ', '.join(f"{campo} '{getattr(linha, campo)}' (esperado '{esperado[campo]}')"
+                                   for campo in linha.campos_divergentes)
+            descricao = f"Destino {linha.codigo_destino} difere da base histórica: {diferencas}"
+        achados.append(contexto.achado("destino_inconsistente", descricao, [linha.codigo_destino]))
+    return achados
+
+@regra("data_entrega_anterior_embarque", por_linha=True)
+def entrega_anterior_embarque(contexto: ContextoRegras) -> List[Dict[str, Any]]:
+    """Um achado por linha com entrega antes do embarque (colunas tipadas)"""
+    frame = contexto.frame
+    if 'embarque_em' not in frame.columns or 'entrega_em' not in frame.columns:
+        return []
+
+    embarque = converter_datas(frame['embarque_em'])
+    entrega = converter_datas(frame['entrega_em'])
+    anteriores = (entrega < embarque).to_numpy()
+    if not anteriores.any():
+        return []
+
+    formato = '%d/%m/%Y %H:%M'
+    lts = contexto.coluna('lt')[anteriores].tolist()
+    chassis = contexto.coluna('chassis')[anteriores].tolist()
+    embarques = embarque[anteriores].dt.strftime(formato).tolist()
+    entregas = entrega[anteriores].dt.strftime(formato).tolist()
+    return [
+        contexto.achado(
+            "data_entrega_anterior_embarque",
+            f"Chassis {ch} (LT {lt}): entrega em {en} anterior ao embarque em {em}",
+            [lt, ch],
+            (lt, ch)
+        )
+        for lt, ch, em, en in zip(lts, chassis, embarques, entregas)
+    ]
+
+@regra("ordem_carregamento_invalida")
+def ordem_carregamento_invalida(contexto: ContextoRegras) -> List[Dict[str, Any]]:
+    """Um achado por LT com ordens de carregamento repetidas ou com lacunas"""
+    ordens = pd.DataFrame({
+        'lt': contexto.coluna('lt'),
+        'ordem': pd.to_numeric(contexto.coluna('ordem_carregamento'), errors='coerce')
+    })
+    ordens = ordens[preenchidos(ordens['lt']) & ordens['ordem'].notna()]
+    if ordens.empty:
+        return []
+
+    resumo = ordens.groupby('lt', sort=False)['ordem'].agg(['size', 'nunique', 'min', 'max'])
+    duplicadas = resumo['nunique'] < resumo['size']
+    com_lacunas = (resumo['max'] - resumo['min'] + 1) > resumo['nunique']
+    problemas = resumo[duplicadas | com_lacunas]
+
+    achados = []
+    for lt, duplicada, lacuna in zip(problemas.index.tolist(), duplicadas[problemas.index].tolist(),
+                                     com_lacunas[problemas.index].tolist()):
+        motivos = [motivo for motivo, ocorreu in (("ordens repetidas", duplicada), ("sequência com lacunas", lacuna)) if ocorreu]
+        achados.append(contexto.achado(
+            "ordem_carregamento_invalida",
+            f"LT {lt}: ordem de carregamento com {' e '.join(motivos)}",
+            [lt]
+        ))
+    return achados
+
+@regra("acessorios_criticos_nao_identificados")
+def acessorios_nao_identificados(contexto: ContextoRegras) -> List[Dict[str, Any]]:
+    """Um achado por texto de acessório que não bate com nenhum padrão conhecido"""
+    if contexto.classificador_acessorios is None:
+        return []
+
+    acessorios = contexto.coluna('acessorios')
+    texto = acessorios[preenchidos(acessorios)].astype(str)
+    texto = texto[texto.str.strip() != '']
+    classificados = contexto.classificador_acessorios.classificar_coluna(texto)
+    desconhecidos = texto[[not tipos for tipos in classificados]]
+    return [
+        contexto.achado(
+            "acessorios_criticos_nao_identificados",
+            f"Acessório '{acessorio}' não identificado em {len(chassis)} registro(s)",
+            chassis
+        )
+        for acessorio, chassis in agrupar(desconhecidos, contexto.coluna('chassis')[desconhecidos.index])
+    ]
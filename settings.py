@@ -6,6 +6,20 @@ CONFIG = {
     "PROCESSING_DELAY": 1.0,  # segundos de pausa entre etapas importantes
     "LLM_MODEL": "gpt-4o-mini",  # modelo leve padrão
     "DEBUG_MODE": True,
+    "CACHE_PLANILHAS_DIR": "cache_planilhas",  # planilhas já lidas, por hash do arquivo
+    "CACHE_PLANILHAS_MAX_MB": 512,  # limite do cache (remove as menos usadas)
+    "MAX_ANALISES_SIMULTANEAS": 2,  # processos dedicados à análise de planilhas
+    "SOBREPOSICAO_MINIMA_REVISAO": 0.5,  # fração de (LT, chassis) em comum para tratar o envio como revisão do anterior
+    "SQLITE_CACHE_MB": 32,  # cache de páginas por conexão
+    "SQLITE_MMAP_MB": 256,  # leitura do arquivo do banco via mmap
+    "SQLITE_BUSY_TIMEOUT_MS": 5000,  # espera pelo lock antes de falhar
+    "SQLITE_MAX_LEITORES": 4,  # conexões somente leitura guardadas por banco
+    "MAX_CONSULTAS_SIMULTANEAS": 4,  # threads de banco_async (consultas dos handlers async)
+    "LIMITE_PAGINA_TRANSPORTES": 50,  # registros por página nas consultas de transportes
+    "LIMITE_PAGINA_INCONSISTENCIAS": 200,  # inconsistências lidas por página (listagens e resposta do bot)
+    "LIMITE_MAXIMO_PAGINA": 1000,  # teto de registros por página, mesmo se pedirem mais
+    "LIMITE_MENSAGEM_TELEGRAM": 4096,  # caracteres por mensagem aceitos pelo Telegram
+    "MAX_MENSAGENS_RESPOSTA": 5,  # mensagens enviadas numa resposta longa (o resto vira aviso)
 }
 
 def pause(label="Pausa"):
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+import database_manager as dm
+from codec_blobs import codificar
+from conexao_db import conexao_escrita
+
+
+@pytest.fixture
+def analise_salva(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    with conexao_escrita(db_path) as conn:
+        conn.execute("""
+            INSERT INTO analises_planilhas (nome_arquivo, hash_arquivo, total_registros, acessorios_identificados,
+                                            dados_estruturados, analise_consistencia, analise_acessorios)
+            VALUES ('TRK_TRANS_DTL.xlsx', 'h1', 1, '[]', ?, ?, ?)
+        """, (codificar([{"lt": "1000"}]), codificar({"inconsistencias": []}), codificar({"acessorios_identificados": []})))
+    return lambda: dm.obter_analise(1, db_path)
+
+
+def test_blobs_carregados_por_get_e_in(analise_salva):
+    analise = analise_salva()
+    assert "dados_estruturados" in analise
+    assert analise.get("analise_consistencia") == {"inconsistencias": []}
+    assert analise.get("inexistente", "padrao") == "padrao"
+
+
+def test_blobs_carregados_ao_percorrer(analise_salva):
+    assert dict(analise_salva().items())["dados_estruturados"] == [{"lt": "1000"}]
+    assert {**analise_salva()}["analise_acessorios"] == {"acessorios_identificados": []}
+    assert json.loads(json.dumps(analise_salva()))["analise_consistencia"] == {"inconsistencias": []}
+    assert set(analise_salva()) >= set(dm.BLOBS_ANALISE)
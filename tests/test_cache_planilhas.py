@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+import pipeline_ingestao
+from cache_planilhas import CachePlanilhas
+from leitor_planilhas import ler_planilha
+
+PLANILHA = pd.DataFrame({
+    "Load No": [1000, 1000, 1001, 1002],
+    "Serial Number": ["CH000001", "CH000002", "CH000003", "CH000004"],
+    "Destination City": ["SAO PAULO", "SAO PAULO", "SAO PAULO", None],
+    "Freight": [10.5, np.nan, 7.25, 3.0],
+    "Planned Ship Date": pd.to_datetime(["2025-03-03", "2025-03-03", "2025-03-04", None]),
+})
+
+
+def test_planilha_do_cache_igual_a_leitura_nova(tmp_path):
+    caminho = str(tmp_path / "envio.xlsx")
+    PLANILHA.to_excel(caminho, index=False)
+    cache = CachePlanilhas(str(tmp_path / "cache"))
+
+    assert cache.salvar("h1", ler_planilha(caminho))
+    do_cache = cache.carregar("h1")
+
+    pd.testing.assert_frame_equal(do_cache, ler_planilha(caminho))
+    assert cache.carregar("outro") is None
+
+
+def test_segunda_ingestao_le_do_cache_com_o_mesmo_resultado(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "envio.xlsx")
+    PLANILHA.to_excel(caminho, index=False)
+    monkeypatch.setattr(pipeline_ingestao, "_cache", CachePlanilhas(str(tmp_path / "cache")))
+
+    primeira = pipeline_ingestao.ingerir_planilha(caminho)
+
+    def sem_leitura(file_path):
+        raise AssertionError("planilha relida com o cache preenchido")
+    monkeypatch.setattr(pipeline_ingestao, "ler_planilha", sem_leitura)
+    segunda = pipeline_ingestao.ingerir_planilha(caminho)
+
+    assert segunda["transportes"] == primeira["transportes"]
+    assert segunda["resumo"] == primeira["resumo"]
+    consistencia = [resultado["analise"]["analise_consistencia"] for resultado in (primeira, segunda)]
+    assert consistencia[1]["inconsistencias"] == consistencia[0]["inconsistencias"]
+    assert consistencia[1]["alertas"] == consistencia[0]["alertas"]
@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from classificador_acessorios import ClassificadorAcessorios
+
+
+@pytest.fixture
+def classificador():
+    return ClassificadorAcessorios()
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("GABINA SIMPLES; BALAO; PNEU ARROZEIRO; DUAL TRASEIRO", ("GABINA SIMPLES", "BALAO", "PNEU ARROZEIRO")),
+    ("GABINA DUAL, DUALF ARR", ("GABINA DUAL", "DUALF ARR")),
+    ("GABINA SIMPLES, DUALF ARR", ("GABINA SIMPLES", "DUALF ARR")),
+    ("GABINA DUAL", ("GABINA DUAL",)),
+    ("DUAL GABINA / BALAO", ("GABINA DUAL", "BALAO")),
+    ("PNEU ARROZEIRO", ("PNEU ARROZEIRO",)),
+    ("3500mm", ("LARGURA",)),
+    ("", ()),
+])
+def test_classificar(classificador, texto, esperado):
+    assert classificador.classificar(texto) == esperado
+
+
+def test_classificar_coluna_reaproveita_textos_repetidos(classificador):
+    valores = pd.Series(["GABINA DUAL, DUALF ARR", None, "GABINA DUAL, DUALF ARR", "BALAO"])
+    assert classificador.classificar_coluna(valores) == [
+        ("GABINA DUAL", "DUALF ARR"), (), ("GABINA DUAL", "DUALF ARR"), ("BALAO",)
+    ]
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from codec_blobs import MAGICO, BlobInvalido, codificar, decodificar
+
+ANALISE = {
+    "inconsistencias_detectadas": 2,
+    "inconsistencias": [
+        {"tipo": "chassis_duplicado", "descricao": "CH000001 repetido", "linha": 3},
+        {"tipo": "data_entrega_anterior_embarque", "descricao": "LT 1000", "linha": 7},
+    ],
+    "alertas": ["Ordem de carregamento inválida: X"],
+    "misto": [{"a": 1}, {"b": 2}],
+}
+
+
+def test_ida_e_volta_devolve_o_mesmo_objeto():
+    blob = codificar(ANALISE)
+
+    assert blob.startswith(MAGICO)
+    assert decodificar(blob) == ANALISE
+    assert decodificar(memoryview(blob)) == ANALISE
+
+
+def test_linhas_antigas_em_json_e_em_str_dict():
+    assert decodificar(json.dumps(ANALISE)) == ANALISE
+    # gaya_db_query_tool gravava str(dados)
+    assert decodificar(str(ANALISE)) == ANALISE
+    assert decodificar(str(ANALISE).encode("utf-8")) == ANALISE
+
+
+def test_blob_ilegivel_levanta_erro_com_a_linha(caplog):
+    with pytest.raises(BlobInvalido, match="arquivos_processados id=42"):
+        decodificar("{'lt': 1000, ", "arquivos_processados id=42")
+
+    assert "arquivos_processados id=42" in caplog.text
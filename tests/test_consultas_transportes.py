@@ -0,0 +1,78 @@
+import pytest
+
+import database_manager as dm
+import migracoes
+from conexao_db import conexao_escrita, conexao_leitura
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    dm.salvar_transportes_individualmente([
+        {"chassis": "CH000001", "lt": "1000", "cidade_destino": "SAO PAULO", "estado_destino": "SP",
+         "status": "EM TRANSITO", "embarque_em": "2025-03-03T08:00:00"},
+        {"chassis": "CH000002", "lt": "1000", "cidade_destino": "SAO PAULO", "estado_destino": "SP",
+         "status": "entregue", "embarque_em": "2025-03-05T08:00:00"},
+        {"chassis": "CH000003", "lt": "1001", "cidade_destino": "CAMPINAS", "estado_destino": "SP",
+         "status": "em trânsito", "embarque_em": "2025-03-04T08:00:00"},
+        {"chassis": "CH000004", "lt": "1002", "cidade_destino": "SAO PAULO", "estado_destino": "SP",
+         "status": "entregue", "embarque_em": "2025-03-12T08:00:00"},
+        {"chassis": "CH000005", "lt": "1003", "cidade_destino": "São Paulo", "estado_destino": "PR",
+         "status": "entregue", "embarque_em": "2025-03-06T08:00:00"},
+    ], db_path)
+    return db_path
+
+
+def test_cidade_comparada_sem_acento_e_caixa(db_path):
+    pagina = dm.obter_transportes_por_periodo("2025-03-03", "2025-03-09", cidade_destino="São Paulo", db_path=db_path)
+    assert [t["chassis"] for t in pagina["transportes"]] == ["CH000001", "CH000002", "CH000005"]
+
+
+def test_cidade_e_estado_filtram_juntos(db_path):
+    pagina = dm.obter_transportes_por_periodo("2025-03-03", "2025-03-09", cidade_destino="sao paulo",
+                                              estado_destino="sp", db_path=db_path)
+    assert [t["chassis"] for t in pagina["transportes"]] == ["CH000001", "CH000002"]
+
+
+def test_status_comparado_sem_acento_e_caixa(db_path):
+    pagina = dm.obter_transportes_por_status("em trânsito", db_path=db_path)
+    assert [t["chassis"] for t in pagina["transportes"]] == ["CH000001", "CH000003"]
+
+
+def test_paginacao_por_cursor(db_path):
+    primeira = dm.obter_transportes_por_periodo("2025-03-01", "2025-03-31", limite=3, db_path=db_path)
+    segunda = dm.obter_transportes_por_periodo("2025-03-01", "2025-03-31", cursor=primeira["cursor"],
+                                               limite=3, db_path=db_path)
+    assert [t["chassis"] for t in primeira["transportes"] + segunda["transportes"]] == [
+        "CH000001", "CH000003", "CH000002", "CH000005", "CH000004"
+    ]
+    assert segunda["cursor"] is None
+
+
+def test_projecao_invalida_levanta_erro(db_path):
+    with pytest.raises(ValueError):
+        dm.obter_dados_chassis("CH000001", colunas=("id", "senha"), db_path=db_path)
+
+
+def test_filtros_usam_as_colunas_de_busca_indexadas(db_path):
+    with conexao_leitura(db_path) as conn:
+        indices = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        plano = " ".join(linha[3] for linha in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM transportes WHERE status_busca = ? ORDER BY id", ("entregue",)
+        ))
+    assert "idx_transportes_cidade_busca" in indices
+    assert not indices & {"idx_transportes_cidade", "idx_transportes_estado", "idx_transportes_cidade_embarque"}
+    assert "idx_transportes_status_busca" in plano
+
+
+def test_migracao_preenche_a_busca_dos_transportes_existentes(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    with conexao_escrita(db_path) as conn:
+        conn.execute("INSERT INTO transportes (chassis, cidade_destino, status) VALUES ('CH1', ' São  Paulo', 'Em Trânsito')")
+        conn.execute("PRAGMA user_version = 5")
+    migracoes._migrados.clear()
+    dm.init_db(db_path)
+
+    assert [t["chassis"] for t in dm.obter_transportes_por_status("EM TRANSITO", db_path=db_path)["transportes"]] == ["CH1"]
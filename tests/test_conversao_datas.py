@@ -0,0 +1,30 @@
+from datetime import datetime, time
+
+import pandas as pd
+
+from conversao_datas import combinar_data_hora, converter_datas, converter_horas, para_iso
+
+
+def test_datas_do_excel_iso_e_brasileiras_na_mesma_coluna():
+    datas = converter_datas(pd.Series([datetime(2025, 1, 19), "2025-01-20", "21/01/2025", "02/03/2025", "sem data", None],
+                                      dtype=object))
+
+    assert para_iso(datas).tolist() == [
+        "2025-01-19T00:00:00", "2025-01-20T00:00:00", "2025-01-21T00:00:00", "2025-03-02T00:00:00", None, None
+    ]
+
+
+def test_horas_em_texto_time_datetime_e_fracao_de_dia():
+    horas = converter_horas(pd.Series(["14:30", "08:05:10", time(7, 15), datetime(1900, 1, 1, 6, 0), 0.5, "tarde", None],
+                                      dtype=object))
+
+    assert horas.tolist()[:5] == [pd.Timedelta(hours=14, minutes=30), pd.Timedelta(hours=8, minutes=5, seconds=10),
+                                  pd.Timedelta(hours=7, minutes=15), pd.Timedelta(hours=6), pd.Timedelta(hours=12)]
+    assert horas.iloc[5:].isna().all()
+
+
+def test_data_e_hora_combinadas_e_hora_ausente_como_meia_noite():
+    combinadas = combinar_data_hora(pd.Series(["19/01/2025", "20/01/2025", None], dtype=object),
+                                    pd.Series(["14:30", None, "10:00"], dtype=object))
+
+    assert para_iso(combinadas).tolist() == ["2025-01-19T14:30:00", "2025-01-20T00:00:00", None]
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+import database_manager as dm
+import pipeline_ingestao
+from cache_planilhas import CachePlanilhas
+from conexao_db import conexao_leitura
+from gaya_db import GayaDatabase
+
+PLANILHA = pd.DataFrame({
+    "Load No": [1000, 1000, 1001],
+    "Serial Number": ["CH000001", "CH000002", "CH000003"],
+    "Destination City": ["SAO PAULO"] * 3,
+    "Destination State": ["SP"] * 3,
+    "Planned Ship Date": ["03/03/2025"] * 3,
+})
+
+
+@pytest.fixture(autouse=True)
+def cache_isolado(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_ingestao, "_cache", CachePlanilhas(str(tmp_path / "cache")))
+
+
+def salvar_como(tmp_path, nome):
+    caminho = tmp_path / nome
+    PLANILHA.to_csv(caminho, index=False)
+    return str(caminho)
+
+
+def test_mesmo_conteudo_salvo_por_envio_simultaneo_volta_como_duplicado(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    primeiro = pipeline_ingestao.ingerir_planilha(salvar_como(tmp_path, "a.csv"), db_path=db_path)
+
+    # O segundo envio consultou o hash antes do primeiro terminar de salvar
+    consultas = []
+
+    def consultar_atrasado(hash_arquivo, db_path):
+        consultas.append(hash_arquivo)
+        return dm.obter_analise_por_hash(hash_arquivo, db_path) if len(consultas) > 1 else None
+    monkeypatch.setattr(pipeline_ingestao, "obter_analise_por_hash", consultar_atrasado)
+    segundo = pipeline_ingestao.ingerir_planilha(salvar_como(tmp_path, "b.csv"), db_path=db_path)
+
+    assert primeiro["salvou_analise"] is True
+    assert segundo["duplicado"] is True
+    assert segundo["analise"]["planilha_metadata"]["nome_arquivo"] == "a.csv"
+    with conexao_leitura(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM analises_planilhas").fetchone()[0] == 1
+
+
+def test_reenvio_so_com_gaya_db_nao_duplica_transportes(tmp_path):
+    gaya_db = GayaDatabase(str(tmp_path / "gaya.db"))
+
+    primeiro = pipeline_ingestao.ingerir_planilha(salvar_como(tmp_path, "a.csv"), gaya_db=gaya_db)
+    segundo = pipeline_ingestao.ingerir_planilha(salvar_como(tmp_path, "b.csv"), gaya_db=gaya_db)
+
+    assert primeiro["transportes_salvos"] == 3
+    assert segundo["duplicado"] is True
+    assert gaya_db.contar_transportes() == 3
+
+
+def test_gaya_db_grava_o_mesmo_hash_uma_vez_so(tmp_path):
+    gaya_db = GayaDatabase(str(tmp_path / "gaya.db"))
+    transporte = {"load_number": "1000", "chassis": "CH000001"}
+
+    assert gaya_db.salvar_transportes([transporte], hash_arquivo="h1")["inseridos"] == 1
+    assert gaya_db.salvar_transportes([transporte], hash_arquivo="h1")["duplicado"] is True
+    assert gaya_db.contar_transportes() == 1
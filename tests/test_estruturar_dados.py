@@ -0,0 +1,36 @@
+import pandas as pd
+
+from benchmarks.referencia_estruturar import estruturar_iterrows, planilha_jd
+from planilha_analyzer import PlanilhaAnalyzer, CAMPOS_DATA_HORA
+
+# Campos que só a versão coluna a coluna gera (datas combinadas) ou que dependem do relógio
+CAMPOS_SO_NOVOS = set(CAMPOS_DATA_HORA) | {'_processado_em'}
+
+
+def test_estruturar_dados_igual_a_versao_iterrows():
+    analyzer = PlanilhaAnalyzer()
+    df = planilha_jd(500)
+
+    novos = analyzer._estruturar_dados(df)
+    esperados = estruturar_iterrows(analyzer, df)
+
+    assert len(novos) == len(esperados)
+    for novo, esperado in zip(novos, esperados):
+        comparavel = {campo: valor for campo, valor in novo.items() if campo not in CAMPOS_SO_NOVOS}
+        assert list(comparavel) == list(esperado)
+        assert comparavel == esperado
+        assert [type(valor) for valor in comparavel.values()] == [type(valor) for valor in esperado.values()]
+
+
+def test_estruturar_dados_valores_de_borda_nos_textos_livres():
+    analyzer = PlanilhaAnalyzer()
+    df = pd.DataFrame({
+        "Load No": [1, 2, 3, 4, 5],
+        "Serial Number": ["CH1", "CH2", "CH3", "CH4", "CH5"],
+        "Accessory": [0, 12.5, False, None, "GABINA DUAL"],
+    })
+
+    registros = analyzer._estruturar_dados(df)
+
+    assert [registro["acessorios"] for registro in registros] == ["", "12.5", "", None, "GABINA DUAL"]
+    assert [registro["_linha_planilha"] for registro in registros] == [2, 3, 4, 5, 6]
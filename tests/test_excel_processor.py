@@ -0,0 +1,53 @@
+import pandas as pd
+
+from excel_processor import ExcelProcessor
+
+
+def transportes(inicio, linhas):
+    return pd.DataFrame({
+        "Load No": [1000 + (inicio + i) // 2 for i in range(linhas)],
+        "Serial Number": [f"CH{inicio + i:06d}" for i in range(linhas)],
+        "Destination City": ["SAO PAULO"] * linhas,
+        "Planned Ship Date": ["03/03/2025"] * linhas,
+    })
+
+
+def pasta(caminho, abas):
+    with pd.ExcelWriter(caminho) as escritor:
+        for nome, df in abas.items():
+            df.to_excel(escritor, sheet_name=nome, index=False)
+    return str(caminho)
+
+
+def test_lotes_limitados_cobrem_todas_as_abas(tmp_path):
+    sem_chave = pd.DataFrame({"Load No": [None], "Serial Number": [None], "Destination City": ["ITU"]})
+    caminho = pasta(tmp_path / "envio.xlsx", {
+        "RH1": pd.concat([transportes(0, 5), sem_chave], ignore_index=True),
+        "RH2": transportes(5, 3),
+        "Resumo": pd.DataFrame({"Total": [8]}),
+    })
+    processor = ExcelProcessor()
+
+    lotes = list(processor.processar_excel_em_lotes(caminho, tamanho_lote=3))
+
+    assert [len(lote) for lote in lotes] == [3, 3, 2]
+    registros = [transporte for lote in lotes for transporte in lote]
+    assert registros == processor.processar_excel(caminho)
+    assert [t["chassis"] for t in registros] == [f"CH{i:06d}" for i in range(8)]
+    assert [t["sheet_name"] for t in registros] == ["RH1"] * 5 + ["RH2"] * 3
+    assert registros[0]["load_number"] == "1000"
+    assert registros[0]["planned_ship_date"].startswith("2025-03-03")
+
+
+def test_csv_sai_nos_mesmos_lotes_que_o_excel(tmp_path):
+    caminho_csv = tmp_path / "envio.csv"
+    transportes(0, 7).to_csv(caminho_csv, index=False)
+    processor = ExcelProcessor()
+
+    do_csv = list(processor.processar_excel_em_lotes(str(caminho_csv), tamanho_lote=3))
+    do_excel = list(processor.processar_excel_em_lotes(pasta(tmp_path / "envio.xlsx", {"RH1": transportes(0, 7)}),
+                                                       tamanho_lote=3))
+
+    assert [len(lote) for lote in do_csv] == [3, 3, 1]
+    sem_aba = [[{**t, "sheet_name": ""} for t in lote] for lote in do_excel]
+    assert do_csv == sem_aba
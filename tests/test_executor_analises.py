@@ -0,0 +1,75 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import executor_analises
+
+
+@pytest.fixture
+def executor_novo(monkeypatch):
+    """Pool, manager e semáforo criados só para o teste e encerrados no fim"""
+    for nome in ("_pool", "_gerenciador", "_semaforo"):
+        monkeypatch.setattr(executor_analises, nome, None)
+    yield
+    if executor_analises._pool is not None:
+        executor_analises._pool.shutdown()
+    if executor_analises._gerenciador is not None:
+        executor_analises._gerenciador.shutdown()
+
+
+def test_analise_em_outro_processo_entrega_o_progresso(tmp_path, monkeypatch, executor_novo):
+    # O processo do pool herda o diretório: o cache de planilhas fica no tmp_path
+    monkeypatch.chdir(tmp_path)
+    caminho = tmp_path / "envio.csv"
+    pd.DataFrame({"Load No": [1000, 1001], "Serial Number": ["CH000001", "CH000002"]}).to_csv(caminho, index=False)
+    etapas = []
+
+    async def ao_progredir(etapa):
+        etapas.append(etapa)
+
+    resultado = asyncio.run(executor_analises.ingerir_planilha_async(str(caminho), ao_progredir))
+
+    assert [t["chassis"] for t in resultado["transportes"]] == ["CH000001", "CH000002"]
+    assert etapas[0] == "📖 Lendo planilha..."
+    assert len(etapas) == 5
+
+
+def test_analises_simultaneas_respeitam_o_limite(monkeypatch, executor_novo):
+    monkeypatch.setitem(executor_analises.CONFIG, "MAX_ANALISES_SIMULTANEAS", 2)
+    # Threads no lugar dos processos: o limite vem do semáforo, não do tamanho do pool
+    monkeypatch.setattr(executor_analises, "_pool", ThreadPoolExecutor(max_workers=6))
+    gerenciador = type("Gerenciador", (), {"Queue": queue.Queue, "shutdown": lambda self: None})
+    monkeypatch.setattr(executor_analises, "_gerenciador", gerenciador())
+    trava = threading.Lock()
+    andamento = {"atual": 0, "maximo": 0}
+
+    def ingerir(fila, file_path, opcoes):
+        with trava:
+            andamento["atual"] += 1
+            andamento["maximo"] = max(andamento["maximo"], andamento["atual"])
+        fila.put(f"lendo {file_path}")
+        time.sleep(0.2)
+        with trava:
+            andamento["atual"] -= 1
+        return {"arquivo": file_path}
+    monkeypatch.setattr(executor_analises, "_ingerir_no_processo", ingerir)
+    etapas = []
+
+    async def ao_progredir(etapa):
+        etapas.append(etapa)
+
+    async def enviar_varias():
+        return await asyncio.gather(*(
+            executor_analises.ingerir_planilha_async(f"envio{i}.csv", ao_progredir) for i in range(6)
+        ))
+
+    resultados = asyncio.run(enviar_varias())
+
+    assert [resultado["arquivo"] for resultado in resultados] == [f"envio{i}.csv" for i in range(6)]
+    assert andamento["maximo"] == 2
+    assert sorted(etapas) == sorted(f"lendo envio{i}.csv" for i in range(6))
@@ -0,0 +1,55 @@
+import database_manager as dm
+from conexao_db import conexao_leitura
+from gaya_db import GayaDatabase
+
+
+def transportes(quantidade):
+    for i in range(quantidade):
+        yield {"load_number": str(1000 + i // 4), "chassis": f"CH{i:06d}", "destination_state": "SP"}
+
+
+def test_gerador_gravado_em_varios_lotes_numa_transacao(tmp_path):
+    gaya_db = GayaDatabase(str(tmp_path / "gaya.db"))
+    registros = list(transportes(25)) + [{"destination_city": "ITU"}]
+
+    resultado = gaya_db.salvar_transportes(iter(registros), tamanho_lote=10)
+
+    assert resultado == {"inseridos": 25, "ignorados": 1, "duplicado": False}
+    assert gaya_db.contar_transportes() == 25
+    with conexao_leitura(gaya_db.db_path) as conn:
+        assert conn.execute("SELECT valor, quantidade FROM agregados_transportes WHERE dimensao = 'estado'").fetchall() \
+            == [("SP", 25)]
+
+
+def test_erro_no_meio_nao_grava_nenhum_lote(tmp_path):
+    gaya_db = GayaDatabase(str(tmp_path / "gaya.db"))
+    registros = list(transportes(25))
+    registros[22]["chassis"] = object()  # o SQLite não aceita: falha no terceiro lote
+
+    resultado = gaya_db.salvar_transportes(registros, tamanho_lote=10)
+
+    assert resultado["inseridos"] == 0
+    assert gaya_db.contar_transportes() == 0
+
+
+def test_paginas_de_um_lote_grande_sem_buracos_nem_repeticoes(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    # Embarques repetidos: a ordem só é total por causa do id no fim da chave
+    dm.salvar_transportes_individualmente([
+        {"lt": str(1000 + i // 5), "chassis": f"CH{i:06d}", "cidade_destino": "SAO PAULO",
+         "embarque_em": f"2025-03-{3 + i % 4:02d}T08:00:00"}
+        for i in range(250)
+    ], db_path)
+
+    vistos, cursor = [], None
+    while True:
+        pagina = dm.obter_transportes_por_periodo("2025-03-01", "2025-03-31", cidade_destino="São Paulo",
+                                                  cursor=cursor, limite=7, db_path=db_path)
+        vistos.extend((t["data_embarque"], t["id"]) for t in pagina["transportes"])
+        cursor = pagina["cursor"]
+        if cursor is None:
+            break
+
+    assert len(vistos) == len(set(vistos)) == 250
+    assert vistos == sorted(vistos)
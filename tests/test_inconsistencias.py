@@ -0,0 +1,33 @@
+import database_manager as dm
+from conexao_db import conexao_escrita
+
+
+def test_contagem_bate_com_a_listagem_mesmo_com_orfas(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    with conexao_escrita(db_path) as conn:
+        conn.execute("INSERT INTO analises_planilhas (id, nome_arquivo) VALUES (1, 'TRK_TRANS_DTL.xlsx')")
+        conn.executemany("""
+            INSERT INTO inconsistencias (analise_id, tipo_inconsistencia, descricao, criticidade, registros_afetados)
+            VALUES (?, 'chassis_lt_incompativel', ?, ?, '[]')
+        """, [(1, f"inconsistência {i}", "ALTA" if i % 2 else "MEDIA") for i in range(7)] + [(99, "órfã", "ALTA")])
+
+    assert dm.contar_inconsistencias(db_path=db_path) == len(list(dm.iterar_inconsistencias(db_path=db_path))) == 7
+    assert dm.contar_inconsistencias(criticidade="ALTA", db_path=db_path) == 3
+
+
+def test_paginas_seguem_o_cursor_sem_repetir(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    with conexao_escrita(db_path) as conn:
+        conn.execute("INSERT INTO analises_planilhas (id, nome_arquivo) VALUES (1, 'TRK_TRANS_DTL.xlsx')")
+        conn.executemany("""
+            INSERT INTO inconsistencias (analise_id, tipo_inconsistencia, descricao, criticidade, registros_afetados)
+            VALUES (1, 'lt_chassis_duplicado', ?, 'ALTA', '[1, 2]')
+        """, [(f"inconsistência {i}",) for i in range(5)])
+
+    ids = [inconsistencia["id"] for inconsistencia in dm.iterar_inconsistencias(tamanho_pagina=2, db_path=db_path)]
+    assert ids == [5, 4, 3, 2, 1]
+    pagina = dm.obter_inconsistencias(limite=5, com_registros=True, db_path=db_path)
+    assert pagina["cursor"] is None
+    assert pagina["inconsistencias"][0]["registros_afetados"] == [1, 2]
@@ -0,0 +1,58 @@
+import pandas as pd
+
+import leitor_planilhas
+from leitor_planilhas import COLUNA_ABA, COLUNA_LINHA, detectar_formato_texto, ler_planilha
+
+TRANSPORTES = pd.DataFrame({"Load No": [1000, 1001], "Serial Number": ["CH000001", "CH000002"]})
+
+
+def pasta(caminho, abas):
+    with pd.ExcelWriter(caminho) as escritor:
+        for nome, df in abas.items():
+            df.to_excel(escritor, sheet_name=nome, index=False)
+    return str(caminho)
+
+
+def test_todos_os_caminhos_trazem_aba_e_linha(tmp_path):
+    varias = ler_planilha(pasta(tmp_path / "varias.xlsx", {"RH1": TRANSPORTES, "RH2": TRANSPORTES}))
+    # Sem a assinatura em nenhuma aba: cai na leitura da aba padrão
+    sem_assinatura = ler_planilha(pasta(tmp_path / "outra.xlsx", {"TRK_TRANS_DTL": TRANSPORTES.rename(
+        columns={"Load No": "LT"})}))
+
+    assert varias[COLUNA_ABA].tolist() == ["RH1", "RH1", "RH2", "RH2"]
+    assert varias[COLUNA_LINHA].tolist() == [2, 3, 2, 3]
+    assert sem_assinatura[COLUNA_ABA].tolist() == ["TRK_TRANS_DTL"] * 2
+    assert sem_assinatura[COLUNA_LINHA].tolist() == [2, 3]
+
+
+def test_dentro_de_um_worker_le_as_abas_sem_novo_pool(tmp_path, monkeypatch):
+    caminho = pasta(tmp_path / "varias.xlsx", {"RH1": TRANSPORTES, "RH2": TRANSPORTES})
+
+    def sem_pool(*args, **kwargs):
+        raise AssertionError("pool de leitura criado dentro de um worker")
+    monkeypatch.setattr(leitor_planilhas, "ProcessPoolExecutor", sem_pool)
+    monkeypatch.setattr(leitor_planilhas.multiprocessing, "parent_process", lambda: object())
+
+    assert len(ler_planilha(caminho)) == 4
+
+
+def test_pool_de_leitura_limitado_pela_configuracao(monkeypatch):
+    monkeypatch.setitem(leitor_planilhas.CONFIG, "MAX_ANALISES_SIMULTANEAS", 2)
+    assert leitor_planilhas._processos_leitura(8) == 2
+
+
+def test_csv_cp1252_com_ponto_e_virgula_e_utf8_com_virgula_dao_as_mesmas_colunas(tmp_path):
+    linhas = [["Load No", "Serial Number", "Destination City", "Destination Name"],
+              ["1000", "CH000001", "São João del-Rei", "REVENDA AÇAÍ"],
+              ["1001", "CH000002", "Goiânia", "REVENDA, FILIAL 2"]]
+    excel = tmp_path / "excel.csv"
+    excel.write_bytes("\r\n".join(";".join(linha) for linha in linhas).encode("cp1252"))
+    utf8 = tmp_path / "utf8.csv"
+    pd.DataFrame(linhas[1:], columns=linhas[0]).to_csv(utf8, index=False, encoding="utf-8")
+
+    assert detectar_formato_texto(str(excel)) == ("cp1252", ";")
+    assert detectar_formato_texto(str(utf8)) == ("utf-8-sig", ",")
+    de_excel, de_utf8 = ler_planilha(str(excel)), ler_planilha(str(utf8))
+    assert list(de_excel.columns) == list(de_utf8.columns) == linhas[0] + [COLUNA_ABA, COLUNA_LINHA]
+    assert de_excel.astype(str).equals(de_utf8.astype(str))
+    assert de_excel["Destination City"].tolist() == ["São João del-Rei", "Goiânia"]
@@ -0,0 +1,38 @@
+from mapeamento_colunas import MapeadorColunas, normalizar_cabecalho
+
+ALIASES = {
+    "lt": ["Load No", "LT", "Carga"],
+    "chassis": ["Serial Number", "Número do Chassi"],
+    "cidade": ["Destination City"],
+}
+
+
+def test_normaliza_acento_caixa_e_separadores():
+    assert normalizar_cabecalho("  Número  do_Chassi ") == "numero do chassi"
+    assert normalizar_cabecalho("DESTINATION-CITY") == "destination city"
+
+
+def test_cabecalho_variado_mapeia_pelo_alias_preferido():
+    mapeador = MapeadorColunas(ALIASES, obrigatorios=["lt", "chassis"])
+
+    resultado = mapeador.mapear(["carga", "NUMERO DO CHASSI", "Load No", "Obs", "_aba_planilha"])
+
+    assert resultado["mapeamento"] == {"Load No": "lt", "NUMERO DO CHASSI": "chassis"}
+    assert resultado["colunas_desconhecidas"] == ["Obs"]
+    assert resultado["valido"] is True
+
+
+def test_obrigatorio_ausente_invalida_o_layout():
+    resultado = MapeadorColunas(ALIASES, obrigatorios=["lt", "chassis"]).mapear(["LT", "Destination City"])
+
+    assert resultado["campos_faltantes"] == ["chassis"]
+    assert resultado["valido"] is False
+
+
+def test_mesmo_cabecalho_reaproveita_o_resultado():
+    mapeador = MapeadorColunas(ALIASES)
+
+    primeiro = mapeador.mapear(["Load No", "Serial Number"])
+
+    assert mapeador.mapear(("Load No", "Serial Number")) is primeiro
+    assert mapeador.mapear(["Serial Number", "Load No"]) is not primeiro
@@ -0,0 +1,142 @@
+import sqlite3
+
+import database_manager as dm
+import migracoes
+from conexao_db import conexao_leitura
+
+RESULTADO = {
+    "planilha_metadata": {"nome_arquivo": "TRK_TRANS_DTL.xlsx", "total_registros": 0, "hash_arquivo": "novo"},
+    "analise_consistencia": {"lts_unicos": 0, "chassis_unicos": 0, "inconsistencias_detectadas": 0,
+                             "inconsistencias": [], "alertas": []},
+    "analise_acessorios": {"acessorios_identificados": []},
+    "dados_estruturados": [],
+}
+
+
+def test_banco_antigo_aceita_varias_analises_do_mesmo_arquivo(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    # Esquema do init_db antigo: nome_arquivo TEXT UNIQUE
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE analises_planilhas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, nome_arquivo TEXT UNIQUE,
+            data_processamento TIMESTAMP DEFAULT CURRENT_TIMESTAMP, total_registros INTEGER,
+            lts_unicos INTEGER, chassis_unicos INTEGER, inconsistencias_detectadas INTEGER,
+            acessorios_identificados TEXT, dados_estruturados JSON, analise_consistencia JSON,
+            analise_acessorios JSON
+        );
+        CREATE TABLE inconsistencias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, analise_id INTEGER, tipo_inconsistencia TEXT,
+            descricao TEXT, criticidade TEXT, registros_afetados TEXT
+        );
+        INSERT INTO analises_planilhas (nome_arquivo, acessorios_identificados) VALUES ('TRK_TRANS_DTL.xlsx', '[]');
+        INSERT INTO inconsistencias (analise_id, descricao) VALUES (1, 'da análise 1'), (7, 'órfã');
+    """)
+    conn.close()
+
+    dm.init_db(db_path)
+    assert dm.salvar_analise_planilha(RESULTADO, db_path)
+
+    with conexao_leitura(db_path) as conn:
+        assert conn.execute("SELECT id, nome_arquivo FROM analises_planilhas ORDER BY id").fetchall() == [
+            (1, "TRK_TRANS_DTL.xlsx"), (2, "TRK_TRANS_DTL.xlsx")
+        ]
+        assert conn.execute("SELECT analise_id, descricao FROM inconsistencias").fetchall() == [(1, "da análise 1")]
+
+
+def test_lt_e_chassis_do_excel_gravados_sem_ponto_zero(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO transportes (lt, chassis) VALUES (?, ?)",
+                     [(1000.0, "CH000001"), ("A1.0", 123456.0), ("1001", "CH000002")])
+    conn.execute("PRAGMA user_version = 4")
+    conn.commit()
+    conn.close()
+    migracoes._migrados.clear()
+
+    dm.init_db(db_path)
+    dm.salvar_transportes_individualmente([{"lt": 1002.0, "chassis": 654321.0}], db_path)
+
+    with conexao_leitura(db_path) as conn:
+        assert conn.execute("SELECT lt, chassis FROM transportes ORDER BY id").fetchall() == [
+            ("1000", "CH000001"), ("A1.0", "123456"), ("1001", "CH000002"), ("1002", "654321")
+        ]
+
+
+def _esquema_e_dados(db_path):
+    with conexao_leitura(db_path) as conn:
+        esquema = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+        transportes = conn.execute("SELECT * FROM transportes ORDER BY id").fetchall()
+        versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    return esquema, transportes, versao
+
+
+def _indices_transportes(db_path):
+    with conexao_leitura(db_path) as conn:
+        return {nome for (nome,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'transportes' AND sql IS NOT NULL"
+        )}
+
+
+def test_banco_novo_vai_direto_para_a_versao_atual(tmp_path):
+    db_path = str(tmp_path / "novo.db")
+    migracoes._migrados.clear()
+
+    assert migracoes.migrar(db_path) == migracoes.VERSAO_ATUAL
+
+    esquema, transportes, versao = _esquema_e_dados(db_path)
+    assert versao == migracoes.VERSAO_ATUAL
+    assert transportes == []
+    with conexao_leitura(db_path) as conn:
+        colunas = [linha[1] for linha in conn.execute("PRAGMA table_info(transportes)")]
+    assert colunas == [nome for nome, _ in migracoes.COLUNAS_TRANSPORTES] + list(migracoes.COLUNAS_BUSCA.values())
+    esperados = (set(migracoes.INDICES_TRANSPORTES) | set(migracoes.INDICES_CONSULTAS) | set(migracoes.INDICES_BUSCA)) \
+        - set(migracoes.INDICES_SUBSTITUIDOS) - set(migracoes.INDICES_SEM_USO)
+    assert _indices_transportes(db_path) == esperados
+
+
+def test_esquema_antigo_do_gaya_db_sobe_ate_a_versao_atual(tmp_path):
+    db_path = str(tmp_path / "gaya.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE transportes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, load_number TEXT, chassis TEXT,
+            destination_city TEXT, destination_state TEXT, customer_name TEXT,
+            planned_ship_date TEXT, vehicle_type TEXT, driver_name TEXT,
+            created_at TEXT, file_source TEXT
+        );
+        CREATE INDEX idx_chassis ON transportes (chassis);
+        INSERT INTO transportes (load_number, chassis, destination_city, destination_state, customer_name, file_source)
+        VALUES ('1000.0', 'CH000001', 'São Paulo', 'SP', 'REVENDA A', 'telegram'),
+               ('1001', 'CH000002', 'CAMPINAS', 'sp', 'REVENDA B', 'telegram');
+    """)
+    conn.close()
+    migracoes._migrados.clear()
+
+    assert migracoes.migrar(db_path) == migracoes.VERSAO_ATUAL
+
+    with conexao_leitura(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == migracoes.VERSAO_ATUAL
+        assert conn.execute(
+            "SELECT lt, chassis, cidade_destino, cliente, arquivo_origem, cidade_busca, estado_busca "
+            "FROM transportes ORDER BY id"
+        ).fetchall() == [
+            ("1000", "CH000001", "São Paulo", "REVENDA A", "telegram", "sao paulo", "sp"),
+            ("1001", "CH000002", "CAMPINAS", "REVENDA B", "telegram", "campinas", "sp"),
+        ]
+    assert "idx_chassis" not in _indices_transportes(db_path)
+
+
+def test_migrar_duas_vezes_nao_muda_nada(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    dm.salvar_transportes_individualmente([{"lt": "1000", "chassis": "CH000001", "cidade_destino": "Itu"}], db_path)
+    antes = _esquema_e_dados(db_path)
+
+    migracoes._migrados.clear()
+    assert migracoes.migrar(db_path) == migracoes.VERSAO_ATUAL
+    migracoes._migrados.clear()
+    assert migracoes.migrar(db_path) == migracoes.VERSAO_ATUAL
+
+    assert _esquema_e_dados(db_path) == antes
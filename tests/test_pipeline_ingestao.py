@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+import database_manager as dm
+import pipeline_ingestao
+from cache_planilhas import CachePlanilhas
+from gaya_db import GayaDatabase
+
+PLANILHA = pd.DataFrame({
+    "Load No": [1000, 1000, 1001],
+    "Serial Number": ["CH000001", "CH000002", "CH000003"],
+    "Destination City": ["SAO PAULO", "SAO PAULO", "CAMPINAS"],
+    "Destination State": ["SP"] * 3,
+    "Destination Name": ["REVENDA A", "REVENDA A", "REVENDA B"],
+    "Planned Ship Date": ["03/03/2025"] * 3,
+})
+
+
+@pytest.fixture(autouse=True)
+def cache_isolado(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_ingestao, "_cache", CachePlanilhas(str(tmp_path / "cache")))
+
+
+def test_uma_leitura_atende_analise_banco_e_resumo(tmp_path, monkeypatch):
+    caminho = tmp_path / "envio.csv"
+    PLANILHA.to_csv(caminho, index=False)
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    gaya_db = GayaDatabase(str(tmp_path / "gaya.db"))
+
+    ler_planilha = pipeline_ingestao.ler_planilha
+    leituras = []
+
+    def ler(file_path):
+        leituras.append(file_path)
+        return ler_planilha(file_path)
+    monkeypatch.setattr(pipeline_ingestao, "ler_planilha", ler)
+    etapas = []
+
+    resultado = pipeline_ingestao.ingerir_planilha(str(caminho), db_path=db_path, gaya_db=gaya_db,
+                                                   progresso=etapas.append)
+
+    assert leituras == [str(caminho)]
+    assert len(etapas) == 5
+    assert resultado["salvou_analise"] is True
+    assert resultado["analise"]["planilha_metadata"]["total_registros"] == 3
+    assert [t["chassis"] for t in resultado["transportes"]] == ["CH000001", "CH000002", "CH000003"]
+    assert resultado["transportes_salvos"] == gaya_db.contar_transportes() == 3
+    assert dm.obter_dados_chassis("CH000003", db_path=db_path)["transportes"]
+
+
+def test_layout_desconhecido_nao_chega_a_analise(tmp_path):
+    caminho = tmp_path / "outra.csv"
+    pd.DataFrame({"Coluna": [1], "Outra": [2]}).to_csv(caminho, index=False)
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+
+    resultado = pipeline_ingestao.ingerir_planilha(str(caminho), db_path=db_path)
+
+    assert resultado["salvou_analise"] is False
+    assert resultado["transportes"] == []
+    assert "Layout de planilha desconhecido" in resultado["analise"]["resumo"]["mensagem"]
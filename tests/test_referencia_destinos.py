@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+import database_manager as dm
+import referencia_destinos
+from conexao_db import conexao_escrita
+from referencia_destinos import ReferenciaDestinos
+from regras_consistencia import ContextoRegras, destino_inconsistente
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    return db_path
+
+
+def test_referencia_vazia_semeada_com_os_transportes_salvos(db_path):
+    with conexao_escrita(db_path) as conn:
+        conn.executemany("""
+            INSERT INTO transportes (chassis, destino, cliente, cidade_destino, estado_destino)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            ("CH000001", "1234.0", "REVENDA A", "SAO PAULO", "SP"),
+            ("CH000002", "1234", "REVENDA A LTDA", "SAO PAULO", "SP"),
+            ("CH000003", "5678", "REVENDA B", "CAMPINAS", "SP"),
+            ("CH000004", None, "SEM CODIGO", "RIBEIRAO", "SP"),
+        ])
+
+    referencia = ReferenciaDestinos(db_path)
+
+    assert referencia.destinos == {
+        "1234": ("REVENDA A", "SAO PAULO", "SP"),
+        "5678": ("REVENDA B", "CAMPINAS", "SP"),
+    }
+    # Já preenchida: uma segunda carga não semeia de novo
+    assert dm.semear_referencia_destinos(db_path) == 0
+
+
+def test_codigos_aprendidos_por_outro_processo_aparecem_sem_recarregar(db_path):
+    worker_a = ReferenciaDestinos(db_path)
+    worker_b = ReferenciaDestinos(db_path)
+
+    frame = pd.DataFrame({"codigo_destino": [1234.0, 1234.0], "nome_destino": ["REVENDA A", "REVENDA A"],
+                          "cidade_destino": ["SAO PAULO", "SAO PAULO"], "estado_destino": ["SP", "SP"]})
+    worker_a.aprender(worker_a.destinos_do_frame(frame))
+
+    assert "1234" not in worker_b.destinos
+    assert worker_b.atualizar() == 1
+    assert worker_b.destinos["1234"] == ("REVENDA A", "SAO PAULO", "SP")
+
+
+def test_codigo_numerico_do_excel_casa_com_o_texto(db_path):
+    referencia = ReferenciaDestinos(db_path)
+    frame = pd.DataFrame({"codigo_destino": [1234.0], "nome_destino": ["REVENDA A"]})
+    assert referencia.destinos_do_frame(frame)["codigo_destino"].tolist() == ["1234"]
+
+
+def test_regra_de_destino_so_le_a_referencia_do_contexto(db_path, monkeypatch):
+    referencia = ReferenciaDestinos(db_path)
+    referencia.aprender(referencia.destinos_do_frame(pd.DataFrame({
+        "codigo_destino": ["1234"], "nome_destino": ["REVENDA A"], "cidade_destino": ["SAO PAULO"]
+    })))
+
+    def sem_escrita(*args, **kwargs):
+        raise AssertionError("regra gravou no banco")
+    monkeypatch.setattr(referencia_destinos, "semear_referencia_destinos", sem_escrita)
+    monkeypatch.setattr(referencia_destinos, "atualizar_referencia_destinos", sem_escrita)
+
+    frame = pd.DataFrame({"codigo_destino": ["1234"], "nome_destino": ["REVENDA A"], "cidade_destino": ["CAMPINAS"]})
+    com_referencia = ContextoRegras(frame, {}, db_path=db_path, referencia_destinos=referencia)
+    sem_referencia = ContextoRegras(frame, {}, db_path=db_path)
+
+    assert [a["registros_afetados"] for a in destino_inconsistente(com_referencia)] == [["1234"]]
+    assert destino_inconsistente(sem_referencia) == []
@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+import database_manager as dm
+import pipeline_ingestao
+from cache_planilhas import CachePlanilhas
+from conexao_db import conexao_leitura
+from planilha_analyzer import PlanilhaAnalyzer
+
+NOME = "TRK_TRANS_DTL.csv"
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_ingestao, "_cache", CachePlanilhas(str(tmp_path / "cache")))
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+    return db_path
+
+
+def planilha(lts, chassis, cidades=None):
+    """Envio mínimo: um LT e um chassis por linha, embarque em 03/03/2025"""
+    linhas = len(chassis)
+    return pd.DataFrame({
+        "Load No": lts,
+        "Serial Number": chassis,
+        "Destination Code": [f"D{lt}" for lt in lts],
+        "Destination Name": [f"REVENDA {lt}" for lt in lts],
+        "Destination City": cidades or ["SAO PAULO"] * linhas,
+        "Destination State": ["SP"] * linhas,
+        "Planned Ship Date": ["03/03/2025"] * linhas,
+        "Delivery Date": ["05/03/2025"] * linhas,
+    })
+
+
+def ingerir(tmp_path, db_path, frame, versao, **kwargs):
+    caminho = tmp_path / f"v{versao}" / NOME
+    caminho.parent.mkdir(exist_ok=True)
+    frame.to_csv(caminho, index=False)
+    return pipeline_ingestao.ingerir_planilha(str(caminho), db_path=db_path, **kwargs)
+
+
+def _transportes(db_path):
+    with conexao_leitura(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM transportes").fetchone()[0]
+
+
+def _total_global(db_path):
+    return dict(dm.obter_agregados(db_path=db_path)["total"])["registros"]
+
+
+def test_arquivo_sem_relacao_com_o_mesmo_nome_nao_apaga_o_anterior(tmp_path, db_path):
+    primeiro = planilha([1000 + i // 10 for i in range(100)], [f"CH{i:06d}" for i in range(100)])
+    segundo = planilha([2000 + i // 10 for i in range(100)], [f"CH{100000 + i:06d}" for i in range(100)])
+
+    ingerir(tmp_path, db_path, primeiro, 1)
+    resultado = ingerir(tmp_path, db_path, segundo, 2)
+
+    assert "delta" not in resultado["analise"]
+    assert _transportes(db_path) == 200
+    assert _total_global(db_path) == 200
+    assert dm.obter_dados_chassis("CH000001", db_path=db_path)["transportes"]
+
+
+def test_revisao_explicita_mantem_lts_que_nao_vieram(tmp_path, db_path):
+    ingerir(tmp_path, db_path, planilha([1000, 1000, 1001], ["CH000001", "CH000002", "CH000003"]), 1)
+    # LT 1000 revisado (CH000002 saiu) e LT 1001 não veio nesta versão
+    resultado = ingerir(tmp_path, db_path, planilha([1000, 1002], ["CH000001", "CH000004"]), 2, revisao=True)
+
+    assert resultado["analise"]["delta"]["removidas"] == 2
+    assert not dm.obter_dados_chassis("CH000002", db_path=db_path)["transportes"]
+    assert dm.obter_dados_chassis("CH000003", db_path=db_path)["transportes"]
+    assert _transportes(db_path) == 3
+    assert _total_global(db_path) == 3
+    # A análise anterior fica só com o LT que não veio; nada repetido entre as duas
+    assert dm.obter_agregados(analise_id=1, db_path=db_path)["total"] == [("registros", 1)]
+    assert dm.obter_agregados(analise_id=2, db_path=db_path)["total"] == [("registros", 2)]
+
+
+def test_revisao_mantem_achados_das_linhas_inalteradas(tmp_path, db_path):
+    lts = [1000 + i // 10 for i in range(100)]
+    chassis = [f"CH{i:06d}" for i in range(100)]
+    chassis[15] = "CH000001"  # mesmo chassis nos LTs 1000 e 1001
+    v1 = planilha(lts, chassis)
+    v1.loc[40, "Delivery Date"] = "01/03/2025"  # entrega antes do embarque
+    v2 = v1.copy()
+    v2.loc[70, "Delivery Date"] = "06/03/2025"
+
+    primeira = ingerir(tmp_path, db_path, v1, 1)["analise"]["analise_consistencia"]["inconsistencias"]
+    segunda = ingerir(tmp_path, db_path, v2, 2)["analise"]
+
+    assert segunda["delta"]["alteradas"] == 1
+    achados = segunda["analise_consistencia"]["inconsistencias"]
+    assert sorted(a["descricao"] for a in achados) == sorted(a["descricao"] for a in primeira)
+    assert {"chassis_lt_incompativel", "data_entrega_anterior_embarque"} <= {a["tipo"] for a in achados}
+    assert dm.contar_inconsistencias(db_path=db_path) == 2 * len(primeira)
+
+
+def test_revisao_verifica_a_ordem_de_carregamento_uma_vez(tmp_path, db_path, monkeypatch):
+    v1 = planilha([1000, 1000, 1001], ["CH000001", "CH000002", "CH000003"])
+    v1["Load Order"] = ["1", "X", "1"]
+    v2 = v1.copy()
+    v2.loc[1, "Delivery Date"] = "06/03/2025"  # a linha revalidada é a da ordem inválida
+    ingerir(tmp_path, db_path, v1, 1)
+
+    verificar = PlanilhaAnalyzer._verificar_ordem_carregamento
+    chamadas = []
+
+    def contar(self, dados, frame):
+        chamadas.append(len(frame))
+        return verificar(self, dados, frame)
+    monkeypatch.setattr(PlanilhaAnalyzer, "_verificar_ordem_carregamento", contar)
+    segunda = ingerir(tmp_path, db_path, v2, 2)["analise"]
+
+    assert segunda["delta"]["alteradas"] == 1
+    assert chamadas == [3]
+    assert segunda["analise_consistencia"]["alertas"] == ["Ordem de carregamento inválida: X"]
@@ -0,0 +1,42 @@
+import pandas as pd
+
+import database_manager as dm
+from conexao_db import conexao_leitura
+
+RESULTADO = {
+    "planilha_metadata": {"nome_arquivo": "TRK_TRANS_DTL.xlsx", "total_registros": 2, "hash_arquivo": "h1"},
+    "analise_consistencia": {"lts_unicos": 1, "chassis_unicos": 2, "inconsistencias_detectadas": 0,
+                             "inconsistencias": [], "alertas": []},
+    "analise_acessorios": {"acessorios_identificados": []},
+    "dados_estruturados": [
+        {"lt": "1000", "chassis": "CH000001", "cidade_destino": "SAO PAULO"},
+        {"lt": "1000", "chassis": "CH000002", "cidade_destino": "SAO PAULO"},
+    ],
+}
+AGREGADOS = pd.DataFrame({"dimensao": ["cidade", "total"], "valor": ["SAO PAULO", "registros"], "quantidade": [2, 2]})
+
+
+def _contagens(db_path):
+    with conexao_leitura(db_path) as conn:
+        return tuple(conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                     for tabela in ("analises_planilhas", "agregados_globais", "transportes"))
+
+
+def test_analise_agregados_e_transportes_gravados_juntos(tmp_path):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+
+    assert dm.salvar_analise_planilha(RESULTADO, db_path, agregados=AGREGADOS)
+    assert _contagens(db_path) == (1, 2, 2)
+
+
+def test_falha_nos_transportes_desfaz_analise_e_agregados(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "transportes.db")
+    dm.init_db(db_path)
+
+    def falhar(*args, **kwargs):
+        raise RuntimeError("disco cheio")
+    monkeypatch.setattr(dm, "_inserir_transportes", falhar)
+
+    assert not dm.salvar_analise_planilha(RESULTADO, db_path, agregados=AGREGADOS)
+    assert _contagens(db_path) == (0, 0, 0)
@@ -0,0 +1,44 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from planilha_analyzer import PlanilhaAnalyzer
+
+REGRAS = ["chassis_lt_incompativel", "lt_chassis_duplicado"]
+
+
+def esperado_por_laco(registros):
+    """Os mesmos achados calculados registro a registro, na ordem da planilha"""
+    pares = [(r["lt"], r["chassis"]) for r in registros if pd.notna(r["lt"]) and r["lt"] and pd.notna(r["chassis"])]
+    lts_por_chassis = {}
+    for lt, chassis in pares:
+        lts = lts_por_chassis.setdefault(chassis, [])
+        if lt not in lts:
+            lts.append(lt)
+    incompativeis = [(chassis, lts) for chassis, lts in lts_por_chassis.items() if len(lts) > 1]
+    duplicados = [(par, quantidade) for par, quantidade in Counter(pares).items() if quantidade > 1]
+    return incompativeis, duplicados, len({lt for lt, _ in pares}), len({chassis for _, chassis in pares})
+
+
+def test_verificacao_agrupada_igual_ao_laco_por_registro():
+    rng = np.random.default_rng(7)
+    linhas = 3000
+    frame = pd.DataFrame({
+        "lt": rng.choice(np.array([f"{1000 + i}" for i in range(300)] + [None, ""], dtype=object), linhas),
+        "chassis": rng.choice(np.array([f"CH{i:06d}" for i in range(2000)] + [None], dtype=object), linhas),
+    })
+    registros = frame.to_dict("records")
+
+    resultado = PlanilhaAnalyzer()._verificar_consistencia(registros, frame, REGRAS)
+
+    incompativeis, duplicados, lts_unicos, chassis_unicos = esperado_por_laco(registros)
+    achados = resultado["inconsistencias"]
+    assert incompativeis and duplicados
+    assert [(a["descricao"], a["registros_afetados"]) for a in achados if a["tipo"] == "chassis_lt_incompativel"] == [
+        (f"Chassis {chassis} aparece em {len(lts)} LTs: {', '.join(lts)}", lts) for chassis, lts in incompativeis
+    ]
+    assert [a["descricao"] for a in achados if a["tipo"] == "lt_chassis_duplicado"] == [
+        f"LT {lt} tem chassis {chassis} duplicado ({quantidade} ocorrências)" for (lt, chassis), quantidade in duplicados
+    ]
+    assert (resultado["lts_unicos"], resultado["chassis_unicos"]) == (lts_unicos, chassis_unicos)